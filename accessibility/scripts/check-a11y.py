@@ -4,10 +4,34 @@ Xala PM Accessibility Checker
 Checks UI code for WCAG compliance issues
 """
 
-import json
+import os
 import sys
+
+# The shared xalapm-core hook runtime, next to this plugin unless XALAPM_CORE_ROOT points elsewhere
+CORE_ROOT = os.environ.get("XALAPM_CORE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "..", "..", "xalapm-core")
+if os.path.join(CORE_ROOT, "lib") not in sys.path:
+    sys.path.insert(0, os.path.join(CORE_ROOT, "lib"))
+try:
+    import xalapm_hooks as runtime
+except ImportError:
+    runtime = None
+
+# A warm daemon answers the hook before this script imports and defines anything else
+if __name__ == "__main__" and runtime and runtime.answer_early(__file__):
+    sys.exit(0)
+
+import json
 import re
 
+# File types the WCAG checks apply to
+A11Y_EXTENSIONS = (".tsx", ".jsx")
+
+# Color and contrast patterns, checked as text
+A11Y_STYLE_PATTERNS = [
+    (r"color:\s*#[a-fA-F0-9]{3}(?![a-fA-F0-9])", "WCAG 1.4.3", "Check 3-digit hex color contrast ratio"),
+]
+
 # WCAG patterns to check
 A11Y_PATTERNS = [
     # Images
@@ -23,19 +47,53 @@ A11Y_PATTERNS = [
     (r"tabIndex\s*=\s*['\"]?[2-9]", "WCAG 2.4.3", "Avoid tabindex > 1, disrupts natural order"),
     
     # Color and contrast
-    (r"color:\s*#[a-fA-F0-9]{3}(?![a-fA-F0-9])", "WCAG 1.4.3", "Check 3-digit hex color contrast ratio"),
+    *A11Y_STYLE_PATTERNS,
     
     # ARIA
     (r"aria-hidden\s*=\s*['\"]true['\"][^>]*focusable", "ARIA", "Hidden element should not be focusable"),
     (r"role\s*=\s*['\"]button['\"][^>]*(?!tabIndex)", "ARIA", "Custom button role needs tabIndex='0'"),
 ]
 
+# The same checks as attribute lookups on parsed JSX elements, for the shared xalapm-core scanner
+# (":text", ":icon-only" and ":labelled" are facts the parser derives from an element's children and labels)
+A11Y_ELEMENT_RULES = [
+    # Images
+    ({"tags": ["img"], "absent": ["alt"]}, "WCAG 1.1.1", "Image missing alt attribute"),
+    ({"equals": {"alt": ""}}, "WCAG 1.1.1", "Empty alt attribute - use alt='' only for decorative images"),
+    
+    # Forms
+    ({"tags": ["input", "select", "textarea"], "absent": ["aria-label", "aria-labelledby", ":labelled"],
+      "unless": {"type": ["hidden", "submit", "reset", "button", "image"]}},
+     "WCAG 1.3.1", "Input missing label association"),
+    ({"tags": ["button"], "present": [":icon-only"], "absent": ["aria-label", "aria-labelledby", "title"]},
+     "WCAG 4.1.2", "Icon button needs aria-label"),
+    
+    # Interactive elements
+    ({"tags": ["div", "span"], "present": ["onClick"], "absent": ["role"]},
+     "WCAG 2.1.1", "Use button/a for clickable elements, not div"),
+    ({"above": {"tabIndex": 1}}, "WCAG 2.4.3", "Avoid tabindex > 1, disrupts natural order"),
+    
+    # ARIA
+    ({"equals": {"aria-hidden": "true"}, "present": ["focusable"], "unless": {"focusable": ["false"]}},
+     "ARIA", "Hidden element should not be focusable"),
+    ({"equals": {"role": "button"}, "absent": ["tabIndex"]},
+     "ARIA", "Custom button role needs tabIndex='0'"),
+]
+
+# Rule tables exposed to the shared xalapm-core scanner
+ISSUE_KEY = "criterion"
+RULE_TABLES = [
+    {"name": "elements", "extensions": A11Y_EXTENSIONS, "patterns": A11Y_ELEMENT_RULES, "mode": "elements"},
+    {"name": "wcag", "extensions": A11Y_EXTENSIONS, "patterns": A11Y_STYLE_PATTERNS,
+     "flags": re.IGNORECASE | re.DOTALL, "mode": "count", "regions": ("code", "string")},
+]
+
 def check_accessibility(content: str, file_path: str) -> list:
     """Check content for accessibility issues"""
     issues = []
     
     # Only check TSX/JSX files
-    if not file_path.endswith((".tsx", ".jsx")):
+    if not file_path.endswith(A11Y_EXTENSIONS):
         return issues
     
     for pattern, criterion, message in A11Y_PATTERNS:
@@ -49,34 +107,50 @@ def check_accessibility(content: str, file_path: str) -> list:
     
     return issues
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+def format_output(issues: list) -> dict:
+    """Build the PostToolUse hook response for a list of issues"""
+    if not issues:
+        return None
+    
+    feedback = ["♿ Accessibility Review:"]
+    for issue in issues:
+        feedback.append(f"  [{issue['criterion']}] {issue['message']}")
+        feedback.extend(runtime.format_locations(issue) if runtime else ())
     
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "\n".join(feedback)
+        }
+    }
+
+def handle(input_data: dict) -> dict:
+    """Run the accessibility check for one hook payload"""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     
     if tool_name not in ["Write", "Edit"]:
-        sys.exit(0)
+        return None
     
     file_path = tool_input.get("file_path", "")
     content = tool_input.get("content", tool_input.get("new_string", ""))
     
-    issues = check_accessibility(content, file_path)
-    
-    if issues:
-        feedback = ["♿ Accessibility Review:"]
-        for issue in issues:
-            feedback.append(f"  [{issue['criterion']}] {issue['message']}")
-        
-        output = {
-            "hookSpecificOutput": {
-                "hookEventName": "PostToolUse",
-                "additionalContext": "\n".join(feedback)
-            }
-        }
+    return format_output(check_accessibility(content, file_path))
+
+def main():
+    raw = runtime.read_payload() if runtime else sys.stdin.buffer.read()
+    
+    # Prefer the warm xalapm-core daemon or its cached rule bundles
+    if runtime and runtime.run_hook(sys.modules[__name__], raw):
+        sys.exit(0)
+    
+    try:
+        input_data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        sys.exit(0)
+    
+    output = handle(input_data)
+    if output:
         print(json.dumps(output))
     
     sys.exit(0)
@@ -4,8 +4,24 @@ Xala PM Smart Contract Security Scanner
 Scans Solidity/Rust contracts for security vulnerabilities
 """
 
-import json
+import os
 import sys
+
+# The shared xalapm-core hook runtime, next to this plugin unless XALAPM_CORE_ROOT points elsewhere
+CORE_ROOT = os.environ.get("XALAPM_CORE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "..", "..", "xalapm-core")
+if os.path.join(CORE_ROOT, "lib") not in sys.path:
+    sys.path.insert(0, os.path.join(CORE_ROOT, "lib"))
+try:
+    import xalapm_hooks as runtime
+except ImportError:
+    runtime = None
+
+# A warm daemon answers the hook before this script imports and defines anything else
+if __name__ == "__main__" and runtime and runtime.answer_early(__file__):
+    sys.exit(0)
+
+import json
 import re
 
 # Security patterns for smart contracts
@@ -38,15 +54,39 @@ RUST_PATTERNS = [
     (r"unsafe\s*\{", "HIGH", "Unsafe block - requires careful review"),
 ]
 
+# Contract file types and the pattern table each one uses
+CONTRACT_PATTERNS = {
+    ".sol": SOLIDITY_PATTERNS,
+    ".rs": RUST_PATTERNS,
+}
+CONTRACT_EXTENSIONS = tuple(CONTRACT_PATTERNS)
+
+# Modifiers that answer for a finding when the matched function applies one the contract
+# or a base contract defines (shell-style, case-insensitive names)
+ACCESS_MODIFIERS = ("only*", "*auth*", "*role*", "*admin*", "*owner*")
+CONTRACT_COVERED_BY = {
+    ".sol": {
+        r"\.call\{value:": ("nonreentrant*",),
+        r"function\s+\w+\([^)]*\)\s+public(?!\s+view|\s+pure)": ACCESS_MODIFIERS,
+    },
+}
+
+# Rule tables exposed to the shared xalapm-core scanner
+ISSUE_KEY = "severity"
+# Issue tags that make format_output block the edit; rules with other tags are advisory
+BLOCKING_TAGS = ("CRITICAL",)
+RULE_TABLES = [
+    {"name": ext.lstrip("."), "extensions": (ext,), "patterns": table, "flags": re.IGNORECASE,
+     "regions": ("code",), "covered_by": CONTRACT_COVERED_BY.get(ext)}
+    for ext, table in CONTRACT_PATTERNS.items()
+]
+
 def scan_contract(content: str, file_path: str) -> list:
     """Scan contract for security issues"""
     issues = []
     
-    if file_path.endswith(".sol"):
-        patterns = SOLIDITY_PATTERNS
-    elif file_path.endswith(".rs"):
-        patterns = RUST_PATTERNS
-    else:
+    patterns = next((table for ext, table in CONTRACT_PATTERNS.items() if file_path.endswith(ext)), None)
+    if patterns is None:
         return issues
     
     for pattern, severity, message in patterns:
@@ -58,60 +98,75 @@ def scan_contract(content: str, file_path: str) -> list:
     
     return issues
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+def format_output(issues: list) -> dict:
+    """Build the PostToolUse hook response for a list of issues"""
+    if not issues:
+        return None
+    
+    # Sort by severity
+    severity_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "INFO": 3}
+    issues = sorted(issues, key=lambda x: severity_order.get(x["severity"], 4))
+    
+    critical_count = sum(1 for i in issues if i["severity"] == "CRITICAL")
     
+    feedback = ["🔐 Smart Contract Security Scan:"]
+    if critical_count > 0:
+        feedback.append(f"  ⚠️  {critical_count} CRITICAL issues found!")
+    
+    for issue in issues:
+        icon = "🔴" if issue["severity"] == "CRITICAL" else "🟠" if issue["severity"] == "HIGH" else "🟡"
+        feedback.append(f"  {icon} [{issue['severity']}] {issue['message']}")
+        feedback.extend(runtime.format_locations(issue) if runtime else ())
+    
+    # Block if critical issues in security token code
+    if critical_count > 0:
+        return {
+            "decision": "block",
+            "reason": "\n".join(feedback),
+            "hookSpecificOutput": {
+                "hookEventName": "PostToolUse",
+                "additionalContext": "\n".join(feedback)
+            }
+        }
+    
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "\n".join(feedback)
+        }
+    }
+
+def handle(input_data: dict) -> dict:
+    """Run the contract security scan for one hook payload"""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     
     if tool_name not in ["Write", "Edit"]:
-        sys.exit(0)
+        return None
     
     file_path = tool_input.get("file_path", "")
     content = tool_input.get("content", tool_input.get("new_string", ""))
     
     # Only scan contract files
-    if not file_path.endswith((".sol", ".rs")):
+    if not file_path.endswith(CONTRACT_EXTENSIONS):
+        return None
+    
+    return format_output(scan_contract(content, file_path))
+
+def main():
+    raw = runtime.read_payload() if runtime else sys.stdin.buffer.read()
+    
+    # Prefer the warm xalapm-core daemon or its cached rule bundles
+    if runtime and runtime.run_hook(sys.modules[__name__], raw):
         sys.exit(0)
     
-    issues = scan_contract(content, file_path)
-    
-    if issues:
-        # Sort by severity
-        severity_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "INFO": 3}
-        issues.sort(key=lambda x: severity_order.get(x["severity"], 4))
-        
-        critical_count = sum(1 for i in issues if i["severity"] == "CRITICAL")
-        
-        feedback = ["🔐 Smart Contract Security Scan:"]
-        if critical_count > 0:
-            feedback.append(f"  ⚠️  {critical_count} CRITICAL issues found!")
-        
-        for issue in issues:
-            icon = "🔴" if issue["severity"] == "CRITICAL" else "🟠" if issue["severity"] == "HIGH" else "🟡"
-            feedback.append(f"  {icon} [{issue['severity']}] {issue['message']}")
-        
-        # Block if critical issues in security token code
-        if critical_count > 0:
-            output = {
-                "decision": "block",
-                "reason": "\n".join(feedback),
-                "hookSpecificOutput": {
-                    "hookEventName": "PostToolUse",
-                    "additionalContext": "\n".join(feedback)
-                }
-            }
-        else:
-            output = {
-                "hookSpecificOutput": {
-                    "hookEventName": "PostToolUse",
-                    "additionalContext": "\n".join(feedback)
-                }
-            }
-        
+    try:
+        input_data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        sys.exit(0)
+    
+    output = handle(input_data)
+    if output:
         print(json.dumps(output))
     
     sys.exit(0)
@@ -4,10 +4,28 @@ Xala PM Code Review Hook
 Analyzes code changes for common issues and patterns
 """
 
-import json
+import os
 import sys
+
+# The shared xalapm-core hook runtime, next to this plugin unless XALAPM_CORE_ROOT points elsewhere
+CORE_ROOT = os.environ.get("XALAPM_CORE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "..", "..", "xalapm-core")
+if os.path.join(CORE_ROOT, "lib") not in sys.path:
+    sys.path.insert(0, os.path.join(CORE_ROOT, "lib"))
+try:
+    import xalapm_hooks as runtime
+except ImportError:
+    runtime = None
+
+# A warm daemon answers the hook before this script imports and defines anything else
+if __name__ == "__main__" and runtime and runtime.answer_early(__file__):
+    sys.exit(0)
+
+import json
 import re
-from pathlib import Path
+
+# File types the review applies to
+CODE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".py", ".rs", ".go", ".sol")
 
 # Patterns to check for in code
 CODE_PATTERNS = [
@@ -32,6 +50,25 @@ CODE_PATTERNS = [
     (r"useEffect\(\s*\(\)\s*=>\s*\{[^}]*fetch", "react", "Add cleanup for fetch in useEffect"),
 ]
 
+# Source regions the shared scanner shows each pattern; comments and strings are masked by default
+CODE_RULE_REGIONS = {
+    r"password.*=.*['\"][^'\"]+['\"]": ("code", "string"),
+    r"api[_-]?key.*=.*['\"][^'\"]+['\"]": ("code", "string"),
+    r"// TODO": ("comment",),
+    r"// FIXME": ("comment",),
+    r"useState\([^)]*\)\s*//": ("code", "comment"),
+}
+
+# Rule tables exposed to the shared xalapm-core scanner
+ISSUE_KEY = "category"
+# Where each category ranks when findings are trimmed to the hook's feedback budget
+TAG_SEVERITY = {"security": "HIGH", "react": "MEDIUM", "typescript": "MEDIUM", "performance": "LOW",
+                "cleanup": "LOW", "todo": "INFO"}
+RULE_TABLES = [
+    {"name": "code", "extensions": CODE_EXTENSIONS, "patterns": CODE_PATTERNS, "flags": re.IGNORECASE,
+     "regions": ("code",), "rule_regions": CODE_RULE_REGIONS},
+]
+
 def analyze_content(content: str, file_path: str) -> list:
     """Analyze code content for issues"""
     issues = []
@@ -46,53 +83,68 @@ def analyze_content(content: str, file_path: str) -> list:
     
     return issues
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)  # No input, continue
+def format_output(issues: list) -> dict:
+    """Build the PostToolUse hook response for a list of issues"""
+    if not issues:
+        return None
+    
+    # Group by category
+    by_category = {}
+    for issue in issues:
+        cat = issue["category"]
+        if cat not in by_category:
+            by_category[cat] = []
+        by_category[cat].append(issue)
     
+    # Build feedback message
+    feedback = []
+    for cat, grouped in by_category.items():
+        feedback.append(f"[{cat.upper()}]")
+        for issue in grouped:
+            feedback.append(f"  • {issue['message']}")
+            feedback.extend(runtime.format_locations(issue) if runtime else ())
+    
+    # Return as additional context for Claude
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "Code review findings:\n" + "\n".join(feedback)
+        }
+    }
+
+def handle(input_data: dict) -> dict:
+    """Run the code review for one hook payload"""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     
     # Only analyze Write/Edit operations
     if tool_name not in ["Write", "Edit"]:
-        sys.exit(0)
+        return None
     
     file_path = tool_input.get("file_path", "")
     content = tool_input.get("content", tool_input.get("new_string", ""))
     
     # Skip non-code files
-    code_extensions = {".ts", ".tsx", ".js", ".jsx", ".py", ".rs", ".go", ".sol"}
-    if not any(file_path.endswith(ext) for ext in code_extensions):
-        sys.exit(0)
+    if not file_path.endswith(CODE_EXTENSIONS):
+        return None
     
     # Analyze the code
-    issues = analyze_content(content, file_path)
-    
-    if issues:
-        # Group by category
-        by_category = {}
-        for issue in issues:
-            cat = issue["category"]
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(issue["message"])
-        
-        # Build feedback message
-        feedback = []
-        for cat, messages in by_category.items():
-            feedback.append(f"[{cat.upper()}]")
-            for msg in messages:
-                feedback.append(f"  • {msg}")
-        
-        # Return as additional context for Claude
-        output = {
-            "hookSpecificOutput": {
-                "hookEventName": "PostToolUse",
-                "additionalContext": "Code review findings:\n" + "\n".join(feedback)
-            }
-        }
+    return format_output(analyze_content(content, file_path))
+
+def main():
+    raw = runtime.read_payload() if runtime else sys.stdin.buffer.read()
+    
+    # Prefer the warm xalapm-core daemon or its cached rule bundles
+    if runtime and runtime.run_hook(sys.modules[__name__], raw):
+        sys.exit(0)
+    
+    try:
+        input_data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        sys.exit(0)  # No input, continue
+    
+    output = handle(input_data)
+    if output:
         print(json.dumps(output))
     
     sys.exit(0)
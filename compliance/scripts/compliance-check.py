@@ -4,8 +4,24 @@ Xala PM Compliance Checker
 Validates code against regulatory requirements (GDPR, Security Tokens, etc.)
 """
 
-import json
+import os
 import sys
+
+# The shared xalapm-core hook runtime, next to this plugin unless XALAPM_CORE_ROOT points elsewhere
+CORE_ROOT = os.environ.get("XALAPM_CORE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "..", "..", "xalapm-core")
+if os.path.join(CORE_ROOT, "lib") not in sys.path:
+    sys.path.insert(0, os.path.join(CORE_ROOT, "lib"))
+try:
+    import xalapm_hooks as runtime
+except ImportError:
+    runtime = None
+
+# A warm daemon answers the hook before this script imports and defines anything else
+if __name__ == "__main__" and runtime and runtime.answer_early(__file__):
+    sys.exit(0)
+
+import json
 import re
 
 # Compliance patterns
@@ -29,23 +45,51 @@ COMPLIANCE_PATTERNS = {
     ]
 }
 
+# File types each regulation applies to (None = any file)
+COMPLIANCE_SCOPES = {
+    # Security token patterns for Solidity
+    "security_token": (".sol",),
+    # GDPR for frontend code
+    "gdpr": (".tsx", ".jsx", ".ts", ".js"),
+    # PCI-DSS for any code
+    "pci_dss": None,
+}
+
+# Patterns that also need string literals; the shared scanner masks comments and strings for the rest
+COMPLIANCE_RULE_REGIONS = {
+    r"localStorage\.setItem.*user": ("code", "string"),
+    r"cookie.*=(?!.*consent)": ("code", "string"),
+    r"console\.log.*card": ("code", "string"),
+}
+
+# Solidity modifiers that answer for a finding when the matched function applies one the
+# contract or a base contract defines (shell-style, case-insensitive names)
+COMPLIANCE_COVERED_BY = {
+    r"transfer\s*\([^)]+\)(?!.*whitelist)": ("*whitelist*", "*allowlist*"),
+    r"mint\s*\([^)]+\)(?!.*onlyOwner|onlyAdmin)": ("only*", "*auth*", "*role*", "*admin*", "*owner*"),
+}
+
+# Rule tables exposed to the shared xalapm-core scanner
+ISSUE_KEY = "severity"
+# Issue tags that make format_output block the edit; rules with other tags are advisory
+BLOCKING_TAGS = ("CRITICAL",)
+RULE_TABLES = [
+    {"name": name, "extensions": COMPLIANCE_SCOPES[name], "patterns": patterns, "flags": re.IGNORECASE,
+     "regions": ("code",), "rule_regions": COMPLIANCE_RULE_REGIONS,
+     "covered_by": COMPLIANCE_COVERED_BY}
+    for name, patterns in COMPLIANCE_PATTERNS.items()
+]
+
 def check_compliance(content: str, file_path: str) -> list:
     """Check for compliance issues"""
     issues = []
     
-    # Determine which patterns to apply based on file content/path
+    # Determine which patterns to apply based on file path
     patterns_to_check = []
-    
-    # Security token patterns for Solidity
-    if file_path.endswith(".sol"):
-        patterns_to_check.extend(COMPLIANCE_PATTERNS["security_token"])
-    
-    # GDPR for frontend code
-    if file_path.endswith((".tsx", ".jsx", ".ts", ".js")):
-        patterns_to_check.extend(COMPLIANCE_PATTERNS["gdpr"])
-    
-    # PCI-DSS for any code
-    patterns_to_check.extend(COMPLIANCE_PATTERNS["pci_dss"])
+    for name, patterns in COMPLIANCE_PATTERNS.items():
+        extensions = COMPLIANCE_SCOPES[name]
+        if extensions is None or file_path.endswith(extensions):
+            patterns_to_check.extend(patterns)
     
     for pattern, severity, message in patterns_to_check:
         if re.search(pattern, content, re.IGNORECASE):
@@ -56,48 +100,63 @@ def check_compliance(content: str, file_path: str) -> list:
     
     return issues
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+def format_output(issues: list) -> dict:
+    """Build the PostToolUse hook response for a list of issues"""
+    if not issues:
+        return None
+    
+    critical = [i for i in issues if i["severity"] == "CRITICAL"]
+    
+    feedback = ["📋 Compliance Review:"]
+    if critical:
+        feedback.append(f"  ⛔ {len(critical)} CRITICAL compliance violations!")
+    
+    for issue in issues:
+        icon = "⛔" if issue["severity"] == "CRITICAL" else "⚠️" if issue["severity"] == "HIGH" else "ℹ️"
+        feedback.append(f"  {icon} [{issue['severity']}] {issue['message']}")
+        feedback.extend(runtime.format_locations(issue) if runtime else ())
+    
+    # Block on critical compliance issues
+    if critical:
+        return {
+            "decision": "block",
+            "reason": "\n".join(feedback)
+        }
     
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "\n".join(feedback)
+        }
+    }
+
+def handle(input_data: dict) -> dict:
+    """Run the compliance check for one hook payload"""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     
     if tool_name not in ["Write", "Edit"]:
-        sys.exit(0)
+        return None
     
     file_path = tool_input.get("file_path", "")
     content = tool_input.get("content", tool_input.get("new_string", ""))
     
-    issues = check_compliance(content, file_path)
+    return format_output(check_compliance(content, file_path))
+
+def main():
+    raw = runtime.read_payload() if runtime else sys.stdin.buffer.read()
+    
+    # Prefer the warm xalapm-core daemon or its cached rule bundles
+    if runtime and runtime.run_hook(sys.modules[__name__], raw):
+        sys.exit(0)
+    
+    try:
+        input_data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        sys.exit(0)
     
-    if issues:
-        critical = [i for i in issues if i["severity"] == "CRITICAL"]
-        
-        feedback = ["📋 Compliance Review:"]
-        if critical:
-            feedback.append(f"  ⛔ {len(critical)} CRITICAL compliance violations!")
-        
-        for issue in issues:
-            icon = "⛔" if issue["severity"] == "CRITICAL" else "⚠️" if issue["severity"] == "HIGH" else "ℹ️"
-            feedback.append(f"  {icon} [{issue['severity']}] {issue['message']}")
-        
-        # Block on critical compliance issues
-        if critical:
-            output = {
-                "decision": "block",
-                "reason": "\n".join(feedback)
-            }
-        else:
-            output = {
-                "hookSpecificOutput": {
-                    "hookEventName": "PostToolUse",
-                    "additionalContext": "\n".join(feedback)
-                }
-            }
-        
+    output = handle(input_data)
+    if output:
         print(json.dumps(output))
     
     sys.exit(0)
@@ -4,10 +4,25 @@ Xala PM CI/CD Configuration Validator
 Validates GitHub Actions, GitLab CI, and other CI config files
 """
 
-import json
+import os
 import sys
+
+# The shared xalapm-core hook runtime, next to this plugin unless XALAPM_CORE_ROOT points elsewhere
+CORE_ROOT = os.environ.get("XALAPM_CORE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "..", "..", "xalapm-core")
+if os.path.join(CORE_ROOT, "lib") not in sys.path:
+    sys.path.insert(0, os.path.join(CORE_ROOT, "lib"))
+try:
+    import xalapm_hooks as runtime
+except ImportError:
+    runtime = None
+
+# A warm daemon answers the hook before this script imports and defines anything else
+if __name__ == "__main__" and runtime and runtime.answer_early(__file__):
+    sys.exit(0)
+
+import json
 import re
-from pathlib import Path
 
 # CI/CD security patterns
 CI_PATTERNS = [
@@ -31,21 +46,62 @@ CI_PATTERNS = [
     (r"runs-on:\s*self-hosted", "INFO", "Self-hosted runners need security hardening"),
 ]
 
+# Patterns above that guess from raw text where a key sits in a GitHub workflow
+CI_STRUCTURE_PATTERNS = {
+    r"\$\{\{\s*secrets\.\w+\s*\}\}.*echo",
+    r"pull_request:(?!.*branches)",
+    r"permissions:\s*\n\s+contents:\s*write",
+    r"runs-on:\s*self-hosted",
+}
+
+# The same checks as path queries over each parsed workflow, for the shared xalapm-core scanner
+# ("*" is any job, step or list item; findings are reported per job)
+WORKFLOW_RULES = [
+    # Secrets exposure
+    ({"path": "jobs.*.steps.*.run", "matches": r"\becho\b.*\$\{\{\s*secrets\.\w+\s*\}\}"},
+     "HIGH", "Don't echo secrets - they may appear in logs"),
+    
+    # Best practices
+    ({"path": "on.pull_request", "absent": ["branches", "branches-ignore"]},
+     "INFO", "Consider limiting PR trigger to specific branches"),
+    
+    # Security hardening
+    ({"path": ["permissions.contents", "jobs.*.permissions.contents"], "equals": "write"},
+     "HIGH", "Limit write permissions when possible"),
+    ({"path": ["permissions", "jobs.*.permissions"], "equals": "write-all"},
+     "HIGH", "Limit write permissions when possible"),
+    ({"path": ["jobs.*.runs-on", "jobs.*.runs-on.labels"], "matches": r"^self-hosted$"},
+     "INFO", "Self-hosted runners need security hardening"),
+]
+
+# CI config locations the validator applies to
+CI_FILES = [
+    ".github/workflows/",
+    ".gitlab-ci.yml",
+    "Jenkinsfile",
+    ".travis.yml",
+    "azure-pipelines.yml",
+    "bitbucket-pipelines.yml"
+]
+
+# Rule tables exposed to the shared xalapm-core scanner
+ISSUE_KEY = "severity"
+RULE_TABLES = [
+    {"name": "ci", "paths": CI_FILES, "exclude": (".github/workflows/",), "patterns": CI_PATTERNS,
+     "flags": re.IGNORECASE | re.MULTILINE, "regions": ("code", "string")},
+    {"name": "workflow-text", "paths": (".github/workflows/",),
+     "patterns": [rule for rule in CI_PATTERNS if rule[0] not in CI_STRUCTURE_PATTERNS],
+     "flags": re.IGNORECASE | re.MULTILINE, "regions": ("code", "string")},
+    {"name": "workflow", "paths": (".github/workflows/",), "patterns": WORKFLOW_RULES,
+     "flags": re.IGNORECASE, "mode": "workflow"},
+]
+
 def validate_ci_config(content: str, file_path: str) -> list:
     """Validate CI/CD configuration"""
     issues = []
     
     # Only check CI config files
-    ci_files = [
-        ".github/workflows/",
-        ".gitlab-ci.yml",
-        "Jenkinsfile",
-        ".travis.yml",
-        "azure-pipelines.yml",
-        "bitbucket-pipelines.yml"
-    ]
-    
-    is_ci_file = any(ci in file_path for ci in ci_files)
+    is_ci_file = any(ci in file_path for ci in CI_FILES)
     if not is_ci_file:
         return issues
     
@@ -58,38 +114,55 @@ def validate_ci_config(content: str, file_path: str) -> list:
     
     return issues
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+def format_output(issues: list) -> dict:
+    """Build the PostToolUse hook response for a list of issues"""
+    if not issues:
+        return None
+    
+    severity_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "INFO": 3}
+    issues = sorted(issues, key=lambda x: severity_order.get(x["severity"], 4))
+    
+    feedback = ["🔧 CI/CD Security Review:"]
+    for issue in issues:
+        icon = "🔴" if issue["severity"] == "CRITICAL" else "🟠" if issue["severity"] == "HIGH" else "🟡" if issue["severity"] == "MEDIUM" else "ℹ️"
+        job = f" (job {issue['job']})" if issue.get("job") else ""
+        feedback.append(f"  {icon} [{issue['severity']}] {issue['message']}{job}")
+        feedback.extend(runtime.format_locations(issue) if runtime else ())
     
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "\n".join(feedback)
+        }
+    }
+
+def handle(input_data: dict) -> dict:
+    """Run the CI/CD validation for one hook payload"""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     
     if tool_name not in ["Write", "Edit"]:
-        sys.exit(0)
+        return None
     
     file_path = tool_input.get("file_path", "")
     content = tool_input.get("content", tool_input.get("new_string", ""))
     
-    issues = validate_ci_config(content, file_path)
-    
-    if issues:
-        severity_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "INFO": 3}
-        issues.sort(key=lambda x: severity_order.get(x["severity"], 4))
-        
-        feedback = ["🔧 CI/CD Security Review:"]
-        for issue in issues:
-            icon = "🔴" if issue["severity"] == "CRITICAL" else "🟠" if issue["severity"] == "HIGH" else "🟡" if issue["severity"] == "MEDIUM" else "ℹ️"
-            feedback.append(f"  {icon} [{issue['severity']}] {issue['message']}")
-        
-        output = {
-            "hookSpecificOutput": {
-                "hookEventName": "PostToolUse",
-                "additionalContext": "\n".join(feedback)
-            }
-        }
+    return format_output(validate_ci_config(content, file_path))
+
+def main():
+    raw = runtime.read_payload() if runtime else sys.stdin.buffer.read()
+    
+    # Prefer the warm xalapm-core daemon or its cached rule bundles
+    if runtime and runtime.run_hook(sys.modules[__name__], raw):
+        sys.exit(0)
+    
+    try:
+        input_data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        sys.exit(0)
+    
+    output = handle(input_data)
+    if output:
         print(json.dumps(output))
     
     sys.exit(0)
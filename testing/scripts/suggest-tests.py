@@ -4,29 +4,73 @@ Xala PM Test Suggestion Hook
 Suggests tests for new code
 """
 
-import json
+import os
 import sys
+
+# The shared xalapm-core hook runtime, next to this plugin unless XALAPM_CORE_ROOT points elsewhere
+CORE_ROOT = os.environ.get("XALAPM_CORE_ROOT") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "..", "..", "xalapm-core")
+if os.path.join(CORE_ROOT, "lib") not in sys.path:
+    sys.path.insert(0, os.path.join(CORE_ROOT, "lib"))
+try:
+    import xalapm_hooks as runtime
+except ImportError:
+    runtime = None
+
+# A warm daemon answers the hook before this script imports and defines anything else
+if __name__ == "__main__" and runtime and runtime.answer_early(__file__):
+    sys.exit(0)
+
+import json
 import re
-from pathlib import Path
+
+# File types test suggestions apply to
+SOURCE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx")
+
+# Test files themselves are skipped
+TEST_MARKERS = ("test", "spec")
+
+# TypeScript/JavaScript functions that should be tested
+EXPORT_PATTERNS = [
+    (r"export\s+(?:async\s+)?function\s+(\w+)", "unit", "Consider unit tests for: {}"),
+    (r"export\s+const\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>", "unit", "Consider unit tests for: {}"),
+    (r"export\s+const\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*:\s*\w+\s*=>", "unit", "Consider unit tests for: {}"),
+]
+
+# Kinds of code that call for a specific kind of test
+TEST_KIND_PATTERNS = [
+    # React components
+    (r"export\s+(?:default\s+)?function\s+\w+\([^)]*\)\s*{[^}]*return\s*\(?\s*<", "component", "Add component tests with React Testing Library"),
+    # API handlers
+    (r"(app\.(get|post|put|delete)|router\.(get|post|put|delete))", "integration", "Add API integration tests"),
+    # Hooks
+    (r"export\s+(?:const|function)\s+use\w+", "hook", "Test custom hooks with @testing-library/react-hooks"),
+]
+
+# Rule tables exposed to the shared xalapm-core scanner; skip_tested leaves out
+# exports that a test file in the project already imports
+ISSUE_KEY = "type"
+# Test suggestions rank last when findings are trimmed to the hook's feedback budget
+TAG_SEVERITY = {"unit": "INFO", "component": "INFO", "integration": "INFO", "hook": "INFO"}
+RULE_TABLES = [
+    {"name": "exports", "extensions": SOURCE_EXTENSIONS, "exclude": TEST_MARKERS,
+     "patterns": EXPORT_PATTERNS, "flags": 0, "mode": "collect", "limit": 5, "regions": ("code",),
+     "skip_tested": True},
+    {"name": "kinds", "extensions": SOURCE_EXTENSIONS, "exclude": TEST_MARKERS,
+     "patterns": TEST_KIND_PATTERNS, "flags": 0, "regions": ("code",)},
+]
 
 def analyze_for_tests(content: str, file_path: str) -> list:
     """Analyze code and suggest tests"""
     suggestions = []
     
     # Skip test files themselves
-    if "test" in file_path.lower() or "spec" in file_path.lower():
+    if any(marker in file_path.lower() for marker in TEST_MARKERS):
         return suggestions
     
     # Check for functions that should be tested
-    # TypeScript/JavaScript functions
-    func_patterns = [
-        r"export\s+(?:async\s+)?function\s+(\w+)",
-        r"export\s+const\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>",
-        r"export\s+const\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*:\s*\w+\s*=>",
-    ]
-    
     functions = []
-    for pattern in func_patterns:
+    for pattern, _, _ in EXPORT_PATTERNS:
         matches = re.findall(pattern, content)
         functions.extend(matches)
     
@@ -36,61 +80,64 @@ def analyze_for_tests(content: str, file_path: str) -> list:
             "message": f"Consider unit tests for: {', '.join(functions[:5])}"
         })
     
-    # Check for React components
-    if re.search(r"export\s+(?:default\s+)?function\s+\w+\([^)]*\)\s*{[^}]*return\s*\(?\s*<", content):
-        suggestions.append({
-            "type": "component",
-            "message": "Add component tests with React Testing Library"
-        })
-    
-    # Check for API handlers
-    if re.search(r"(app\.(get|post|put|delete)|router\.(get|post|put|delete))", content):
-        suggestions.append({
-            "type": "integration",
-            "message": "Add API integration tests"
-        })
-    
-    # Check for hooks
-    if re.search(r"export\s+(?:const|function)\s+use\w+", content):
-        suggestions.append({
-            "type": "hook",
-            "message": "Test custom hooks with @testing-library/react-hooks"
-        })
+    # Check for components, API handlers and hooks
+    for pattern, kind, message in TEST_KIND_PATTERNS:
+        if re.search(pattern, content):
+            suggestions.append({
+                "type": kind,
+                "message": message
+            })
     
     return suggestions
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(0)
+def format_output(suggestions: list) -> dict:
+    """Build the PostToolUse hook response for a list of suggestions"""
+    if not suggestions:
+        return None
+    
+    feedback = ["🧪 Test Suggestions:"]
+    for s in suggestions:
+        feedback.append(f"  [{s['type']}] {s['message']}")
+        feedback.extend(runtime.format_locations(s) if runtime else ())
     
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": "\n".join(feedback)
+        }
+    }
+
+def handle(input_data: dict) -> dict:
+    """Suggest tests for one hook payload"""
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
     
     if tool_name not in ["Write", "Edit"]:
-        sys.exit(0)
+        return None
     
     file_path = tool_input.get("file_path", "")
     content = tool_input.get("content", tool_input.get("new_string", ""))
     
     # Only analyze TypeScript/JavaScript
-    if not file_path.endswith((".ts", ".tsx", ".js", ".jsx")):
+    if not file_path.endswith(SOURCE_EXTENSIONS):
+        return None
+    
+    return format_output(analyze_for_tests(content, file_path))
+
+def main():
+    raw = runtime.read_payload() if runtime else sys.stdin.buffer.read()
+    
+    # Prefer the warm xalapm-core daemon or its cached rule bundles
+    if runtime and runtime.run_hook(sys.modules[__name__], raw):
         sys.exit(0)
     
-    suggestions = analyze_for_tests(content, file_path)
+    try:
+        input_data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        sys.exit(0)
     
-    if suggestions:
-        feedback = ["🧪 Test Suggestions:"]
-        for s in suggestions:
-            feedback.append(f"  [{s['type']}] {s['message']}")
-        
-        output = {
-            "hookSpecificOutput": {
-                "hookEventName": "PostToolUse",
-                "additionalContext": "\n".join(feedback)
-            }
-        }
+    output = handle(input_data)
+    if output:
         print(json.dumps(output))
     
     sys.exit(0)
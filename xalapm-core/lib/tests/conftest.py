@@ -0,0 +1,63 @@
+"""
+Shared setup for the hook runtime tests: private cache, data and runtime directories, and the
+untrimmed defaults the runtime reads from the environment when it is first imported
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+_ROOT = tempfile.mkdtemp(prefix="xalapm-hooks-tests-")
+os.environ["XALAPM_HOOKS_CACHE"] = os.path.join(_ROOT, "cache")
+os.environ["XALAPM_HOOKS_DATA"] = os.path.join(_ROOT, "data")
+os.environ["XDG_RUNTIME_DIR"] = os.path.join(_ROOT, "run")
+os.environ["XALAPM_HOOKS_SOCKET"] = os.path.join(_ROOT, "run", "hookd.sock")
+os.environ.setdefault("XALAPM_HOOKS_REGIONS", "1")
+os.environ["XALAPM_HOOKS_STORE"] = "0"
+os.environ["XALAPM_HOOKS_STATS"] = "0"
+os.environ["XALAPM_HOOKS_RESULT_CACHE_MB"] = "0"
+os.environ["XALAPM_HOOKS_MAX_FINDINGS"] = "0"
+os.environ["XALAPM_HOOKS_MAX_BYTES"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xalapm_hooks import payload  # noqa: E402
+from xalapm_hooks.engine import Registry  # noqa: E402
+from xalapm_hooks.paths import PLUGINS_ROOT  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def registry() -> Registry:
+    return Registry()
+
+
+@pytest.fixture(scope="session")
+def checker(registry):
+    """An installed checker by plugin name"""
+    checkers = {checker.name: checker for checker in registry.installed()}
+    return checkers.__getitem__
+
+
+def event(tool_name: str, file_path: str, **tool_input) -> payload.HookEvent:
+    """A parsed PostToolUse payload for a Write or Edit of file_path"""
+    return payload.parse(raw(tool_name, file_path, **tool_input))
+
+
+def raw(tool_name: str, file_path: str, **tool_input) -> bytes:
+    return json.dumps({"hook_event_name": "PostToolUse", "tool_name": tool_name,
+                       "tool_input": {"file_path": str(file_path), **tool_input}}).encode()
+
+
+def script(plugin: str) -> str:
+    """Path of the checker script a plugin's hook runs"""
+    with open(os.path.join(PLUGINS_ROOT, plugin, "hooks", "hooks.json")) as handle:
+        command = json.load(handle)["hooks"]["PostToolUse"][0]["hooks"][0]["command"]
+    return os.path.join(PLUGINS_ROOT, plugin, command.split("/", 1)[1].rstrip('"'))
+
+
+def lines(issues: list, message: str) -> list:
+    """Lines of every location of the issues with a message"""
+    return [location["line"] for issue in issues if issue["message"] == message for location in issue["locations"]]
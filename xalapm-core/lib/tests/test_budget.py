@@ -0,0 +1,80 @@
+"""
+The feedback budget: findings ranked across plugins, trimmed, deduplicated and written out in full
+"""
+
+import re
+
+import pytest
+
+from conftest import event
+from xalapm_hooks import budget
+
+
+def contract_issue(tag: str, message: str, line: int) -> dict:
+    return {"severity": tag, "message": message, "file": "/project/Vault.sol", "rule": "blockchain/sol/0",
+            "locations": [{"line": line, "column": 1, "snippet": message}]}
+
+
+ISSUES = [contract_issue("INFO", "info one", 1), contract_issue("HIGH", "high one", 5),
+          contract_issue("MEDIUM", "medium one", 2), contract_issue("CRITICAL", "critical one", 9),
+          contract_issue("HIGH", "high two", 3)]
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    def apply(findings: int = 0, size: int = 0):
+        monkeypatch.setattr(budget, "MAX_FINDINGS", findings)
+        monkeypatch.setattr(budget, "MAX_BYTES", size)
+    return apply
+
+
+def report(text: str) -> str:
+    return open(re.search(r"full report: (\S+)", text).group(1)).read()
+
+
+def test_the_most_severe_findings_are_kept(limits, checker):
+    limits(findings=3)
+    [output] = budget.respond(event("Write", "/project/Vault.sol", content=""), [(checker("blockchain"), ISSUES, [])])
+    assert output["decision"] == "block"
+    reason = output["reason"]
+    assert reason.index("critical one") < reason.index("high two") < reason.index("high one")
+    assert "info one" not in reason and "medium one" not in reason
+    assert "Showing 3 of 5 findings, most severe first" in reason
+    assert "info one" in report(reason) and "medium one" in report(reason)
+
+
+def test_blocking_findings_are_never_cut(limits, checker):
+    limits(findings=1)
+    issues = [contract_issue("CRITICAL", "critical one", 9), contract_issue("CRITICAL", "critical two", 4)] + ISSUES[:2]
+    [output] = budget.respond(event("Write", "/project/Vault.sol", content=""), [(checker("blockchain"), issues, [])])
+    assert "critical one" in output["reason"] and "critical two" in output["reason"]
+    assert "Showing 2 of 4 findings" in output["reason"]
+
+
+def test_the_byte_limit_cuts_at_the_first_finding_over_it(limits, checker):
+    advisory = [issue for issue in ISSUES if issue["severity"] != "CRITICAL"]
+    cost = sum(len(line.encode()) + 1 for issue in advisory[3:] + advisory[1:2]
+               for line in [issue["message"], *budget.format_locations(issue)])
+    limits(size=cost)
+    [output] = budget.respond(event("Write", "/project/Vault.sol", content=""), [(checker("blockchain"), advisory, [])])
+    context = output["hookSpecificOutput"]["additionalContext"]
+    assert "high two" in context and "high one" in context and "medium one" not in context
+    assert "Showing 2 of 4 findings" in context
+
+
+def test_a_finding_another_plugin_reported_is_folded(limits, checker):
+    limits(findings=10)
+    review = [{"category": "security", "message": "High one!", "file": "/project/Vault.sol", "rule": "code-review/x"},
+              {"category": "style", "message": "style", "file": "/project/Vault.sol", "rule": "code-review/y"}]
+    outputs = budget.respond(event("Write", "/project/Vault.sol", content=""),
+                             [(checker("blockchain"), ISSUES[:2], []), (checker("code-review"), review, [])])
+    context = outputs[-1]["hookSpecificOutput"]["additionalContext"]
+    assert "High one!" not in context
+    assert "Showing 3 of 4 findings, most severe first (1 reported by more than one plugin)" in context
+
+
+def test_everything_passes_with_the_limits_lifted(limits, checker):
+    limits()
+    outputs = budget.respond(event("Write", "/project/Vault.sol", content=""), [(checker("blockchain"), ISSUES, [])])
+    assert outputs == [checker("blockchain").respond(ISSUES)]
+    assert "Showing" not in str(outputs)
@@ -0,0 +1,57 @@
+"""
+Findings the modifiers of a contract, or of the contracts it inherits, answer for
+"""
+
+from conftest import event, lines
+
+GUARD = """pragma solidity ^0.8.0;
+
+contract Guard {
+    modifier nonReentrant() { _; }
+}
+"""
+
+VAULT = """pragma solidity ^0.8.0;
+
+import "./Guard.sol";
+
+contract Owned {
+    address owner;
+    modifier onlyOwner() { require(msg.sender == owner); _; }
+}
+
+contract Vault is Owned, Guard {
+    function sweep(address to) public onlyOwner {
+        to.call{value: 1}("");
+    }
+
+    function pay(address to) external nonReentrant {
+        to.call{value: 1}("");
+    }
+
+    function deposit(uint amount) public {
+        total += amount;
+    }
+}
+"""
+
+
+def test_modifiers_answer_for_the_findings_in_their_functions(tmp_path, checker):
+    (tmp_path / "foundry.toml").write_text("")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "Guard.sol").write_text(GUARD)
+    path = tmp_path / "src" / "Vault.sol"
+    path.write_text(VAULT)
+    
+    issues = checker("blockchain").findings(event("Write", path, content=VAULT))
+    assert lines(issues, "Reentrancy risk - use ReentrancyGuard") == [12]
+    assert lines(issues, "Consider access control for public functions") == [19]
+
+
+def test_an_unresolved_modifier_answers_for_nothing(tmp_path, checker):
+    (tmp_path / "foundry.toml").write_text("")
+    path = tmp_path / "Vault.sol"
+    path.write_text(VAULT)
+    
+    issues = checker("blockchain").findings(event("Write", path, content=VAULT))
+    assert lines(issues, "Reentrancy risk - use ReentrancyGuard") == [12, 16]
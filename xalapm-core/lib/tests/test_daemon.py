@@ -0,0 +1,71 @@
+"""
+XHK1 requests between the hook client and a daemon serving on a private socket
+"""
+
+import json
+import threading
+
+import pytest
+
+from conftest import event, raw, script
+from xalapm_hooks import client, daemon
+from xalapm_hooks.paths import runtime_path, socket_path
+
+TSX = '<img src="a.png" />\n<div onClick={go}>x</div>\n'
+
+
+@pytest.fixture
+def server():
+    runtime_path()
+    server = daemon._bind(socket_path(), 60)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_ping(server):
+    assert client.ping()
+    assert client.request(b"PING") == b""
+
+
+def test_check_answers_like_the_checker(server, checker):
+    body = raw("Write", "/project/src/App.tsx", content=TSX)
+    reply = client.request(b"CHECK " + script("accessibility").encode(), body)
+    assert json.loads(reply) == checker("accessibility").check(event("Write", "/project/src/App.tsx", content=TSX))
+    assert "Image missing alt attribute" in reply.decode()
+
+
+def test_checkall_answers_like_the_registry(server, registry):
+    body = raw("Write", "/project/src/App.tsx", content=TSX)
+    reply = client.request(b"CHECKALL", body)
+    assert json.loads(reply) == registry.check(event("Write", "/project/src/App.tsx", content=TSX))
+
+
+def test_unchecked_payloads_get_an_empty_reply(server):
+    assert client.request(b"CHECK " + script("accessibility").encode(), raw("Read", "/project/src/App.tsx")) == b""
+    assert client.request(b"CHECKALL", b"not json") == b""
+
+
+def test_errors_read_as_unreachable(server):
+    assert client.request(b"NOPE") is None
+    assert server.dispatch(b"XHK0 PING", b"") == b"ERR unsupported protocol"
+
+
+def test_only_plugin_hook_scripts_are_run(server, tmp_path):
+    planted = tmp_path / "scripts" / "evil.py"
+    planted.parent.mkdir()
+    planted.write_text("open(__file__ + '.ran', 'w').close()\n")
+    body = raw("Write", "/project/src/App.tsx", content=TSX)
+    for command in (b"CHECK ", b"DEFER "):
+        assert server.dispatch(client.PROTOCOL + b" " + command + bytes(planted), body).startswith(b"ERR ")
+        assert client.request(command + bytes(planted), body) is None
+    assert not (tmp_path / "scripts" / "evil.py.ran").exists()
+
+
+def test_no_daemon(monkeypatch, tmp_path):
+    monkeypatch.setenv("XALAPM_HOOKS_SOCKET", str(tmp_path / "missing.sock"))
+    assert client.request(b"PING") is None
+    assert not client.forward(script("accessibility"), raw("Write", "/project/src/App.tsx", content=TSX))
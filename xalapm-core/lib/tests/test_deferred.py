@@ -0,0 +1,71 @@
+"""
+Deferred feedback: advisory checks leave the response, finish later and reach the next hook from the spool
+"""
+
+import os
+import time
+
+import pytest
+
+from conftest import event
+from xalapm_hooks import deferred
+
+
+def output(context: str) -> dict:
+    return {"hookSpecificOutput": {"hookEventName": "PostToolUse", "additionalContext": context}}
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return deferred.Spool(tmp_path / "spool")
+
+
+def test_a_drain_takes_the_latest_response_per_plugin_and_file(spool):
+    spool.put("s1", "code-review", "/p/a.ts", output("first"))
+    spool.put("s1", "testing", "/p/a.ts", output("tests"))
+    spool.put("s1", "code-review", "/p/a.ts", output("second"))
+    spool.put("s2", "code-review", "/p/b.ts", output("other session"))
+    drained = spool.drain("s1")
+    assert [(record["plugin"], record["output"]["hookSpecificOutput"]["additionalContext"]) for record in drained] \
+        == [("testing", "tests"), ("code-review", "second")]
+    assert spool.drain("s1") == []
+    assert [record["file"] for record in spool.drain("s2")] == ["/p/b.ts"]
+
+
+def test_session_ids_cannot_leave_the_spool(spool):
+    spool.put("../../escape", "code-review", "/p/a.ts", output("x"))
+    assert os.listdir(spool.root) == [".._.._escape.jsonl"]
+    assert len(spool.drain("../../escape")) == 1
+
+
+def test_spooled_feedback_is_appended_to_the_next_response(spool):
+    data = {"session_id": "s1"}
+    assert deferred.attach(output("now"), data, spool) == output("now")
+    spool.put("s1", "code-review", "/p/a.ts", output("later"))
+    context = deferred.attach(output("now"), data, spool)["hookSpecificOutput"]["additionalContext"]
+    assert context.startswith("now") and "Deferred feedback on /p/a.ts:\nlater" in context
+    assert deferred.attach(None, data, spool) is None
+
+
+def test_stop_blocks_only_with_spooled_feedback(spool):
+    assert deferred.stop_response([]) is None
+    spool.put("s1", "code-review", "/p/a.ts", {"decision": "block", "reason": "fix it"})
+    stop = deferred.stop_response(spool.drain("s1"))
+    assert stop["decision"] == "block" and stop["reason"].endswith("fix it")
+
+
+def test_advisory_checkers_are_handed_off_and_finish_in_a_child(registry, spool):
+    found = event("Write", "/project/src/api.ts", content="console.log(password)\n")
+    found.data["session_id"] = "s1"
+    jobs = []
+    assert registry.check(found, ["code-review"], later=lambda *job: jobs.append(job)) is None
+    assert [[checker.name for checker in checkers] for _, checkers in jobs] == [["code-review"]]
+    
+    deferred.detach(jobs, spool)
+    records = []
+    deadline = time.monotonic() + 10
+    while not records and time.monotonic() < deadline:
+        time.sleep(0.01)
+        records = spool.drain("s1")
+    context = deferred.feedback(records)
+    assert "Deferred feedback on /project/src/api.ts" in context and "console.log" in context
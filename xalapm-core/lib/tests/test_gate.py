@@ -0,0 +1,90 @@
+"""
+The diff gate: parsing unified diffs into edit windows, and checking only what staged changes add
+"""
+
+import subprocess
+
+import pytest
+
+from xalapm_hooks import gate
+
+DIFF = """diff --git a/src/app.ts b/src/app.ts
+index 1111111..2222222 100644
+--- a/src/app.ts
++++ b/src/app.ts
+@@ -1,3 +1,4 @@
+ const a = 1;
++const b = 2;
+ const c = 3;
+ const d = 4;
+@@ -20,2 +21,2 @@ function f() {
+-  return a;
++  return b;
+ }
+diff --git a/old.ts b/old.ts
+index 3333333..4444444 100644
+--- a/old.ts
++++ b/old.ts
+@@ -1,2 +1,1 @@
+ keep();
+-drop();
+diff --git "a/caf\\303\\251.ts" "b/caf\\303\\251.ts"
+--- "a/caf\\303\\251.ts"
++++ "b/caf\\303\\251.ts"
+@@ -0,0 +1 @@
++new();
+"""
+
+
+def test_windows_cover_the_hunks_that_add_lines():
+    found = gate.windows(DIFF)
+    assert sorted(found) == ["café.ts", "src/app.ts"]
+    window = found["src/app.ts"]
+    assert window.lines == [(1, 4), (21, 22)]
+    assert window.after.split("\n") == ["const a = 1;", "const b = 2;", "const c = 3;", "const d = 4;",
+                                        "  return b;", "}"]
+    assert window.before.split("\n") == ["const a = 1;", "const c = 3;", "const d = 4;", "  return a;", "}"]
+    assert window.file_line(5) == 21
+
+
+def git(repo, *args) -> None:
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args], cwd=repo, check=True,
+                   capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository whose one commit already logs a value at the top of api.ts"""
+    git(tmp_path, "init", "-q")
+    (tmp_path / "api.ts").write_text("console.log(a)\n" + "".join(f"const v{i} = {i};\n" for i in range(20)))
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "init")
+    return tmp_path
+
+
+def records(repo, revisions: str = None) -> list:
+    return [(record["rule"], [location["line"] for location in record["locations"]])
+            for record in gate.gate(revisions, ["code-review"], cwd=str(repo))]
+
+
+def test_only_what_the_staged_change_adds_is_reported(repo):
+    source = (repo / "api.ts").read_text()
+    (repo / "api.ts").write_text(source.replace("const v1 = 1;", "const v1 = 11;"))
+    git(repo, "add", ".")
+    assert records(repo) == []
+    
+    (repo / "api.ts").write_text(source + "console.log(b)\n")
+    git(repo, "add", ".")
+    assert records(repo) == [("code-review/code/6", [22])]
+
+
+def test_a_revision_range_is_checked_like_staged_changes(repo):
+    (repo / "api.ts").write_text((repo / "api.ts").read_text() + "console.log(b)\n")
+    git(repo, "commit", "-qam", "log b")
+    assert records(repo) == []
+    assert records(repo, "HEAD~1..HEAD") == [("code-review/code/6", [22])]
+
+
+def test_outside_a_repository_the_gate_raises(tmp_path):
+    with pytest.raises(gate.GitError):
+        list(gate.gate(cwd=str(tmp_path)))
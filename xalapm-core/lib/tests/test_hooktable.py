@@ -0,0 +1,96 @@
+"""
+The compiled dispatch table of a marketplace with only some of its plugins installed
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import event
+from xalapm_hooks import hooktable
+from xalapm_hooks.engine import Registry
+from xalapm_hooks.paths import PLUGINS_ROOT
+
+
+@pytest.fixture
+def marketplace(tmp_path, monkeypatch):
+    """accessibility and devops installed; code-review on disk but not listed; ghost listed but missing"""
+    monkeypatch.setenv("CLAUDE_CONFIG_DIR", str(tmp_path / "config"))
+    monkeypatch.delenv("CLAUDE_PROJECT_DIR", raising=False)
+    monkeypatch.chdir(tmp_path)
+    for name in ("accessibility", "devops", "code-review"):
+        os.symlink(os.path.join(PLUGINS_ROOT, name), tmp_path / name)
+    (tmp_path / ".claude-plugin").mkdir()
+    (tmp_path / ".claude-plugin" / "marketplace.json").write_text(json.dumps({
+        "name": "market",
+        "plugins": [{"name": "accessibility", "source": "./accessibility"}, {"name": "devops"}, {"name": "ghost"}],
+        "groups": {"qa": {"plugins": ["accessibility", "code-review"]}},
+    }))
+    return tmp_path
+
+
+def test_only_listed_plugins_on_disk_are_compiled(marketplace):
+    spec = hooktable.compile_table(marketplace)
+    assert spec["plugins"] == ["accessibility", "devops"]
+    assert sorted(spec["checkers"]) == ["accessibility", "devops"]
+
+
+def settings(path, plugins: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"enabledPlugins": plugins}))
+
+
+def test_only_plugins_the_settings_enable_are_compiled(marketplace, monkeypatch):
+    settings(marketplace / "config" / "settings.json", {"accessibility@market": True, "devops@other": True})
+    assert hooktable.compile_table(marketplace)["plugins"] == ["accessibility"]
+    settings(marketplace / ".claude" / "settings.json", {"devops@market": True})
+    settings(marketplace / ".claude" / "settings.local.json", {"accessibility@market": False})
+    assert hooktable.compile_table(marketplace)["plugins"] == ["devops"]
+    
+    hooktable.save(hooktable.compile_table(marketplace))
+    assert hooktable.load(marketplace) is not None
+    settings(marketplace / ".claude" / "settings.local.json", {})
+    assert hooktable.load(marketplace) is None  # toggling a plugin makes the table stale
+    hooktable.save(hooktable.compile_table(marketplace))
+    monkeypatch.setenv("CLAUDE_PROJECT_DIR", str(marketplace / "devops"))
+    assert hooktable.load(marketplace) is None  # and so does another project
+
+
+def test_edits_route_by_tool_and_path(marketplace):
+    table = hooktable.HookTable(hooktable.compile_table(marketplace))
+    assert table.plugins_for("Write", "/project/src/App.tsx") == ["accessibility"]
+    assert table.plugins_for("Edit", "/project/.github/workflows/ci.yml") == ["devops"]
+    assert table.plugins_for("Write", "/project/src/api.ts") == []
+    assert table.plugins_for("Read", "/project/src/App.tsx") == []
+    assert table.plugins_for("Write") == ["accessibility", "devops"]
+
+
+def test_groups_narrow_the_table(marketplace):
+    assert hooktable.compile_table(marketplace, "qa")["plugins"] == ["accessibility"]
+    with pytest.raises(ValueError, match="unknown group"):
+        hooktable.compile_table(marketplace, "everything")
+
+
+def test_saved_tables_go_stale_when_the_marketplace_changes(marketplace):
+    hooktable.save(hooktable.compile_table(marketplace))
+    table = hooktable.load(marketplace)
+    assert table is not None
+    assert table.plugin_of(str(marketplace / "devops" / "scripts" / "ci-validator.py")) == "devops"
+    
+    manifest = marketplace / ".claude-plugin" / "marketplace.json"
+    manifest.write_text(manifest.read_text() + "\n")
+    os.utime(manifest, ns=(0, 0))
+    assert hooktable.load(marketplace) is None
+    assert hooktable.remove(marketplace)
+
+
+def test_a_routed_check_runs_only_the_routed_plugins(marketplace):
+    table = hooktable.HookTable(hooktable.compile_table(marketplace))
+    content = '<img src="a.png" />\n<div onClick={go}>x</div>\n'
+    registry = Registry(root=marketplace)
+    names = table.plugins_for("Write", "/project/src/App.tsx")
+    output = registry.check(event("Write", "/project/src/App.tsx", content=content), names)
+    assert "Image missing alt attribute" in output["hookSpecificOutput"]["additionalContext"]
+    assert [checker.name for checker in registry.installed(names)] == ["accessibility"]
+    assert {checker.name for checker in registry.installed()} == {"accessibility", "code-review", "devops"}
@@ -0,0 +1,47 @@
+"""
+Edits scanned as the window around the change, reporting only the findings the Edit adds
+"""
+
+import pytest
+
+from conftest import event, lines
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "src").mkdir()
+    return tmp_path
+
+
+def test_an_edit_reports_only_what_it_adds(project, checker):
+    path = project / "src" / "api.ts"
+    path.write_text("console.log(a)\n" + "const x = 1;\n" * 30 + "console.log(b)\n")
+    review = checker("code-review")
+    
+    issues = review.findings(event("Edit", path, old_string="const y = 2;", new_string="console.log(b)"))
+    assert lines(issues, "Remove console.log before commit") == [32]
+    assert review.findings(event("Edit", path, old_string="console.log(a)\nconst x = 2;",
+                                 new_string="console.log(a)\nconst x = 1;")) == []
+    assert lines(review.findings(event("Write", path, content=path.read_text())),
+                 "Remove console.log before commit") == [1, 32]
+
+
+def test_an_edit_counts_new_elements_only(project, checker):
+    path = project / "src" / "App.tsx"
+    body = "\n".join(f"<p>line {i}</p>" for i in range(30))
+    path.write_text(f'<img src="a.png" />\n{body}\n<p>hello</p>\n<img src="c.png" />\n<img src="b.png" />\n')
+    a11y = checker("accessibility")
+    
+    issues = a11y.findings(event("Edit", path, old_string="<p>hello</p>",
+                                 new_string='<p>hello</p>\n<img src="c.png" />'))
+    assert [issue["count"] for issue in issues] == [1]
+    assert 33 in lines(issues, "Image missing alt attribute")
+    assert a11y.findings(event("Edit", path, old_string="<p>line 3</p>", new_string="<p>line 4</p>")) == []
+
+
+def test_an_edit_that_cannot_be_placed_scans_new_string(project, checker):
+    path = project / "src" / "api.ts"
+    path.write_text("const x = 1;\n")
+    issues = checker("code-review").findings(event("Edit", path, old_string="x", new_string="console.log(b)"))
+    assert lines(issues, "Remove console.log before commit") == [1]
@@ -0,0 +1,40 @@
+"""
+The JSX parser the element rules read, and the facts it derives from an element's children
+"""
+
+import pytest
+
+from xalapm_hooks import jsxtree
+
+COMPONENT = """const A = () => (
+  <Form onSubmit={e => a < b && go()}>
+    <label>Name <input id="n" {...rest} disabled /></label>
+    {/* <img> in a comment */}
+    <button aria-label="Close"><XIcon /></button>
+    <button><svg /></button>
+    <p>{count > 1 ? "many" : "one"}</p>
+  </Form>
+);"""
+
+
+def test_jsx_elements_and_their_attributes():
+    document = jsxtree.parse(COMPONENT)
+    assert [element.tag for element in document.elements] == ["Form", "label", "input", "button", "XIcon",
+                                                              "button", "svg", "p"]
+    form, label, field = document.elements[:3]
+    assert field.attrs["id"] == "n" and field.attrs["disabled"] == "true"
+    assert field.spread and field.in_label and field.parent is label and label.parent is form
+    assert form.attrs == {"onsubmit": None}
+    assert COMPONENT[field.start:].startswith("<input")
+
+
+def test_jsx_facts_derived_from_children():
+    buttons = jsxtree.parse(COMPONENT).by_tag["button"]
+    assert buttons[0].attrs == {"aria-label": "Close"}
+    assert buttons[1].attrs == {":icon-only": "true"}
+    assert jsxtree.parse(COMPONENT).by_tag["p"][0].attrs == {":text": "true"}
+
+
+@pytest.mark.parametrize("text", ["<div", "<a href=", "<b>{", "x = a < b;", "<>{'</>'}</>", "<p>{/* ", ""])
+def test_jsx_parsing_never_raises(text):
+    jsxtree.parse(text)
@@ -0,0 +1,60 @@
+"""
+Region masks: one lexing pass per language telling code, comments and strings apart
+"""
+
+import pytest
+
+from conftest import event, lines
+from xalapm_hooks import lexer
+
+
+def regions(text: str, language: str) -> list:
+    return [(text[start:end], kind) for start, end, kind in lexer.spans(text, language)]
+
+
+def test_js_regions_include_regex_and_template_literals():
+    text = 'const a = "x//y"; // note\nconst r = /a\\/b/g; const t = `t ${ "in" } end`;\n/* block\n */ x = a / b / c;\n'
+    assert regions(text, "js") == [("x//y", "string"), ("// note", "comment"), ("a\\/b", "string"),
+                                   ("t ", "string"), ("in", "string"), (" end", "string"),
+                                   ("/* block\n */", "comment")]
+
+
+def test_rust_raw_strings_and_nested_comments():
+    text = 'let s = r#"a "quoted" b"#; /* outer /* inner */ still */ let c = \'"\';\n// done\n'
+    assert regions(text, "rust") == [('a "quoted" b', "string"), ("/* outer /* inner */ still */", "comment"),
+                                     ('"', "string"), ("// done", "comment")]
+
+
+def test_yaml_comments_need_a_space_and_block_scalars_are_text():
+    text = "run: \"echo #1\" # comment\nname: 'it''s'\nurl: a#b\nscript: |\n  # not a comment\n"
+    assert regions(text, "yaml") == [("echo #1", "string"), ("# comment", "comment"), ("it''s", "string")]
+
+
+@pytest.mark.parametrize("keep", [("code",), ("comment",), ("string",), ("code", "string")])
+def test_views_keep_offsets_and_lines(keep):
+    text = 'string s = "tx.origin"; // tx.origin\n/* selfdestruct\n */ uint x = 1;\n'
+    masked = lexer.view(text, "solidity", keep)
+    assert len(masked) == len(text) and masked.count("\n") == text.count("\n")
+    assert (masked[12:21] == "tx.origin") == ("string" in keep)
+    assert ("selfdestruct" in masked) == ("comment" in keep)
+    assert ("uint x" in masked) == ("code" in keep)
+
+
+def test_unlexed_files_and_disabled_regions_see_the_whole_text(monkeypatch):
+    assert lexer.view("a // b", None, ("code",)) == "a // b"
+    monkeypatch.setattr(lexer, "REGIONS", True)
+    assert lexer.language_of("/p/App.TSX") == "js"
+    assert lexer.language_of("/p/App.py") is None
+    monkeypatch.setattr(lexer, "REGIONS", False)
+    assert lexer.language_of("/p/App.tsx") is None
+
+
+def test_rules_declaring_code_skip_comments_and_strings(checker, monkeypatch):
+    monkeypatch.setattr(lexer, "REGIONS", True)
+    content = 'console.log(password)\n// console.log(old)\nconst s = "console.log(x)";\n'
+    issues = checker("code-review").collect(event("Write", "/project/src/api.ts", content=content))[0]
+    assert lines(issues, "Remove console.log before commit") == [1]
+    
+    monkeypatch.setattr(lexer, "REGIONS", False)
+    issues = checker("code-review").collect(event("Write", "/project/src/api2.ts", content=content))[0]
+    assert lines(issues, "Remove console.log before commit") == [1, 2, 3]
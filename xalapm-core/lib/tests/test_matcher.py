@@ -0,0 +1,61 @@
+"""
+Literal anchors and the prefilter: a rule left out of the candidates must not be able to match
+"""
+
+import re
+
+import pytest
+
+from xalapm_hooks import bench
+from xalapm_hooks.matcher import Prefilter, fold_case, required_literals
+
+# Text the case-insensitive rules still match after Unicode case folding
+FOLDED = ["TX.ORIGIN", "Tx.Origin(", "ſwap the tokens", "uniſwap", "KEY", "<IMG SRC=x>", "Delegatecall(",
+          "PASSWORD = 'x'", "api_KEY=\"abc\"", "İnput", "ınput", "COLOR: #FFF;"]
+
+
+def _texts() -> list:
+    """Slices of the benchmark corpus, as written and with their case swapped, plus the folded samples"""
+    texts = list(FOLDED)
+    for _, raw in bench.corpus():
+        content = bench.payload.parse(raw).content
+        for start in range(0, len(content), len(content) // 12 or 1):
+            texts.append(content[start:start + 3000])
+            texts.append(content[start:start + 3000].swapcase())
+    return texts
+
+
+@pytest.mark.parametrize("plugin", ["accessibility", "blockchain", "code-review", "compliance", "devops", "testing"])
+def test_prefilter_keeps_every_rule_that_matches(checker, plugin):
+    tables = [table for table in checker(plugin).tables if table.mode in ("search", "count", "collect")]
+    rules = [rule for table in tables for rule in table.rules]
+    prefilter = Prefilter(rules)
+    for text in _texts():
+        candidates = prefilter.candidates(text)
+        missed = [rule.id for rule in rules if rule not in candidates and rule.regex.search(text)]
+        assert not missed, f"{missed} match {text[:80]!r} but were filtered out"
+
+
+@pytest.mark.parametrize("pattern, flags, literals", [
+    (r"tx\.origin", 0, {"tx.origin"}),
+    (r"foo(?i:bar)", 0, {"foo"}),
+    (r"a{0,3}bc", 0, {"bc"}),
+    (r"x?yz", 0, {"yz"}),
+    (r"(?:ab)+c", 0, {"ab"}),
+    (r"\w+", 0, None),
+    (r"ümlaut", re.IGNORECASE, None),
+])
+def test_required_literals(pattern, flags, literals):
+    assert required_literals(pattern, flags) == (frozenset(literals) if literals else None)
+
+
+def test_branches_anchor_only_when_every_alternative_does():
+    assert required_literals(r"(?:swap|dex)\(") == frozenset({"swap", "dex"})
+    assert required_literals(r"(?:swap|\w+)") is None
+
+
+def test_fold_case_keeps_ignorecase_matches():
+    for text in ("K", "ſ", "ı", "İ"):
+        for letter in "ksi":
+            if re.fullmatch(letter, text, re.IGNORECASE):
+                assert letter in fold_case(text)
@@ -0,0 +1,65 @@
+"""
+The result cache: findings shared across hook processes by content, and evicted least recently used first
+"""
+
+import os
+
+import pytest
+
+from conftest import event
+from xalapm_hooks import checker as checker_module
+from xalapm_hooks.engine import Registry
+from xalapm_hooks.results import SHARDS, ResultCache
+
+ISSUES = [{"rule": "r/0", "message": "m", "file": "/a/x.ts", "locations": [{"line": 1, "column": 1}]}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "results", max_bytes=1024 * 1024)
+
+
+def test_entries_are_read_back_by_other_processes_under_any_path(cache):
+    cache.put("code-review-00ab", ISSUES)
+    found = ResultCache(cache.root, max_bytes=1024 * 1024).get("code-review-00ab", "/b/copy.ts")
+    assert found == [dict(ISSUES[0], file="/b/copy.ts")]
+    assert cache.get("code-review-11ab", "/a/x.ts") is None
+
+
+def test_a_disabled_cache_keeps_nothing(tmp_path):
+    cache = ResultCache(tmp_path / "results", max_bytes=0)
+    cache.put("code-review-00ab", ISSUES)
+    assert cache.get("code-review-00ab", "/a/x.ts") is None
+    assert not os.path.exists(tmp_path / "results")
+
+
+def test_a_full_shard_evicts_the_least_recently_used(tmp_path):
+    sizing = ResultCache(tmp_path / "sizing", max_bytes=1024 * 1024 * 1024)
+    sizing.put("code-review-ab", ISSUES * 100)
+    size = os.stat(sizing.path("code-review-ab")).st_blocks * 512
+    cache = ResultCache(tmp_path / "results", max_bytes=SHARDS * size * 9 // 2)  # four entries per shard
+    keys = [f"code-review-{index:02}ab" for index in range(5)]
+    for age, key in enumerate(keys[:4]):
+        cache.put(key, ISSUES * 100)
+        os.utime(cache.path(key), ns=(age * 10**9, age * 10**9))
+    ResultCache(cache.root, max_bytes=cache.max_bytes).get(keys[0], "/a/x.ts")  # used again, so kept
+    cache.put(keys[4], ISSUES * 100)
+    kept = sorted(entry.name[:-len(".json")] for entry in os.scandir(cache.path(keys[0]).parent))
+    assert keys[0] in kept and keys[4] in kept and keys[1] not in kept
+    assert cache.clear() == len(kept)
+
+
+def test_a_repeated_check_is_answered_from_the_cache(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "results", max_bytes=1024 * 1024)
+    found = event("Write", "/project/src/api.ts", content="console.log(password)\n")
+    first = Registry(results=cache).check(found, ["code-review"])
+    
+    def scan(*args, **kwargs):
+        raise AssertionError("scanned again")
+    
+    monkeypatch.setattr(checker_module.Checker, "scan", scan)
+    again = event("Write", "/project/lib/copy.ts", content="console.log(password)\n")
+    output = Registry(results=ResultCache(cache.root, max_bytes=cache.max_bytes)).check(again, ["code-review"])
+    assert output == first
+    with pytest.raises(AssertionError, match="scanned again"):
+        Registry(results=cache).check(event("Write", "/project/src/api.ts", content="eval(x)\n"), ["code-review"])
@@ -0,0 +1,71 @@
+"""
+Rule statistics: counters summed across hooks, the report, and the cheapest-per-hit rule order
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import event
+from xalapm_hooks.engine import Registry
+from xalapm_hooks.rulestats import MIN_RUNS, RuleStats
+
+
+@pytest.fixture
+def stats(tmp_path):
+    found = RuleStats(tmp_path / "rulestats.db", enabled=True)
+    yield found
+    found.close()
+
+
+def test_counters_from_separate_hooks_add_up(stats):
+    stats.add("code-review", {"code-review/code/0": [1, 1, 0.002, 100]})
+    stats.add("code-review", {"code-review/code/0": [1, 0, 0.001, 50]})
+    stats.flush()
+    other = RuleStats(stats.path, enabled=True)
+    other.add("code-review", {"code-review/code/0": [2, 0, 0.001, 10], "code-review/code/1": [1, 0, 0.5, 10]})
+    other.flush()
+    assert RuleStats(stats.path, enabled=True).counters() == {"code-review/code/0": (4, 1, 0.004, 160),
+                                                             "code-review/code/1": (1, 0, 0.5, 10)}
+    other.close()
+
+
+def test_the_report_puts_rules_that_never_matched_first(stats):
+    stats.add("code-review", {"code-review/code/0": [10, 5, 0.01, 1000], "code-review/code/1": [10, 0, 0.001, 1000],
+                              "compliance/gdpr/0": [10, 1, 0.02, 1000]})
+    stats.flush()
+    rows = stats.report()
+    assert [row["rule"] for row in rows] == ["code-review/code/1", "compliance/gdpr/0", "code-review/code/0"]
+    assert rows[2]["hit_rate"] == 0.5 and rows[2]["ms_per_hit"] == 2.0
+    assert [row["rule"] for row in stats.report(["compliance"])] == ["compliance/gdpr/0"]
+    assert stats.reset() == 3 and stats.counters() == {}
+
+
+def test_rules_run_cheapest_per_hit_first_once_counted(stats):
+    rules = [SimpleNamespace(id=f"r/{index}") for index in range(3)]
+    stats.add("r", {"r/0": [MIN_RUNS, 0, 1.0, 1000], "r/1": [MIN_RUNS, MIN_RUNS, 0.001, 1000],
+                    "r/2": [MIN_RUNS - 1, 0, 9.0, 1000]})
+    stats.flush()
+    assert [rule.id for rule in stats.order(rules)] == ["r/2", "r/1", "r/0"]  # r/2 has too few runs to move
+    stats.reset()
+    assert stats.order(rules) is rules
+
+
+def test_checks_count_their_rule_runs(tmp_path):
+    stats = RuleStats(tmp_path / "rulestats.db", enabled=True)
+    registry = Registry(stats=stats)
+    registry.check(event("Write", "/project/src/api.ts", content="console.log(password)\n"), ["code-review"])
+    registry.flush()
+    counters = RuleStats(stats.path, enabled=True).counters()
+    runs, hits, _, size = counters["code-review/code/6"]
+    assert (runs, hits) == (1, 1) and size > 0
+    assert all(rule.startswith("code-review/") for rule in counters)
+    stats.close()
+
+
+def test_disabled_statistics_record_and_reorder_nothing(tmp_path):
+    stats = RuleStats(tmp_path / "rulestats.db", enabled=False)
+    stats.add("code-review", {"code-review/code/0": [1, 1, 0.1, 1]})
+    stats.flush()
+    assert stats.counters() == {}
+    assert not (tmp_path / "rulestats.db").exists()
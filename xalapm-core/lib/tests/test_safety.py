@@ -0,0 +1,59 @@
+"""
+Per-rule time budgets, the hook deadline and the regex lint that flags risky rules
+"""
+
+import time
+
+from conftest import event
+from xalapm_hooks.rules import Rule, match_count
+from xalapm_hooks.safety import ScanGuard, lint_pattern, risk_of
+
+
+def rule(pattern: str, risk: str = None) -> Rule:
+    return Rule({"id": "test/rules/0", "pattern": pattern, "tag": "HIGH", "message": "m", "anchors": [],
+                 "ignore_case": False, "risk": risk, "regions": None, "covered_by": None}, 0)
+
+
+def test_a_runaway_rule_is_cut_off_and_reported():
+    guard = ScanGuard(budget_ms=50)
+    started = time.perf_counter()
+    assert guard.run(rule(r"(a+)+$"), match_count, "a" * 40 + "b") is None
+    assert time.perf_counter() - started < 2
+    assert guard.skipped == ["test/rules/0"]
+    assert guard.counters["test/rules/0"][:2] == [1, 0]
+
+
+def test_rules_within_budget_run_to_completion():
+    guard = ScanGuard(budget_ms=1000)
+    assert guard.run(rule(r"b"), match_count, "abcb") == 2
+    assert guard.skipped == []
+    assert guard.counters["test/rules/0"][:2] == [1, 1]
+
+
+def test_rules_after_the_deadline_are_skipped_without_running():
+    guard = ScanGuard(deadline=time.monotonic() - 1)
+    assert guard.run(rule(r"b"), match_count, "abcb") is None
+    assert guard.skipped == ["test/rules/0"]
+    assert guard.counters == {}
+
+
+def test_risky_rules_scan_only_the_capped_input():
+    guard = ScanGuard(max_risky_chars=10)
+    assert guard.run(rule(r"b", risk="quadratic"), match_count, "b" * 100) == 10
+    assert guard.run(rule(r"b"), match_count, "b" * 100) == 100
+
+
+def test_skipped_rules_are_named_in_the_response(checker):
+    review = checker("code-review")
+    found = event("Write", "/project/src/api.ts", content="console.log(password)\n// TODO: fix\n")
+    issues, skipped = review.collect(found, deadline=time.monotonic() - 1)
+    assert issues == [] and skipped
+    output = review.respond(issues, skipped)
+    assert f"Skipped {len(skipped)} rule(s)" in output["hookSpecificOutput"]["additionalContext"]
+
+
+def test_lint_flags_super_linear_patterns():
+    assert risk_of(lint_pattern(r"(a+)+$")) == "exponential"
+    assert risk_of(lint_pattern(r"(?:ab|\wc)*d")) == "exponential"
+    assert risk_of(lint_pattern(r"a.*a.*b")) == "quadratic"
+    assert risk_of(lint_pattern(r"tx\.origin")) is None
@@ -0,0 +1,43 @@
+"""
+Repository scans: the walk, routing, and the process pool agreeing with a scan in one process
+"""
+
+from xalapm_hooks import scan
+
+
+def tree(root) -> None:
+    """Twenty flagged sources, files no plugin routes, a vendored copy, and files the scan must skip"""
+    for index in range(20):
+        (root / "src" / f"m{index}").mkdir(parents=True)
+        (root / "src" / f"m{index}" / "api.ts").write_text(f"console.log(password{index})\neval(code)\n")
+    (root / "src" / "README.md").write_text("console.log(x)\n")
+    (root / "node_modules" / "lib").mkdir(parents=True)
+    (root / "node_modules" / "lib" / "index.ts").write_text("eval(code)\n")
+    (root / "src" / "latin1.ts").write_bytes(b"const s = '\xe9';\neval(code)\n")
+    (root / "src" / "huge.ts").write_text("eval(code)\n" * 100)
+
+
+def test_the_walk_prunes_dependencies_and_build_output(tmp_path):
+    tree(tmp_path)
+    files = [path[len(str(tmp_path)) + 1:] for path in scan.walk([str(tmp_path)])]
+    assert "node_modules/lib/index.ts" not in files
+    assert files[:2] == ["src/README.md", "src/huge.ts"]
+    assert len(files) == 23
+
+
+def test_the_pool_finds_what_one_process_finds(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan.batches, "__defaults__", (4,))  # six batches over three workers
+    tree(tmp_path)
+    results = {}
+    for jobs in (1, 3):
+        batches = list(scan.scan([str(tmp_path)], ["code-review"], jobs=jobs, max_bytes=500))
+        done = sum(batch[0] for batch in batches)
+        skipped = sum(batch[1] for batch in batches)
+        records = sorted((record["file"], record["rule"]) for batch in batches for record in batch[2])
+        results[jobs] = done, skipped, records
+        assert len(batches) == 6
+    assert results[1] == results[3]
+    done, skipped, records = results[1]
+    assert (done, skipped) == (22, 2)  # the README is not routed; latin1.ts is not UTF-8; huge.ts is too big
+    assert len({path for path, _ in records}) == 20
+    assert {rule for _, rule in records} == {"code-review/code/0", "code-review/code/6"}
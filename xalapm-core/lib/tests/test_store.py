@@ -0,0 +1,106 @@
+"""
+The findings store: which findings are open, the query filters, and how fast they answer
+"""
+
+import time
+
+import pytest
+
+from xalapm_hooks import scan, store
+from xalapm_hooks.store import FindingStore
+
+
+def issue(rule: str, tag: str, message: str, line: int = 1) -> dict:
+    return {"rule": rule, "severity": tag, "message": message, "locations": [{"line": line, "column": 1}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Sets the time record() stamps scans with, in epoch seconds"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(store.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def findings(tmp_path, clock):
+    found = FindingStore(tmp_path / "findings.db", enabled=True)
+
+    def record(path: str, issues: list, plugin: str = "blockchain", at: float = None, partial: bool = False):
+        clock[0] = at if at is not None else clock[0] + 1
+        found.record(plugin, str(tmp_path / path), issues, "severity", "session", partial)
+        found.flush()
+
+    found.add = record
+    yield found
+    found.close()
+
+
+def rules(found: list) -> list:
+    return sorted((finding.file.rpartition("/")[2], finding.rule) for finding in found)
+
+
+def test_a_full_scan_closes_what_it_no_longer_finds(findings):
+    findings.add("A.sol", [issue("r/0", "HIGH", "a"), issue("r/1", "INFO", "b")])
+    findings.add("A.sol", [issue("r/1", "INFO", "b")])
+    assert rules(findings.query()) == [("A.sol", "r/1")]
+    assert rules(findings.query(open_only=False)) == [("A.sol", "r/0"), ("A.sol", "r/1"), ("A.sol", "r/1")]
+
+
+def test_a_partial_scan_adds_without_closing(findings):
+    findings.add("A.sol", [issue("r/0", "HIGH", "a")])
+    findings.add("A.sol", [issue("r/1", "INFO", "b")], partial=True)
+    findings.add("A.sol", [issue("r/0", "HIGH", "a")], partial=True)
+    assert rules(findings.query()) == [("A.sol", "r/0"), ("A.sol", "r/1")]
+
+
+def test_an_unchanged_full_scan_is_not_recorded_again(findings):
+    findings.add("A.sol", [issue("r/0", "HIGH", "a")])
+    findings.add("A.sol", [issue("r/0", "HIGH", "a")])
+    assert len(findings.query(open_only=False)) == 1
+
+
+def test_filters(findings):
+    findings.add("src/A.sol", [issue("r/0", "HIGH", "a"), issue("r/1", "INFO", "b")])
+    findings.add("lib/B.ts", [issue("c/0", "security", "c")], plugin="code-review")
+    assert rules(findings.query(tags=["HIGH", "security"])) == [("A.sol", "r/0"), ("B.ts", "c/0")]
+    assert rules(findings.query(plugins=["code-review"])) == [("B.ts", "c/0")]
+    assert rules(findings.query(file_part="/src/")) == [("A.sol", "r/0"), ("A.sol", "r/1")]
+    assert len(findings.query(limit=2)) == 2
+
+
+def test_since_keeps_rules_first_reported_after_it(findings):
+    findings.add("A.sol", [issue("r/0", "HIGH", "a")], at=100)
+    findings.add("A.sol", [issue("r/0", "HIGH", "a", line=5), issue("r/1", "INFO", "b")], at=200)
+    findings.add("B.sol", [issue("r/0", "HIGH", "a")], at=300)
+    assert rules(findings.query(since=150)) == [("A.sol", "r/1"), ("B.sol", "r/0")]
+    assert rules(findings.query(since=250)) == [("B.sol", "r/0")]
+    assert rules(findings.query(since=0)) == [("A.sol", "r/0"), ("A.sol", "r/1"), ("B.sol", "r/0")]
+
+
+def test_since_answers_without_rescanning_the_history(findings):
+    for index in range(4000):
+        findings.add(f"src/F{index % 400}.sol", [issue(f"r/{index % 7}", "HIGH", "a", line=index),
+                                                 issue(f"r/{index % 5 + 7}", "INFO", "b")])
+    started = time.perf_counter()
+    found = findings.query(open_only=False, since=0)
+    assert len(found) == 8000
+    assert time.perf_counter() - started < 1
+    assert len(findings.query(since=0)) == len(findings.query())
+
+
+def test_a_repo_scan_records_what_its_workers_found(tmp_path, monkeypatch):
+    def store_at(path=None, enabled: bool = True) -> FindingStore:
+        return FindingStore(tmp_path / "findings.db", enabled)
+    
+    monkeypatch.setattr(scan, "FindingStore", store_at)
+    (tmp_path / "src").mkdir()
+    for index in range(40):
+        (tmp_path / "src" / f"api{index}.ts").write_text("console.log(password)\n")
+    records = [record for _, _, found in scan.scan([str(tmp_path / "src")], ["code-review"], jobs=2)
+               for record in found]
+    assert records
+    found = FindingStore(tmp_path / "findings.db", enabled=True)
+    assert rules(found.query()) == sorted((record["file"].rpartition("/")[2], record["rule"]) for record in records)
+    assert len({finding.file for finding in found.query()}) == 40
+    found.close()
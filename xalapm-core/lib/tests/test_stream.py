@@ -0,0 +1,70 @@
+"""
+Streaming scans of very large files: same findings as a decoded scan, located without decoding the file
+"""
+
+import mmap
+
+import pytest
+
+from xalapm_hooks import lexer, scan, stream
+from xalapm_hooks.safety import ScanGuard
+
+SOURCE = ('const s = "café ☃";\nconsole.log(password)\n'
+          + "x" * 300 + " console.log(token) " + "é" * 200 + "\n"
+          + "eval(code)\n// TODO: tidy\nconsole.log(password)\n") * 3
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    path = tmp_path / "bundle.js"
+    path.write_text(SOURCE)
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield data
+
+
+@pytest.mark.parametrize("size", [7, 64, 1 << 20])
+def test_mapped_offsets_locate_like_decoded_text(mapped, size):
+    index = stream.MappedLineIndex(mapped, size)
+    for chars in (0, 25, 400, len(SOURCE) - 1):
+        offset = stream.char_offset(mapped, chars, size)
+        assert mapped[:offset].decode() == SOURCE[:chars]
+        before = SOURCE[:chars]
+        assert index.line(offset) == before.count("\n") + 1
+        assert index.locate(offset)["column"] == len(before) - before.rfind("\n")
+
+
+@pytest.mark.parametrize("size", [7, 1 << 20])
+def test_a_streamed_file_finds_what_a_decoded_scan_finds(checker, tmp_path, monkeypatch, size):
+    monkeypatch.setattr(lexer, "REGIONS", False)  # every rule can stream once regions are off
+    monkeypatch.setattr(stream.windows, "__defaults__", (size,))
+    path = tmp_path / "bundle.ts"
+    path.write_text(SOURCE)
+    review = checker("code-review")
+    streamed = stream.StreamScan(review, str(path))
+    assert streamed.unstreamed == []
+    assert streamed.issues() == review.scan(SOURCE, str(path))
+
+
+def test_risky_rules_stop_at_the_input_cap(checker, tmp_path, monkeypatch):
+    monkeypatch.setattr(lexer, "REGIONS", False)
+    path = tmp_path / "bundle.ts"
+    path.write_text(SOURCE)
+    review = checker("code-review")
+    assert stream.StreamScan(review, str(path), ScanGuard(max_risky_chars=25)).issues() \
+        == review.scan(SOURCE, str(path), guard=ScanGuard(max_risky_chars=25))
+
+
+def test_repo_scans_stream_large_files_and_name_the_rules_they_could_not_run(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(scan, "STREAM_BYTES", 64)
+    monkeypatch.setattr(lexer, "REGIONS", True)
+    path = tmp_path / "bundle.ts"
+    path.write_text(SOURCE)
+    checkers = registry.installed(["code-review"])
+    records = scan.scan_file(registry, checkers, str(path))
+    assert [(record["reason"], len(record["skipped"])) for record in records] \
+        == [("streamed", len(checkers[0].tables_for(str(path))[0].rules))]
+    
+    monkeypatch.setattr(lexer, "REGIONS", False)  # without regions every code-review rule streams
+    records = scan.scan_file(registry, checkers, str(path))
+    assert [record["rule"] for record in records] == ["code-review/code/0", "code-review/code/6", "code-review/code/7"]
+    assert [location["line"] for location in records[1]["locations"]] == [2, 3, 6, 8, 9]
@@ -0,0 +1,71 @@
+"""
+The symbol index: what modules export and tests import, built on a project's first test suggestion
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from conftest import event
+from xalapm_hooks import symbols
+
+MATH = "export function add(a, b) { return a + b; }\nexport const sub = (a, b) => a - b;\n"
+
+
+def test_exports_and_imports_are_parsed():
+    assert symbols.exports_of(MATH + "class Box {}\nexport { Box as Crate, type Shape };\n") \
+        == ["add", "sub", "Crate", "Shape"]
+    text = ('import lib, { add, sub as minus } from "../src/math";\n'
+            'import * as ui from "@app/ui/index";\n'
+            'const { mount } = require("./mount.js");\n'
+            'ui.render(ui.Button);\n')
+    assert symbols.imports_of(text, "test/math.test.ts") == [
+        ["lib", "src/math"], ["add", "src/math"], ["sub", "src/math"], ["render", "~ui"], ["Button", "~ui"],
+        ["mount", "test/mount"]]
+
+
+@pytest.fixture
+def project():
+    """A package whose one test imports add, but not sub, from src/lib/math.ts
+    
+    It is not under tmp_path: suggest-tests leaves alone any path naming a test.
+    """
+    root = Path(tempfile.mkdtemp(prefix="xalapm-project-"))
+    (root / "package.json").write_text("{}")
+    (root / "src" / "lib").mkdir(parents=True)
+    (root / "src" / "lib" / "math.ts").write_text(MATH)
+    (root / "src" / "lib" / "math.test.ts").write_text('import { add } from "./math";\n')
+    yield root
+    shutil.rmtree(root)
+
+
+def suggested(registry, path) -> str:
+    output = registry.check(event("Write", str(path), content=path.read_text()), ["testing"])
+    return output["hookSpecificOutput"]["additionalContext"] if output else ""
+
+
+def test_the_first_suggestion_indexes_the_project_root(registry, project):
+    index = symbols.SymbolIndex(project)
+    assert not os.path.exists(index.path)
+    context = suggested(registry, project / "src" / "lib" / "math.ts")
+    assert "sub" in context and "add" not in context
+    assert os.path.exists(index.path)
+    assert sorted(index.load().files) == ["src/lib/math.test.ts", "src/lib/math.ts"]
+
+
+def test_a_test_written_anywhere_covers_its_imports(registry, project):
+    math = str(project / "src" / "lib" / "math.ts")
+    assert symbols.tested(math)[0] == {"add"}
+    (project / "tests").mkdir()
+    (project / "tests" / "sub.spec.ts").write_text('import { sub } from "../src/lib/math";\n')
+    symbols.observe(str(project / "tests" / "sub.spec.ts"))
+    assert symbols.tested(math)[0] == {"add", "sub"}
+    assert suggested(registry, project / "src" / "lib" / "math.ts") == ""
+
+
+def test_a_written_test_does_not_build_the_index(project):
+    symbols.observe(str(project / "src" / "lib" / "math.test.ts"))
+    assert not os.path.exists(symbols.SymbolIndex(project).path)
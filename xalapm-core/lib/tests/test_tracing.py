@@ -0,0 +1,51 @@
+"""
+Opt-in hook tracing: one JSON line per traced hook with its phases and the time each rule took
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import raw, script
+from xalapm_hooks import tracing
+from xalapm_hooks.safety import ScanGuard
+
+
+def test_tracing_is_off_unless_asked_for(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE", "")
+    assert isinstance(tracing.hook_trace("client"), tracing.NoTrace)
+    monkeypatch.setattr(tracing, "TRACE", "1")
+    assert tracing.trace_path().name == "trace.jsonl"
+    monkeypatch.setattr(tracing, "TRACE", str(tmp_path / "hooks.jsonl"))
+    assert tracing.trace_path() == tmp_path / "hooks.jsonl"
+
+
+def test_a_trace_times_phases_and_rules(tmp_path, checker):
+    path = tmp_path / "trace.jsonl"
+    with tracing.HookTrace(path, "daemon", script("code-review")) as trace:
+        with trace.phase("check"):
+            checker("code-review").scan("console.log(password)\n", "/project/src/api.ts", guard=ScanGuard())
+    assert tracing.rule_timings is None
+    record = json.loads(path.read_text())
+    assert (record["source"], record["plugin"]) == ("daemon", "code-review")
+    assert list(record["phases"]) == ["check"] and record["total_ms"] >= record["phases"]["check"]
+    assert "code-review/code/6" in record["rules"]
+    
+    with tracing.HookTrace(path, "client") as trace:
+        trace.cancel()
+    assert len(path.read_text().splitlines()) == 1
+
+
+def test_a_traced_hook_appends_its_record(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    env = dict(os.environ, XALAPM_HOOKS_TRACE=str(path), XALAPM_HOOKS_SOCKET=str(tmp_path / "none.sock"))
+    for _ in range(2):
+        done = subprocess.run([sys.executable, script("code-review")], env=env, capture_output=True, check=True,
+                              input=raw("Write", "/project/src/api.ts", content="console.log(password)\n"))
+        assert b"console.log" in done.stdout
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 2
+    assert {(record["source"], record["plugin"], record["tool"], record["ext"]) for record in records} \
+        == {("inprocess", "code-review", "Write", ".ts")}
+    assert set(records[0]["phases"]) == {"forward", "parse", "load", "check"}
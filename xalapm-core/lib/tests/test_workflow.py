@@ -0,0 +1,74 @@
+"""
+The workflow (YAML) parser and the path-query rules that read its trees
+"""
+
+import pytest
+
+from conftest import event
+from xalapm_hooks import yamltree
+
+WORKFLOW = """# ci
+on: [push, pull_request]
+env: {A: 1, B: "x, y"}
+jobs:
+  build:
+    steps:
+      - name: Test
+        run: |
+          echo one
+          echo two
+      - uses: actions/checkout@v4  # pin
+        with: {ref: main}
+"""
+
+JOBS = """on:
+  push:
+    branches: [main]
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    permissions: write-all
+    steps:
+      - run: make
+  deploy:
+    runs-on: ubuntu-latest
+    permissions: write-all
+    steps:
+      - run: make deploy
+"""
+
+
+def test_workflow_tree():
+    tree = yamltree.parse(WORKFLOW)
+    assert list(tree.items) == ["on", "env", "jobs"]
+    assert [item.value for item in tree.items["on"].items] == ["push", "pull_request"]
+    assert {key: node.value for key, node in tree.items["env"].items.items()} == {"A": "1", "B": "x, y"}
+    steps = tree.items["jobs"].items["build"].items["steps"].items
+    assert steps[1].items["uses"].value == "actions/checkout@v4"
+    assert steps[1].items["with"].items["ref"].value == "main"
+
+
+def test_workflow_offsets_point_into_the_file():
+    tree = yamltree.parse(WORKFLOW)
+    build = tree.items["jobs"].items["build"]
+    assert WORKFLOW[build.start:].startswith("build:")
+    run = build.items["steps"].items[0].items["run"]
+    assert run.value == "echo one\necho two"
+    assert WORKFLOW[run.offset(run.value.index("two")):].startswith("two\n")
+
+
+@pytest.mark.parametrize("text", ["on: [push", "a: {b: [c", "x: 'open", "- [", "k: {[a]: b}", "a:\n\t- b", ": x", ""])
+def test_workflow_parsing_never_raises(text):
+    yamltree.parse(text)
+
+
+def test_an_edit_of_a_workflow_reports_the_job_it_changed(tmp_path, checker):
+    path = tmp_path / ".github" / "workflows" / "ci.yml"
+    path.parent.mkdir(parents=True)
+    path.write_text(JOBS)
+    devops = checker("devops")
+    
+    edit = event("Edit", path, old_string="    permissions: read-all\n    steps:\n      - run: make deploy",
+                 new_string="    permissions: write-all\n    steps:\n      - run: make deploy")
+    assert [(issue["job"], issue["locations"][0]["line"]) for issue in devops.findings(edit)] == [("deploy", 12)]
+    assert [issue["job"] for issue in devops.findings(event("Write", path, content=JOBS))] == ["build", "deploy"]
@@ -0,0 +1,174 @@
+"""
+Xala PM Hook Runtime
+Shared runtime behind the plugin PostToolUse checkers
+"""
+
+import os
+import sys
+
+from .client import ASYNC, forward
+from .locate import format_locations
+
+__version__ = "1.0.0"
+
+__all__ = ["answer_early", "check_all", "format_locations", "forward", "read_payload", "routed", "run_hook", "skip",
+           "__version__"]
+
+_payload = None  # this hook's stdin, once read
+_forwarded = False  # whether answer_early() already tried the daemon
+
+
+def read_payload() -> bytes:
+    """The hook payload on stdin, read once per process"""
+    global _payload
+    if _payload is None:
+        _payload = sys.stdin.buffer.read()
+    return _payload
+
+
+def answer_early(script: str) -> bool:
+    """Have the daemon answer a script's hook before the script imports and defines its rules
+    
+    Returns whether it answered. Otherwise the script carries on to run_hook()
+    with the payload from read_payload(). Traced hooks leave the forward to
+    run_hook(), which times it.
+    """
+    global _forwarded
+    if os.environ.get("XALAPM_HOOKS_TRACE", "0") not in ("", "0"):
+        return False
+    _forwarded = True
+    return forward(script, read_payload(), ASYNC)
+
+
+def run_hook(module, raw: bytes) -> bool:
+    """Answer a plugin script's hook from the daemon, else in-process from its rule bundle
+    
+    Returns False when the script has no rule tables and must handle the payload itself.
+    In async mode only rules that can block run before answering; the rest run after.
+    Payloads none of the script's tables route are answered before the content is decoded.
+    Each script answers for its own plugin only: the harness runs the hooks of the
+    plugins enabled for the session, and no other plugin can tell which those are.
+    """
+    if hasattr(module, "RULE_TABLES") and skip(raw, module.RULE_TABLES):
+        return True
+    
+    from .tracing import hook_trace
+    
+    with hook_trace("client", module.__file__) as trace:
+        with trace.phase("forward"):
+            if not _forwarded and forward(module.__file__, raw, ASYNC):
+                return True
+        if not hasattr(module, "RULE_TABLES"):
+            trace.cancel()
+            return False
+        checked = _check_in_process(module, raw, trace)
+    
+    if checked is not None:
+        registry, event, output, advisory = checked
+        _answer(registry, output, event.data, [(event, advisory)] if advisory else [], ASYNC)
+    return True
+
+
+def _check_in_process(module, raw: bytes, trace) -> tuple:
+    """(registry, event, response, checkers left to run later) of a script's own check, or None if unparsable"""
+    trace.record["source"] = "inprocess"
+    from . import payload
+    from .engine import Registry
+    
+    with trace.phase("parse"):
+        event = payload.parse(raw)
+    if event is None:
+        return None
+    trace.describe(event)
+    
+    with trace.phase("load"):
+        registry = Registry()
+        checker = registry.checker(module.__file__, module)
+    with trace.phase("check"):
+        advisory = registry.triage(event, [checker])[1] if ASYNC and checker.tables_for(event.file_path) else []
+        output = None if advisory else checker.check(event)
+    return registry, event, output, advisory
+
+
+def check_all(raw: bytes, names: list = None, defer: bool = ASYNC) -> None:
+    """Answer a payload with one merged response from every installed checker, or some plugins'"""
+    from . import client, payload
+    
+    header = payload.peek(raw)
+    if header is not None and names is None:
+        names = routed(header)  # only the plugins the edit reaches are loaded
+    if header is not None and (header["tool_name"] not in payload.CHECKED_TOOLS or names == []) and not defer:
+        return  # nothing to check, and no spooled feedback to deliver
+    
+    command = b"DEFERALL " if defer else b"CHECKALL "
+    reply = client.request(command + ",".join(names or ()).encode(), raw)
+    if reply is not None:
+        if reply:
+            print(reply.decode())
+        return
+    
+    from .engine import Registry
+    
+    event = payload.parse(raw)
+    if event is None:
+        return
+    jobs = []
+    registry = Registry()
+    output = registry.check(event, names, (lambda *job: jobs.append(job)) if defer else None)
+    _answer(registry, output, event.data, jobs, defer)
+
+
+def routed(header: dict) -> list:
+    """Plugins the compiled hook table routes a peeked payload to, or None without a fresh table"""
+    from . import hooktable
+    from .paths import PLUGINS_ROOT
+    
+    table = hooktable.load(PLUGINS_ROOT)
+    if table is None:
+        return None
+    return table.plugins_for(header["tool_name"], header.get("file_path"))
+
+
+def skip(raw: bytes, tables: list) -> bool:
+    """Answer a payload no rule table routes without decoding it, returning whether it was answered
+    
+    A written test updates the symbol index skip_tested tables read. In async
+    mode the session's spooled feedback is still delivered.
+    """
+    from . import payload
+    
+    header = payload.peek(raw)
+    if header is None or payload.wanted(header, tables):
+        return False
+    if payload.watched(header, tables):
+        from .symbols import observe
+        observe(header["file_path"])
+    if ASYNC:
+        from . import deferred
+        output = deferred.attach(None, header, deferred.Spool())
+        _respond(output)
+    return True
+
+
+def _answer(registry, output: dict, data: dict, jobs: list, defer: bool) -> None:
+    """Answer the hook, with the session's spooled feedback when deferring, then do what can wait
+    
+    The findings store and rule statistics are written, and (event, checkers)
+    jobs spooled to run later, only once the response is out.
+    """
+    if defer:
+        from . import deferred
+        spool = deferred.Spool()
+        output = deferred.attach(output, data, spool)
+    _respond(output)
+    registry.flush()
+    if jobs:
+        deferred.detach(jobs, spool)
+
+
+def _respond(output: dict) -> None:
+    """Print a hook response, if any, and flush it"""
+    if output:
+        import json  # imported here: hooks the daemon answers never need it
+        print(json.dumps(output))
+    sys.stdout.flush()
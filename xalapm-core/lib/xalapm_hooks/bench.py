@@ -0,0 +1,134 @@
+"""
+Xala PM Hook Runtime - Benchmark
+Replays synthetic hook payloads against every installed checker and reports latency
+"""
+
+import json
+import random
+import time
+
+from . import payload, tracing
+from .engine import Registry
+from .results import ResultCache
+from .rulestats import RuleStats
+from .store import FindingStore
+
+# Lines the synthetic files are built from, with a few rule hits mixed in
+TSX_LINES = [
+    "import React, { useState, useEffect } from 'react';",
+    "export const Card = ({ title, children }: CardProps) => {",
+    "  const [open, setOpen] = useState<boolean>(false);",
+    "  useEffect(() => { const id = setInterval(tick, 1000); return () => clearInterval(id); }, []);",
+    "  return <div className=\"card\" onClick={() => setOpen(!open)}>",
+    "    <img src={logo} alt=\"Company logo\" />",
+    "    <button type=\"button\" aria-label=\"Close\"><svg viewBox=\"0 0 24 24\" /></button>",
+    "    <input id=\"email\" type=\"email\" aria-label=\"Email\" />",
+    "    <h2 style={{ color: '#333' }}>{title}</h2>",
+    "    {children}",
+    "  </div>;",
+    "};",
+    "// TODO: extract card header",
+    "console.log('rendered', title);",
+]
+SOLIDITY_LINES = [
+    "// SPDX-License-Identifier: MIT",
+    "pragma solidity ^0.8.20;",
+    "contract Vault is Ownable, ReentrancyGuard {",
+    "    mapping(address => uint256) private balances;",
+    "    uint256 public totalDeposits;",
+    "    function deposit() external payable nonReentrant {",
+    "        balances[msg.sender] += msg.value;",
+    "    }",
+    "    function withdraw(uint256 amount) external nonReentrant {",
+    "        require(balances[msg.sender] >= amount, \"insufficient\");",
+    "        (bool ok, ) = msg.sender.call{value: amount}(\"\");",
+    "        require(ok);",
+    "    }",
+    "    function transfer(address to, uint256 amount) public onlyOwner {",
+    "        token.transfer(to, amount);",
+    "    }",
+    "}",
+]
+WORKFLOW_LINES = [
+    "  build-{n}:",
+    "    runs-on: ubuntu-latest",
+    "    timeout-minutes: 15",
+    "    steps:",
+    "      - uses: actions/checkout@v4",
+    "      - uses: actions/setup-node@v4",
+    "        with:",
+    "          node-version: 20",
+    "          cache: pnpm",
+    "      - run: pnpm install --frozen-lockfile",
+    "      - run: pnpm test -- --shard={n}",
+    "        env:",
+    "          API_TOKEN: ${{{{ secrets.API_TOKEN }}}}",
+]
+
+
+def corpus(seed: int = 0) -> list:
+    """(name, raw payload) pairs covering a small edit and large files of each kind"""
+    rng = random.Random(seed)
+    
+    def lines(source: list, count: int) -> str:
+        return "\n".join(rng.choice(source) for _ in range(count))
+    
+    workflow = "name: CI\non:\n  push:\n    branches: [main]\n  pull_request:\n    branches: [main]\njobs:\n"
+    workflow += "\n".join(line.format(n=job) for job in range(300) for line in WORKFLOW_LINES)
+    payloads = [
+        ("small edit .tsx", "Edit", "src/components/Card.tsx", {"old_string": "setOpen(!open)",
+                                                                "new_string": lines(TSX_LINES, 3)}),
+        ("5k-line .tsx", "Write", "src/pages/Dashboard.tsx", {"content": lines(TSX_LINES, 5000)}),
+        ("20k-line .sol", "Write", "contracts/Vault.sol", {"content": lines(SOLIDITY_LINES, 20000)}),
+        ("large workflow .yml", "Write", ".github/workflows/ci.yml", {"content": workflow}),
+    ]
+    return [(name, json.dumps({"tool_name": tool, "tool_input": {"file_path": path, **tool_input}}).encode())
+            for name, tool, path, tool_input in payloads]
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run(runs: int = 20, names: list = None) -> dict:
+    """Latency per (payload, checker) and mean time per rule, with the result cache off
+    
+    Each run parses the payload and checks it, as a script's main() does. One
+    untimed run first compiles the rules, so the figures are warm (daemon) latency.
+    """
+    # Synthetic payloads must neither skew the rule statistics nor be reordered by them, nor land in the findings store
+    registry = Registry(results=ResultCache(max_bytes=0), store=FindingStore(enabled=False),
+                        stats=RuleStats(enabled=False))
+    checkers = registry.installed(names)
+    latencies = {}
+    rules = {}
+    
+    for name, raw in corpus():
+        for checker in checkers:
+            if checker.tables_for(payload.parse(raw).file_path):
+                _time(checker, name, raw, runs, latencies.setdefault((name, checker.name), []), rules)
+    
+    return {
+        "latency": [{"payload": name, "plugin": plugin, "runs": len(samples),
+                     "p50_ms": round(percentile(samples, 50), 3), "p95_ms": round(percentile(samples, 95), 3),
+                     "p99_ms": round(percentile(samples, 99), 3)}
+                    for (name, plugin), samples in latencies.items()],
+        "rules": sorted(({"rule": rule, "payload": name, "mean_ms": round(sum(samples) / runs, 3)}
+                         for (rule, name), samples in rules.items()), key=lambda row: -row["mean_ms"]),
+    }
+
+
+def _time(checker, name: str, raw: bytes, runs: int, samples: list, rules: dict) -> None:
+    """Time a checker on one payload after an untimed run, adding to its samples and the per-rule times"""
+    checker.check(payload.parse(raw))
+    for _ in range(runs):
+        tracing.rule_timings = {}
+        started = time.perf_counter()
+        checker.check(payload.parse(raw))
+        samples.append((time.perf_counter() - started) * 1000)
+        for rule, seconds in tracing.rule_timings.items():
+            rules.setdefault((rule, name), []).append(seconds * 1000)
+    tracing.rule_timings = None
@@ -0,0 +1,158 @@
+"""
+Xala PM Hook Runtime - Feedback Budget
+Ranks, deduplicates and trims the findings one hook response carries, writing the full report to a file
+"""
+
+import os
+import re
+import zlib
+
+from .dispatch import merge_outputs
+from .locate import format_locations
+from .paths import runtime_dir
+
+# Most findings one hook response lists; "0" lifts the limit
+MAX_FINDINGS = int(os.environ.get("XALAPM_HOOKS_MAX_FINDINGS", "20"))
+
+# Most bytes of findings one hook response carries, counted as the lines each finding adds; "0" lifts the limit
+MAX_BYTES = int(os.environ.get("XALAPM_HOOKS_MAX_BYTES", "6000"))
+
+# Severity scale findings are ranked on, most severe first
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO")
+
+# Severity of a tag that is neither a severity nor mapped by the plugin's TAG_SEVERITY
+DEFAULT_SEVERITY = "MEDIUM"
+
+_WORDS = re.compile(r"\w+")
+
+
+def enabled() -> bool:
+    """Whether responses go through the stage; with both limits lifted every finding passes as reported"""
+    return MAX_FINDINGS > 0 or MAX_BYTES > 0
+
+
+def severity(checker, tag: str) -> str:
+    """A finding's place on the shared scale: blocking tags are CRITICAL, other tags as the plugin maps them"""
+    if tag in checker.blocking_tags:
+        return "CRITICAL"
+    if tag in SEVERITIES:
+        return tag
+    mapped = checker.severities.get(tag)
+    return mapped if mapped in SEVERITIES else DEFAULT_SEVERITY
+
+
+def ranked(results: list) -> list:
+    """(checker, issue) of every finding, blocking ones first, then by severity, then by first line"""
+    entries = []
+    for order, (checker, issues, _) in enumerate(results):
+        for index, issue in enumerate(issues):
+            tag = issue[checker.issue_key]
+            locations = issue.get("locations") or ()
+            line = locations[0]["line"] if locations else float("inf")
+            entries.append(((tag not in checker.blocking_tags, SEVERITIES.index(severity(checker, tag)), line,
+                             order, index), checker, issue))
+    entries.sort(key=lambda entry: entry[0])
+    return [(checker, issue) for _, checker, issue in entries]
+
+
+def select(entries: list) -> tuple:
+    """(entries shown, findings another plugin already reported) under the budget
+    
+    A finding with the same message on the same file as a higher-ranked one from
+    another plugin is folded into it. Blocking findings are always shown, so the
+    response blocks as it would untrimmed; the rest are shown in rank order up to
+    the first that would overrun either limit.
+    """
+    shown = []
+    folded = 0
+    seen = {}
+    size = 0
+    full = False
+    for checker, issue in entries:
+        key = (issue.get("file"), " ".join(_WORDS.findall(issue["message"].lower())))
+        owner = seen.setdefault(key, checker.name)
+        if owner != checker.name:
+            folded += 1
+            continue
+        cost = _size(issue)
+        blocking = issue[checker.issue_key] in checker.blocking_tags
+        if not blocking and (full or 0 < MAX_FINDINGS <= len(shown) or 0 < MAX_BYTES < size + cost):
+            full = True  # nothing ranked lower may take the place of what was cut
+            continue
+        shown.append((checker, issue))
+        size += cost
+    return shown, folded
+
+
+def _size(issue: dict) -> int:
+    """Bytes a finding adds to a response: its message and the location lines under it"""
+    lines = [issue["message"], *format_locations(issue)]
+    return sum(len(line.encode()) + 1 for line in lines)
+
+
+def respond(event, results: list) -> list:
+    """Hook responses of (checker, issues, rules skipped) results, one per checker with something to say
+    
+    Past the budget the response names how many findings it leaves out and the
+    file holding the full report, written only then.
+    """
+    if not enabled():
+        return _outputs((checker, issues, skipped) for checker, issues, skipped in results)
+    entries = ranked(results)
+    shown, folded = select(entries)
+    outputs = _outputs((checker, [issue for owner, issue in shown if owner is checker], skipped)
+                       for checker, _, skipped in results)
+    if len(shown) == len(entries):
+        return outputs
+    
+    full = _outputs((checker, [issue for owner, issue in entries if owner is checker], skipped)
+                    for checker, _, skipped in results)
+    path = write_report(event, [checker.name for checker, _, _ in results], merge_outputs(full))
+    note = f"📄 Showing {len(shown)} of {len(entries)} findings, most severe first"
+    if folded:
+        note += f" ({folded} reported by more than one plugin)"
+    note += f"; full report: {path}" if path else "; the full report could not be written"
+    return _annotate(outputs, note)
+
+
+def _outputs(results) -> list:
+    return [output for output in (checker.respond(issues, skipped) for checker, issues, skipped in results) if output]
+
+
+def _annotate(outputs: list, note: str) -> list:
+    """Responses with a note appended to the first blocking one's reason, else to the last one's context"""
+    outputs = list(outputs) or [{"hookSpecificOutput": {"hookEventName": "PostToolUse"}}]
+    blocking = [index for index, output in enumerate(outputs) if output.get("decision") == "block"]
+    index = blocking[0] if blocking else len(outputs) - 1
+    output = dict(outputs[index])
+    if blocking:
+        output["reason"] = f"{output.get('reason', '')}\n{note}"
+    else:
+        specific = dict(output.get("hookSpecificOutput") or {"hookEventName": "PostToolUse"})
+        context = specific.get("additionalContext")
+        specific["additionalContext"] = f"{context}\n{note}" if context else note
+        output["hookSpecificOutput"] = specific
+    outputs[index] = output
+    return outputs
+
+
+def report_path(event, plugins: list):
+    """Where the full report of some plugins' findings on an edit goes, one file per session, path and plugins"""
+    session = str(event.data.get("session_id") or "default")
+    key = zlib.crc32(f"{session}\0{event.file_path}\0{','.join(plugins)}".encode())
+    name = re.sub(r"[^\w.-]", "_", os.path.basename(event.file_path or "payload"))
+    return runtime_dir() / "reports" / f"{name}-{key:08x}.txt"
+
+
+def write_report(event, plugins: list, output: dict):
+    """Write every finding of a response untrimmed, returning the file's path, or None when it can't be written"""
+    context = output.get("hookSpecificOutput", {}).get("additionalContext") or output.get("reason", "")
+    try:
+        path = report_path(event, plugins)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(f"Findings on {event.file_path} from {', '.join(plugins)}\n\n{context}\n")
+        os.replace(tmp, path)
+    except OSError:
+        return None
+    return path
@@ -0,0 +1,193 @@
+"""
+Xala PM Hook Runtime - Rule Bundles
+Validated, pre-analyzed rule tables cached per plugin and keyed by source hash
+"""
+
+import json
+import os
+import re
+
+from . import jsx, workflow
+from .lexer import REGION_NAMES
+from .matcher import analyze
+from .paths import cache_dir
+from .safety import lint_pattern, risk_of
+
+# Bump when the bundle layout or rule analysis changes
+BUNDLE_VERSION = 9
+
+
+class BundleError(Exception):
+    """A rule table failed validation"""
+
+
+def source_hash(script: str) -> str:
+    import hashlib  # only needed when a script changed on disk
+    with open(script, "rb") as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+
+def build_bundle(name: str, script: str, module) -> dict:
+    """Validate every rule of a plugin module and record its routing and anchors"""
+    tables = [_table(name, spec) for spec in module.RULE_TABLES]
+    stat = os.stat(script)
+    return {
+        "version": BUNDLE_VERSION,
+        "plugin": name,
+        "issue_key": module.ISSUE_KEY,
+        "blocking_tags": list(getattr(module, "BLOCKING_TAGS", ())),
+        "severities": dict(getattr(module, "TAG_SEVERITY", {})),
+        "source": {
+            "path": os.path.abspath(script),
+            "sha256": source_hash(script),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        },
+        "tables": tables,
+    }
+
+
+def _table(name: str, spec: dict) -> dict:
+    flags = int(spec.get("flags", 0))
+    return {
+        "name": spec["name"],
+        "extensions": list(spec["extensions"]) if spec.get("extensions") else None,
+        "paths": list(spec.get("paths") or ()),
+        "exclude": list(spec.get("exclude") or ()),
+        "mode": spec.get("mode", "search"),
+        "limit": spec.get("limit"),
+        "skip_tested": bool(spec.get("skip_tested")),
+        "flags": flags,
+        "rules": [_rule(f"{name}/{spec['name']}/{index}", spec, pattern, tag, message, flags)
+                  for index, (pattern, tag, message) in enumerate(spec["patterns"])],
+    }
+
+
+def _rule(rule_id: str, spec: dict, pattern, tag: str, message: str, flags: int) -> dict:
+    if spec.get("mode") == "elements":
+        return _element_rule(rule_id, pattern, tag, message)
+    if spec.get("mode") == "workflow":
+        return _workflow_rule(rule_id, pattern, tag, message, flags)
+    return _pattern_rule(rule_id, spec, pattern, tag, message, flags)
+
+
+def _pattern_rule(rule_id: str, spec: dict, pattern: str, tag: str, message: str, flags: int) -> dict:
+    try:
+        re.compile(pattern, flags)
+    except re.error as exc:
+        raise BundleError(f"{rule_id}: invalid pattern {pattern!r}: {exc}") from exc
+    regions = (spec.get("rule_regions") or {}).get(pattern, spec.get("regions"))
+    if regions is not None and (not regions or not set(regions) <= set(REGION_NAMES)):
+        raise BundleError(f"{rule_id}: regions must be drawn from {', '.join(REGION_NAMES)}, got {regions!r}")
+    covers = (spec.get("covered_by") or {}).get(pattern)
+    if covers is not None and (isinstance(covers, str) or not all(isinstance(item, str) for item in covers)):
+        raise BundleError(f"{rule_id}: covered_by must be a list of modifier name patterns, got {covers!r}")
+    anchors, ignore_case = analyze(pattern, flags)
+    return {
+        "id": rule_id,
+        "pattern": pattern,
+        "tag": tag,
+        "message": message,
+        "anchors": sorted(anchors) if anchors else [],
+        "ignore_case": ignore_case,
+        "risk": risk_of(lint_pattern(pattern, flags)),
+        # None when the rule looks at every region
+        "regions": sorted(set(regions)) if regions and set(regions) != set(REGION_NAMES) else None,
+        # Modifiers that, applied to the matched function, answer for the finding
+        "covered_by": sorted(set(covers)) if covers else None,
+    }
+
+
+def _element_rule(rule_id: str, spec: dict, tag: str, message: str) -> dict:
+    """Bundle entry of an elements-mode rule, whose pattern is a JSX attribute condition"""
+    try:
+        condition = jsx.condition(spec)
+    except (TypeError, ValueError, AttributeError) as exc:
+        raise BundleError(f"{rule_id}: invalid element condition {spec!r}: {exc}") from exc
+    anchors, ignore_case = jsx.anchors(condition)
+    return {
+        "id": rule_id,
+        "pattern": None,
+        "condition": condition,
+        "tag": tag,
+        "message": message,
+        "anchors": anchors,
+        "ignore_case": ignore_case,
+        "risk": None,
+        "regions": None,
+        "covered_by": None,
+    }
+
+
+def _workflow_rule(rule_id: str, spec: dict, tag: str, message: str, flags: int) -> dict:
+    """Bundle entry of a workflow-mode rule, whose pattern is a path query; its matches regex is the rule's pattern"""
+    try:
+        query = workflow.query(spec)
+    except (TypeError, ValueError, AttributeError) as exc:
+        raise BundleError(f"{rule_id}: invalid workflow query {spec!r}: {exc}") from exc
+    pattern = query.pop("matches", None)
+    if pattern is not None:
+        try:
+            re.compile(pattern, flags)
+        except re.error as exc:
+            raise BundleError(f"{rule_id}: invalid pattern {pattern!r}: {exc}") from exc
+    return {
+        "id": rule_id,
+        "pattern": pattern,
+        "query": query,
+        "tag": tag,
+        "message": message,
+        # An Edit's window may not hold the keys a query walks, so workflow rules are never prefiltered out
+        "anchors": [],
+        "ignore_case": False,
+        "risk": risk_of(lint_pattern(pattern, flags)) if pattern is not None else None,
+        "regions": None,
+        "covered_by": None,
+    }
+
+
+def bundle_path(name: str):
+    return cache_dir() / "bundles" / f"{name}.json"
+
+
+def load_bundle(name: str, script: str) -> dict:
+    """Cached bundle for a plugin script, or None if missing or built from other source"""
+    try:
+        with open(bundle_path(name)) as handle:
+            bundle = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    
+    source = bundle.get("source", {})
+    if bundle.get("version") != BUNDLE_VERSION or source.get("path") != os.path.abspath(script):
+        return None
+    
+    stat = os.stat(script)
+    if (source.get("mtime_ns"), source.get("size")) == (stat.st_mtime_ns, stat.st_size):
+        return bundle
+    # Touched but possibly unchanged: fall back to the content hash
+    if source.get("sha256") != source_hash(script):
+        return None
+    source.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    save_bundle(bundle)
+    return bundle
+
+
+def save_bundle(bundle: dict) -> None:
+    path = bundle_path(bundle["plugin"])
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(bundle))
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only cache; the in-memory bundle still serves this process
+
+
+def ensure_bundle(name: str, script: str, module) -> dict:
+    """Load the cached bundle, rebuilding and saving it when the rule source changed"""
+    bundle = load_bundle(name, script)
+    if bundle is None:
+        bundle = build_bundle(name, script, module)
+        save_bundle(bundle)
+    return bundle
@@ -0,0 +1,200 @@
+"""
+Xala PM Hook Runtime - Checker
+One installed plugin's rule tables, scanned and answered the way the plugin's own script would
+"""
+
+from . import budget, contracts, modes, symbols, workflow
+from .dispatch import merge_outputs
+from .incremental import EditWindow, focus
+from .lexer import language_of
+from .locate import LineIndex
+from .matcher import Prefilter
+from .payload import HookEvent, routes
+from .results import ResultCache
+from .rules import Rule, RuleTable
+from .rulestats import RuleStats
+from .safety import ScanGuard, annotate_skipped
+from .store import FindingStore
+
+
+class Checker:
+    """An installed plugin script and its rule tables, built from its rule bundle"""
+    
+    def __init__(self, name: str, script: str, module, bundle: dict, results: ResultCache = None,
+                 store: FindingStore = None, stats: RuleStats = None):
+        self.name = name
+        self.script = script
+        self.module = module
+        self.bundle = bundle
+        self.results = results or ResultCache()
+        self.store = store or FindingStore()
+        self.stats = stats or RuleStats()
+        self.issue_key = bundle["issue_key"]
+        self.blocking_tags = frozenset(bundle["blocking_tags"])
+        self.severities = bundle["severities"]
+        self.tables = [RuleTable(name, spec) for spec in bundle["tables"]]
+        self._routes = {}
+        self._prefilters = {}
+    
+    def tables_for(self, file_path: str) -> list:
+        """Tables routed to a path, remembered so repeat edits skip the filtering"""
+        tables = self._routes.get(file_path)
+        if tables is None:
+            if len(self._routes) > 1024:
+                self._routes.clear()
+            tables = [table for table in self.tables if table.applies(file_path)]
+            self._routes[file_path] = tables
+        return tables
+    
+    def prefilter(self, tables: list) -> Prefilter:
+        """Prefilter over the rules of a routed table set, built once per set"""
+        key = tuple(table.name for table in tables)
+        prefilter = self._prefilters.get(key)
+        if prefilter is None:
+            prefilter = Prefilter([rule for table in tables for rule in table.rules])
+            self._prefilters[key] = prefilter
+        return prefilter
+    
+    def issues(self, table: RuleTable, content: str, file_path: str, candidates: set, guard: ScanGuard,
+               baseline: str = None, index: LineIndex = None, window: EditWindow = None) -> list:
+        """Run one table's candidate rules and shape hits like the plugin's own issue dicts
+        
+        With a baseline, only hits beyond those already in the baseline text are reported.
+        Each issue lists where its first matches are, resolved through the shared line index.
+        Rules declaring regions see the content with the other regions blanked out.
+        Rules declaring covered_by drop matches inside functions that apply a matching
+        modifier the contract graph resolves. Rules run cheapest per hit first, by the
+        rule statistics, so a deadline skips the costly ones; issues keep table order.
+        """
+        index = index or LineIndex(content)
+        if table.mode == "elements":
+            return modes.element_issues(self, table, content, file_path, candidates, guard, baseline, index)
+        if table.mode == "workflow":
+            return modes.workflow_issues(self, table, content, file_path, candidates, guard, baseline, index, window)
+        language = language_of(file_path)
+        run = modes.collect_issues if table.mode == "collect" else modes.pattern_issues
+        return run(self, table, content, file_path, candidates, guard, baseline, index, language)
+    
+    def issue(self, rule: Rule, file_path: str, **extra) -> dict:
+        """An issue dict of one rule's hits, keyed as the plugin keys its own"""
+        issue = {self.issue_key: rule.tag, "message": rule.message, "file": file_path, "rule": rule.id}
+        issue.update(extra)
+        return issue
+    
+    def scan(self, content: str, file_path: str, candidates: set = None, guard: ScanGuard = None,
+             baseline: str = None, window: EditWindow = None) -> list:
+        """Issues from every table routed to this file, less those already in the baseline
+        
+        window is the Edit window content was cut from, whose lines it maps back to the file's.
+        """
+        tables = self.tables_for(file_path)
+        if candidates is None:
+            candidates = self.prefilter(tables).candidates(content)
+        guard = guard or ScanGuard()
+        index = LineIndex(content, window.file_line if window else None)
+        
+        issues = []
+        for table in tables:
+            issues.extend(self.issues(table, content, file_path, candidates, guard, baseline, index, window))
+        return issues
+    
+    def cached(self, event: HookEvent) -> list:
+        """Issues from an earlier scan of the same content under the same rules, or None"""
+        tables = self.tables_for(event.file_path)
+        if not tables:
+            return []
+        return self.results.get(self.result_key(event, tables), event.file_path)
+    
+    def result_key(self, event: HookEvent, tables: list) -> str:
+        """Result cache key, with whatever else the routed tables' findings depend on
+        
+        skip_tested tables depend on the tests importing the file; covered_by rules
+        on the contracts it imports; workflow tables, for an Edit, on the rest of the file.
+        """
+        extra = []
+        if any(table.skip_tested for table in tables):
+            extra.append(symbols.tested(event.file_path)[1])
+        if any(table.covers for table in tables):
+            extra.append(contracts.state(event.file_path))
+        if event.tool_name == "Edit" and any(table.mode == "workflow" for table in tables):
+            extra.append(workflow.state(event.file_path))
+        return self.results.key(self.bundle, tables, event, ",".join(extra))
+    
+    def findings(self, event: HookEvent, candidates: set = None, guard: ScanGuard = None) -> list:
+        """Issues for an event, from the result cache or a fresh scan of the routed tables
+        
+        Complete results are logged to the findings store, and every scan's rule runs
+        to the rule statistics.
+        """
+        guard = guard or ScanGuard()
+        issues = self.cached(event)
+        if issues is None:
+            content, baseline = focus(event)
+            issues = self.scan(content, event.file_path, candidates, guard, baseline, event.window or None)
+            self.stats.add(self.name, guard.counters)
+            if not guard.skipped:
+                self.results.put(self.result_key(event, self.tables_for(event.file_path)), issues)
+        if not guard.skipped and self.tables_for(event.file_path):
+            self.store.record(self.name, event.file_path, issues, self.issue_key, event.data.get("session_id"),
+                              partial=bool(event.window))
+        return issues
+    
+    def blocks(self, event: HookEvent, candidates: set = None) -> bool:
+        """Whether an event hits a rule whose tag makes this plugin block, running only those rules
+        
+        They run one at a time, cheapest per hit first by the rule statistics, up to
+        the first that reports an issue.
+        """
+        if not self.blocking_tags:
+            return False
+        issues = self.cached(event)
+        if issues is not None:
+            return any(issue[self.issue_key] in self.blocking_tags for issue in issues)
+        
+        content, baseline = focus(event)
+        tables = self.tables_for(event.file_path)
+        if candidates is None:
+            candidates = self.prefilter(tables).candidates(content)
+        owners = {rule: table for table in tables for rule in table.rules
+                  if rule in candidates and rule.tag in self.blocking_tags}
+        window = event.window or None
+        index = LineIndex(content, window.file_line if window else None)
+        guard = ScanGuard()
+        try:
+            for rule in self.stats.order(list(owners)):
+                if self.issues(owners[rule], content, event.file_path, {rule}, guard, baseline, index, window):
+                    return True
+            return False
+        finally:
+            self.stats.add(self.name, guard.counters)
+    
+    def collect(self, event: HookEvent, candidates: set = None, deadline: float = None) -> tuple:
+        """(issues, rules skipped) of every routed table
+        
+        Rules that would start after the deadline (a time.monotonic() value) are skipped.
+        """
+        guard = ScanGuard(deadline=deadline)
+        return self.findings(event, candidates, guard), guard.skipped
+    
+    def flush(self) -> None:
+        """Write what this plugin's checks queued for the findings store and rule statistics, after its response"""
+        self.store.flush()
+        self.stats.flush()
+    
+    def observe(self, file_path: str) -> None:
+        """Keep the symbol index of skip_tested tables in step with a written file none of them checks"""
+        if any(table.skip_tested and routes(file_path, table.extensions, table.paths) for table in self.tables):
+            symbols.observe(file_path)
+    
+    def respond(self, issues: list, skipped: list = ()) -> dict:
+        """This plugin's hook response for some of its issues, naming any rules skipped"""
+        output = self.module.format_output(issues)
+        if skipped:
+            output = annotate_skipped(output, skipped)
+        return output
+    
+    def check(self, event: HookEvent, candidates: set = None, deadline: float = None) -> dict:
+        """Run every routed table and build this plugin's hook response, trimmed to the feedback budget"""
+        if not self.tables_for(event.file_path):
+            self.observe(event.file_path)
+        return merge_outputs(budget.respond(event, [(self, *self.collect(event, candidates, deadline))]))
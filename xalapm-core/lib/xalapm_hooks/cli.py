@@ -0,0 +1,278 @@
+"""
+Xala PM Hook Runtime - CLI
+Command line entry point for the shared hook runtime
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import bundles, check_all, client, daemon, deferred, gate, hooktable, safety, scan
+from .results import ResultCache
+from .engine import Registry, discover_scripts
+from .plugins import load_script
+from .reports import cmd_bench, cmd_findings, cmd_gate, cmd_profile, cmd_scan, cmd_symbols
+
+
+def cmd_daemon(args) -> int:
+    """Manage the hook daemon"""
+    if args.action == "serve":
+        return daemon.serve(args.idle_timeout)
+    
+    if args.action == "start":
+        ok = daemon.start()
+        if not args.quiet:
+            print("Hook daemon running" if ok else "Hook daemon failed to start")
+        return 0 if ok or args.quiet else 1
+    
+    if args.action == "stop":
+        ok = daemon.stop()
+        print("Hook daemon stopped" if ok else "Hook daemon not running")
+        return 0
+    
+    running = client.ping()
+    print("Hook daemon running" if running else "Hook daemon not running")
+    return 0 if running else 1
+
+
+def cmd_check(args) -> int:
+    """Check one hook payload from stdin against every installed plugin"""
+    check_all(sys.stdin.buffer.read(), args.plugins.split(",") if args.plugins else None, args.defer)
+    return 0
+
+
+def cmd_compile(args) -> int:
+    """Compile the hooks of every installed plugin into one dispatch table"""
+    root = Registry().root
+    if args.remove:
+        removed = hooktable.remove(root)
+        if not args.quiet:
+            print("Dispatch table removed" if removed else "No dispatch table")
+        return 0
+    
+    table = hooktable.load(root)
+    if table is not None and table.spec["group"] == args.group and not args.force:
+        if not args.quiet:
+            print(f"Dispatch table up to date ({hooktable.table_path(root)})")
+        return 0
+    try:
+        spec = hooktable.compile_table(root, args.group)
+    except (ValueError, OSError) as exc:
+        if not args.quiet:
+            print(f"ERROR: {exc}")
+        return 0 if args.quiet else 1
+    path = hooktable.save(spec)
+    if not args.quiet:
+        _print_table(path, spec)
+    return 0
+
+
+def _print_table(path, spec: dict) -> None:
+    print(f"Dispatch table: {path}")
+    print(f"  {len(spec['plugins'])} plugins, {len(spec['checkers'])} checkers routed by extension and path "
+          f"({len(spec['matchers'])} matchers)")
+    for event, matchers in spec["hooks"].items():
+        for matcher, plugins in matchers.items():
+            print(f"  {event} {matcher or '*'}: {len(plugins)} plugin hooks left as registered")
+
+
+def cmd_deferred(args) -> int:
+    """Hand feedback from deferred advisory checks to the agent (Stop hook)"""
+    raw = sys.stdin.buffer.read()
+    try:
+        data = json.loads(raw or b"{}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return 0
+    if not isinstance(data, dict) or data.get("stop_hook_active"):
+        return 0  # the agent is already acting on an earlier Stop block
+    
+    reply = client.request(b"DRAIN", raw)
+    records = json.loads(reply) if reply else deferred.Spool().drain(deferred.session_of(data))
+    output = deferred.stop_response(records)
+    if output:
+        print(json.dumps(output))
+    return 0
+
+
+def cmd_build(args) -> int:
+    """Validate every installed checker's rules and write its cached bundle"""
+    registry = Registry()
+    failed = 0
+    for script in discover_scripts(registry.root):
+        module = load_script(script)
+        if not hasattr(module, "RULE_TABLES"):
+            continue
+        name = Path(script).parents[1].name
+        try:
+            bundle = bundles.build_bundle(name, script, module)
+        except bundles.BundleError as exc:
+            print(f"ERROR: {exc}")
+            failed += 1
+            continue
+        bundles.save_bundle(bundle)
+        rules = sum(len(table["rules"]) for table in bundle["tables"])
+        print(f"OK: {name} - {rules} rules in {len(bundle['tables'])} tables ({bundle['source']['sha256'][:12]})")
+    return 1 if failed else 0
+
+
+def cmd_lint(args) -> int:
+    """Report rules that may backtrack super-linearly"""
+    flagged = 0
+    exponential = 0
+    for checker in Registry().installed():
+        for table in checker.tables:
+            for rule in table.rules:
+                if rule.pattern is None:
+                    continue  # attribute lookups or a bare path query, no regex to backtrack
+                findings = safety.lint_pattern(rule.pattern, rule.flags)
+                growth = safety.measure_growth(rule.pattern, rule.flags) if args.measure else None
+                if not findings and not (growth and growth >= args.growth):
+                    continue
+                
+                flagged += 1
+                exponential += _print_lint(rule, findings, growth) == "exponential"
+    
+    print(f"\n{flagged} rule(s) flagged")
+    if exponential or (args.strict and flagged):
+        return 1
+    return 0
+
+
+def _print_lint(rule, findings: list, growth: float) -> str:
+    """Print why a rule was flagged, returning its risk"""
+    risk = safety.risk_of(findings) or "measured"
+    print(f"{risk.upper():12} {rule.id}  {rule.pattern}")
+    for _, reason in findings:
+        print(f"             - {reason}")
+    if growth == float("inf"):
+        print("             - pumped input exceeded the measurement budget")
+    elif growth:
+        print(f"             - x{growth:.1f} time when input grows x4")
+    elif growth is not None:
+        print("             - no measurable growth on pumped inputs")
+    return risk
+
+
+def cmd_cache(args) -> int:
+    """Drop cached findings"""
+    removed = ResultCache().clear()
+    print(f"Removed {removed} cached result(s)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="xalapm-hooks", description="Xala PM hook runtime")
+    commands = parser.add_subparsers(dest="command", required=True)
+    _add_hook_commands(commands)
+    _add_rule_commands(commands)
+    _add_scan_commands(commands)
+    _add_history_commands(commands)
+    
+    cache_parser = commands.add_parser("cache", help="Manage the cached findings")
+    cache_parser.add_argument("action", choices=["clear"])
+    cache_parser.set_defaults(func=cmd_cache)
+    
+    return parser
+
+
+def _add_hook_commands(commands) -> None:
+    """Commands the plugin hooks run: the daemon, checks and the dispatch table"""
+    daemon_parser = commands.add_parser("daemon", help="Manage the warm hook daemon")
+    daemon_parser.add_argument("action", choices=["start", "stop", "status", "serve"])
+    daemon_parser.add_argument("--quiet", action="store_true", help="Print nothing (for SessionStart hooks)")
+    daemon_parser.add_argument("--idle-timeout", type=int, default=daemon.IDLE_TIMEOUT,
+                               help="Seconds without requests before the daemon exits")
+    daemon_parser.set_defaults(func=cmd_daemon)
+    
+    check_parser = commands.add_parser("check", help="Run every installed checker on a hook payload (stdin)")
+    check_parser.add_argument("--plugins", help="Comma-separated plugin names to limit the check to")
+    check_parser.add_argument("--async", dest="defer", action="store_true", default=client.ASYNC,
+                              help="Answer from rules that can block; spool advisory feedback for the next hook")
+    check_parser.set_defaults(func=cmd_check)
+    
+    compile_parser = commands.add_parser("compile", help="Compile installed plugins' hooks into one dispatch table")
+    compile_parser.add_argument("--group", help="Only the plugins of one marketplace.json group")
+    compile_parser.add_argument("--force", action="store_true", help="Recompile even when the table is up to date")
+    compile_parser.add_argument("--remove", action="store_true", help="Drop the table, back to per-plugin hooks")
+    compile_parser.add_argument("--quiet", action="store_true", help="Print nothing")
+    compile_parser.set_defaults(func=cmd_compile)
+    
+    deferred_parser = commands.add_parser("deferred", help="Surface spooled advisory feedback (Stop hook, stdin)")
+    deferred_parser.set_defaults(func=cmd_deferred)
+
+
+def _add_rule_commands(commands) -> None:
+    """Commands that validate the installed rules"""
+    bundle_parser = commands.add_parser("build", help="Validate and cache the rule bundles of installed checkers")
+    bundle_parser.set_defaults(func=cmd_build)
+    
+    lint_parser = commands.add_parser("lint", help="Flag rules that may backtrack super-linearly")
+    lint_parser.add_argument("--measure", action="store_true", help="Also time each rule on pumped inputs")
+    lint_parser.add_argument("--growth", type=float, default=8.0,
+                             help="Measured growth (per x4 input) treated as super-linear")
+    lint_parser.add_argument("--strict", action="store_true", help="Exit non-zero on any flagged rule")
+    lint_parser.set_defaults(func=cmd_lint)
+
+
+def _add_scan_commands(commands) -> None:
+    """Commands that check trees, diffs and synthetic payloads"""
+    scan_parser = commands.add_parser("scan", help="Scan a directory tree and stream findings as JSONL")
+    scan_parser.add_argument("paths", nargs="*", default=["."], help="Files or directories (default: .)")
+    scan_parser.add_argument("--plugins", help="Comma-separated plugin names to limit the scan to")
+    scan_parser.add_argument("--jobs", type=int, help="Worker processes (default: one per core)")
+    scan_parser.add_argument("--max-bytes", type=int, default=scan.MAX_FILE_BYTES, help="Skip files larger than this")
+    scan_parser.set_defaults(func=cmd_scan)
+    
+    gate_parser = commands.add_parser("gate", help="Check the lines a git diff adds (pre-commit hooks and CI)")
+    gate_parser.add_argument("revisions", nargs="?",
+                             help="Revision range to check, e.g. origin/main...HEAD (default: staged changes)")
+    gate_parser.add_argument("--plugins", help="Comma-separated plugin names to limit the check to")
+    gate_parser.add_argument("--fail-on", default=",".join(gate.FAIL_ON),
+                             help="Comma-separated tags that fail the gate (default: CRITICAL)")
+    gate_parser.add_argument("--jobs", type=int, help="Worker processes (default: one per core)")
+    gate_parser.add_argument("--json", action="store_true", help="Print findings as JSONL")
+    gate_parser.set_defaults(func=cmd_gate)
+    
+    bench_parser = commands.add_parser("bench", help="Benchmark every checker on synthetic payloads")
+    bench_parser.add_argument("--runs", type=int, default=20, help="Runs per payload and checker")
+    bench_parser.add_argument("--plugins", help="Comma-separated plugin names to limit the benchmark to")
+    bench_parser.add_argument("--top", type=int, default=10, help="Slowest rules to list")
+    bench_parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    bench_parser.set_defaults(func=cmd_bench)
+
+
+def _add_history_commands(commands) -> None:
+    """Commands that read back what past checks recorded"""
+    profile_parser = commands.add_parser("profile", help="Rules that cost the most per finding, across sessions")
+    profile_parser.add_argument("--plugins", help="Comma-separated plugin names to limit the report to")
+    profile_parser.add_argument("--top", type=int, default=20, help="Rules to list")
+    profile_parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    profile_parser.add_argument("--reset", action="store_true", help="Drop every counter")
+    profile_parser.set_defaults(func=cmd_profile)
+    
+    symbols_parser = commands.add_parser("symbols", help="List exported symbols and the tests importing them")
+    symbols_parser.add_argument("root", nargs="?", default=".", help="Project root (default: .)")
+    symbols_parser.add_argument("--untested", action="store_true", help="Only list exports no test imports")
+    symbols_parser.add_argument("--rebuild", action="store_true", help="Re-index every file of the project")
+    symbols_parser.add_argument("--quiet", action="store_true", help="Only build the index, printing nothing "
+                                                                     "(ahead of the first test suggestion)")
+    symbols_parser.set_defaults(func=cmd_symbols)
+    
+    findings_parser = commands.add_parser("findings", help="Query the findings recorded by past checks")
+    findings_parser.add_argument("--all", action="store_true", help="Every recorded finding, not only open ones")
+    findings_parser.add_argument("--tag", help="Comma-separated tags (severities) to keep, e.g. CRITICAL")
+    findings_parser.add_argument("--plugins", help="Comma-separated plugin names to keep")
+    findings_parser.add_argument("--file", help="Keep files whose path contains this")
+    findings_parser.add_argument("--since", metavar="REV",
+                                 help="Keep findings first reported after this git revision was committed")
+    findings_parser.add_argument("--by", choices=["file", "rule", "tag", "plugin", "session", "revision"],
+                                 help="Count findings per file, rule, tag, plugin, session or revision")
+    findings_parser.add_argument("--limit", type=int, help="Stop after this many findings")
+    findings_parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    findings_parser.set_defaults(func=cmd_findings)
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
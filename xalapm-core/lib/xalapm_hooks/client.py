@@ -0,0 +1,78 @@
+"""
+Xala PM Hook Runtime - Client
+Forwards hook payloads to the daemon over its Unix socket
+"""
+
+import _socket  # socket.py would pull in enum and selectors, a few ms on every hook
+import os
+import sys
+
+from .paths import socket_path
+
+PROTOCOL = b"XHK1"
+
+# Checks normally answer in milliseconds; past this the hook falls back to in-process
+REQUEST_TIMEOUT = 5.0
+
+# "1" answers Write/Edit hooks from the rules that can block and defers advisory checks
+ASYNC = os.environ.get("XALAPM_HOOKS_ASYNC", "0") == "1"
+
+
+def request(command: bytes, body: bytes = b"", timeout: float = REQUEST_TIMEOUT) -> bytes:
+    """Send one command to the daemon, returning its reply body or None if unreachable
+    
+    A runtime directory that isn't private to the user counts as unreachable.
+    """
+    try:
+        path = socket_path()
+    except OSError:
+        return None
+    if not os.path.exists(path):
+        return None
+    
+    status, _, reply = _exchange(path, PROTOCOL + b" " + command + b"\n" + body, timeout).partition(b"\n")
+    if status != b"OK":
+        return None
+    return reply
+
+
+def _exchange(path: str, message: bytes, timeout: float) -> bytes:
+    """The daemon's whole reply to one message, or b"" when the socket fails"""
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    chunks = []
+    try:
+        sock.connect(path)
+        sock.sendall(message)
+        sock.shutdown(_socket.SHUT_WR)
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return b""
+    finally:
+        sock.close()
+    return b"".join(chunks)
+
+
+def forward(script: str, payload: bytes, defer: bool = False) -> bool:
+    """Have the daemon run a plugin script's check and print its hook output
+    
+    With defer, the daemon answers from the rules that can block and runs the rest later.
+    """
+    command = b"DEFER " if defer else b"CHECK "
+    reply = request(command + os.fsencode(os.path.abspath(script)), payload)
+    if reply is None:
+        return False
+    
+    if reply:
+        sys.stdout.buffer.write(reply + b"\n")
+        sys.stdout.flush()
+    return True
+
+
+def ping() -> bool:
+    """Check whether the daemon is up"""
+    return request(b"PING", timeout=1.0) is not None
@@ -0,0 +1,214 @@
+"""
+Xala PM Hook Runtime - Contract Graph
+Imports, inheritance and modifiers of Solidity and Rust files, to tell findings a base contract already guards
+"""
+
+import os
+from bisect import bisect_right
+from fnmatch import fnmatchcase
+from hashlib import blake2b
+
+from .contractsource import parse_rust, parse_solidity
+from .projectindex import ProjectIndex, loaded
+
+# "0" reports every match, whatever modifiers guard it
+CONTRACTS = os.environ.get("XALAPM_HOOKS_CONTRACTS", "1") != "0"
+
+CONTRACT_EXTENSIONS = (".sol", ".rs")
+
+# Where non-relative Solidity imports are looked up, after remappings.txt
+SOLIDITY_SEARCH_DIRS = ("", "node_modules", "lib")
+
+_graphs = {}
+
+
+class ContractGraph(ProjectIndex):
+    """Per contract file: its imports, its contracts with their bases and modifiers, and its functions
+    
+    A contract is a Solidity contract, library or interface, or a Rust impl or
+    mod block (a trait impl counting the trait as its base). Modifiers are
+    Solidity modifiers, or for Rust the functions named in #[access_control].
+    Files join the graph when an edit reaches them through imports.
+    """
+    
+    NAME = "contracts"
+    VERSION = 1
+    
+    def __init__(self, root, path=None):
+        super().__init__(root, path)
+        self._available = {}  # (rel, contract) -> (files it was resolved from, modifier names)
+        self._remappings = None
+    
+    def parse(self, rel: str, text: str) -> dict:
+        if rel.endswith(".rs"):
+            return parse_rust(text)
+        return parse_solidity(text)
+    
+    def changed(self, rel: str = None) -> None:
+        """Forget resolved modifiers of the file and of every file importing it"""
+        super().changed(rel)
+        if rel is None:
+            self._available = {}
+        else:
+            self._available = {key: value for key, value in self._available.items() if rel not in value[0]}
+    
+    def closure(self, rel: str) -> list:
+        """A file and everything it imports, transitively, each refreshed on the way"""
+        seen = [rel]
+        queue = [rel]
+        while queue:
+            current = queue.pop()
+            self.refresh(current)
+            entry = self.files.get(current)
+            for spec in entry["imports"] if entry else ():
+                target = self.resolve(current, spec)
+                if target is not None and target not in seen:
+                    seen.append(target)
+                    queue.append(target)
+        return seen
+    
+    def resolve(self, rel: str, spec) -> str:
+        """Project-relative path an import points at, or None when it is not on disk"""
+        if isinstance(spec, list):
+            candidates = _rust_candidates(self.root, rel, *spec)
+        elif spec.startswith("."):
+            candidates = [os.path.join(os.path.dirname(rel), spec)]
+        else:
+            candidates = [target + spec[len(prefix):] for prefix, target in self.remappings()
+                          if spec.startswith(prefix)]
+            candidates += [os.path.join(folder, spec) for folder in SOLIDITY_SEARCH_DIRS]
+        for candidate in candidates:
+            candidate = os.path.normpath(candidate)
+            if not candidate.startswith("..") and os.path.isfile(self.root / candidate):
+                return candidate
+        return None
+    
+    def remappings(self) -> list:
+        """(prefix, target) pairs from a Foundry remappings.txt at the root"""
+        if self._remappings is None:
+            self._remappings = []
+            try:
+                with open(self.root / "remappings.txt") as handle:
+                    for line in handle:
+                        prefix, _, target = line.strip().partition("=")
+                        if prefix and target:
+                            self._remappings.append((prefix.split(":")[-1], target))
+            except OSError:
+                pass
+        return self._remappings
+    
+    def covered(self, rel: str, lines: set, patterns: tuple) -> set:
+        """Lines inside functions applying a modifier that matches patterns and resolves in the graph"""
+        files = self.closure(rel)
+        entry = self.files.get(rel)
+        if entry is None:
+            return set()
+        
+        functions = entry["functions"]
+        starts = [function[0] for function in functions]
+        covered = set()
+        for line in lines:
+            position = bisect_right(starts, line) - 1
+            if position < 0 or functions[position][1] < line:
+                continue
+            applied = {name for name in functions[position][2] if _matches(name, patterns)}
+            if applied and applied & self.available(rel, _innermost(entry["contracts"], line), files):
+                covered.add(line)
+        return covered
+    
+    def available(self, rel: str, contract: dict, files: list) -> set:
+        """Modifiers a function of a contract can apply: its own and every base's, across files
+        
+        Rust access checks may be defined anywhere the file reaches, so every
+        function of its files counts.
+        """
+        key = (rel, contract["name"] if contract else None)
+        cached = self._available.get(key)
+        if cached is not None:
+            return cached[1]
+        
+        entries = [self.files[name] for name in files if name in self.files]
+        if rel.endswith(".rs"):
+            names = {name for entry in entries for name in entry["defined"]}
+        else:
+            visible = {}
+            for entry in reversed(entries):  # the file's own contracts win over imported namesakes
+                visible.update((item["name"], item) for item in entry["contracts"])
+            names = set()
+            pending = [contract["name"]] if contract else []
+            reached = set()
+            while pending:
+                current = visible.get(pending.pop())
+                if current is None or current["name"] in reached:
+                    continue
+                reached.add(current["name"])
+                names.update(current["modifiers"])
+                pending.extend(current["bases"])
+        self._available[key] = (set(files), names)
+        return names
+    
+    def state(self, rel: str) -> str:
+        """Digest of the contents of a file and everything it imports"""
+        digest = blake2b(digest_size=8)
+        for name in sorted(self.closure(rel)):
+            entry = self.files.get(name)
+            digest.update(f"{name}\0{entry['hash'] if entry else ''}\0".encode())
+        return digest.hexdigest()
+
+
+def _rust_candidates(root, rel: str, kind: str, name: str) -> list:
+    """Files a Rust `mod name;` or `use crate|super::name` may live in"""
+    directory = os.path.dirname(rel)
+    if kind == "mod":
+        stem = os.path.splitext(os.path.basename(rel))[0]
+        base = directory if stem in ("mod", "lib", "main") else os.path.join(directory, stem)
+    elif kind == "super":
+        base = os.path.dirname(directory) if os.path.basename(rel) == "mod.rs" else directory
+    else:
+        base = directory
+        while base and not os.path.isfile(root / base / "Cargo.toml"):
+            base = os.path.dirname(base)
+        base = os.path.join(base, "src")
+    return [os.path.join(base, f"{name}.rs"), os.path.join(base, name, "mod.rs")]
+
+
+def _innermost(contracts: list, line: int) -> dict:
+    found = None
+    for contract in contracts:
+        first, last = contract["lines"]
+        if first <= line <= last and (found is None or first >= found["lines"][0]):
+            found = contract
+    return found
+
+
+def _matches(name: str, patterns: tuple) -> bool:
+    name = name.lower()
+    return any(fnmatchcase(name, pattern.lower()) for pattern in patterns)
+
+
+def graph_for(file_path: str) -> ContractGraph:
+    """The loaded contract graph of the project holding a contract file, or None"""
+    if not CONTRACTS or not file_path.endswith(CONTRACT_EXTENSIONS):
+        return None
+    return loaded(ContractGraph, file_path, _graphs)
+
+
+def uncovered(file_path: str, offsets: list, index, patterns: tuple) -> list:
+    """Match offsets not inside a function guarded by a matching modifier the graph resolves"""
+    graph = graph_for(file_path)
+    if graph is None or not offsets:
+        return offsets
+    lines = {offset: index.line_of(offset) for offset in offsets}
+    covered = graph.covered(graph.relative(file_path), set(lines.values()), patterns)
+    graph.save()
+    return [offset for offset in offsets if lines[offset] not in covered]
+
+
+def state(file_path: str) -> str:
+    """Digest of what suppression depends on for a file: it and everything it imports"""
+    graph = graph_for(file_path)
+    if graph is None:
+        return ""
+    result = graph.state(graph.relative(file_path))
+    graph.save()
+    return result
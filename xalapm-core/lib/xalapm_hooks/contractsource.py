@@ -0,0 +1,131 @@
+"""
+Xala PM Hook Runtime - Contract Sources
+Reads imports, contracts, modifiers and functions out of Solidity and Rust source for the contract graph
+"""
+
+import re
+from bisect import bisect_right
+
+from .lexer import view
+
+_SOL_IMPORT = re.compile(r"\bimport\s+(?:[^;\"']*?\bfrom\s+)?[\"']([^\"']+)[\"']")
+_SOL_CONTRACT = re.compile(r"\b(?:contract|library|interface)\s+([A-Za-z_]\w*)([^{;]*)\{")
+_SOL_FUNCTION = re.compile(r"\b(?:function\s+[A-Za-z_]\w*|constructor|fallback|receive)\s*\(")
+_IS = re.compile(r"\bis\b")
+_SOL_MODIFIER = re.compile(r"\bmodifier\s+([A-Za-z_]\w*)")
+_SOL_KEYWORDS = frozenset("public external internal private view pure payable virtual override returns "
+                          "constant immutable".split())
+_RUST_MOD = re.compile(r"^[ \t]*(?:pub(?:\([^)]*\))?\s+)?mod\s+([A-Za-z_]\w*)\s*;", re.M)
+_RUST_USE = re.compile(r"\buse\s+(crate|super)::([A-Za-z_]\w*)")
+_RUST_BLOCK = re.compile(r"\bimpl\b(?:\s*<[^{;]*?>)?\s+(?:([\w:]+)(?:<[^{;]*?>)?\s+for\s+)?([\w:]+)[^{;]*\{"
+                         r"|\bmod\s+([A-Za-z_]\w*)\s*\{")
+_RUST_FN = re.compile(r"\bfn\s+([A-Za-z_]\w*)")
+_RUST_ACCESS = re.compile(r"#\[access_control\(((?:[^()\]]|\([^()]*\))*)\)\]")
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+_CALLED = re.compile(r"([A-Za-z_]\w*)\s*\(")
+
+
+def parse_solidity(text: str) -> dict:
+    """Imports, contracts with their bases and modifiers, and functions with the modifiers they apply"""
+    code = view(text, "solidity", ("code",))
+    newlines = _newlines(code)
+    braces = _braces(code)
+    imports = _SOL_IMPORT.findall(view(text, "solidity", ("code", "string")))
+    
+    contracts = []
+    for match in _SOL_CONTRACT.finditer(code):
+        close = braces.get(match.end() - 1, len(code))
+        heritage = _IS.split(match.group(2), 1)[1:]
+        bases = [_IDENTIFIER.findall(base)[-1] for base in _top_level("".join(heritage)).split(",")
+                 if _IDENTIFIER.search(base)]
+        contracts.append({"name": match.group(1), "bases": bases,
+                          "modifiers": _SOL_MODIFIER.findall(code, match.end(), close),
+                          "lines": [_line(newlines, match.start()), _line(newlines, close)]})
+    
+    functions = []
+    for match in _SOL_FUNCTION.finditer(code):
+        end, tail = _header(code, match.end() - 1)
+        close = braces.get(end, end) if code.startswith("{", end) else end
+        applied = [name for name in _IDENTIFIER.findall(tail) if name not in _SOL_KEYWORDS]
+        functions.append([_line(newlines, match.start()), _line(newlines, close), applied])
+    return {"imports": imports, "contracts": contracts, "functions": functions}
+
+
+def parse_rust(text: str) -> dict:
+    """Imports, impl and mod blocks, functions with their #[access_control] checks, and every fn name"""
+    code = view(text, "rust", ("code",))
+    newlines = _newlines(code)
+    braces = _braces(code)
+    imports = [["mod", name] for name in _RUST_MOD.findall(code)]
+    imports += [list(pair) for pair in dict.fromkeys(_RUST_USE.findall(code))]
+    
+    contracts = []
+    for match in _RUST_BLOCK.finditer(code):
+        close = braces.get(match.end() - 1, len(code))
+        trait, kind, module = match.groups()
+        name = module or kind.split("::")[-1]
+        contracts.append({"name": name, "bases": [trait.split("::")[-1]] if trait else [], "modifiers": [],
+                          "lines": [_line(newlines, match.start()), _line(newlines, close)]})
+    
+    guards = [(match.end(), [name.split("::")[-1] for name in _CALLED.findall(match.group(1))])
+              for match in _RUST_ACCESS.finditer(code)]
+    functions = []
+    defined = []
+    for match in _RUST_FN.finditer(code):
+        defined.append(match.group(1))
+        end, _ = _header(code, match.end())
+        if not code.startswith("{", end):
+            continue  # a trait method without a body
+        # Attributes between the previous item and this fn apply to it
+        applied = [name for position, names in guards if position <= match.start()
+                   and not re.search(r"[{};]", code[position:match.start()]) for name in names]
+        functions.append([_line(newlines, match.start()), _line(newlines, braces.get(end, end)), applied])
+    return {"imports": imports, "contracts": contracts, "functions": functions, "defined": defined}
+
+
+def _header(code: str, position: int) -> tuple:
+    """Where a function header starting at position ends ("{" or ";"), and its text outside parentheses"""
+    depth = 0
+    tail = []
+    limit = min(len(code), position + 4096)
+    while position < limit:
+        char = code[position]
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth <= 0 and char in "{;":
+            break
+        elif depth <= 0:
+            tail.append(char)
+        position += 1
+    return position, "".join(tail)
+
+
+def _top_level(text: str) -> str:
+    """Text with parenthesized groups removed, keeping the commas between them"""
+    while True:
+        stripped = re.sub(r"\([^()]*\)", "", text)
+        if stripped == text:
+            return text
+        text = stripped
+
+
+def _braces(code: str) -> dict:
+    """Offset of every "{" mapped to the offset of its matching "}" """
+    pairs = {}
+    stack = []
+    for match in re.finditer(r"[{}]", code):
+        if match.group() == "{":
+            stack.append(match.start())
+        elif stack:
+            pairs[stack.pop()] = match.start()
+    return pairs
+
+
+def _newlines(code: str) -> list:
+    return [match.start() for match in re.finditer("\n", code)]
+
+
+def _line(newlines: list, offset: int) -> int:
+    return bisect_right(newlines, offset - 1) + 1
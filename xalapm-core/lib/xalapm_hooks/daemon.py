@@ -0,0 +1,261 @@
+"""
+Xala PM Hook Runtime - Daemon
+Long-lived checker server that keeps plugin rule tables warm between edits
+"""
+
+import fcntl
+import json
+import os
+import select
+import signal
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from . import client, deferred, payload
+from .engine import Registry, discover_scripts
+from .paths import UnsafeRuntimeDir, runtime_dir, socket_path
+from .tracing import hook_trace
+
+# Shut down after this many idle seconds so stale daemons do not linger
+IDLE_TIMEOUT = int(os.environ.get("XALAPM_HOOKS_IDLE", "1800"))
+
+
+class HookRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one client connection: a header line followed by the payload"""
+    
+    def handle(self):
+        header = self.rfile.readline(4096).rstrip(b"\n")
+        body = self.rfile.read()
+        try:
+            reply = self.server.dispatch(header, body)
+        except Exception as exc:  # any plugin failure must fall back, never hang the hook
+            reply = b"ERR " + str(exc).encode("utf-8", "replace")
+        self.wfile.write(reply)
+
+
+class HookServer(socketserver.UnixStreamServer):
+    """Unix socket server that runs plugin checks in warm, cached modules
+    
+    Requests are served one at a time on the main thread so that per-rule time
+    budgets can interrupt a runaway regex; re holds the GIL while matching, so
+    worker threads would not run checks in parallel anyway. CHECKALL runs its
+    plugins in turn under one shared deadline. Deferred advisory checks run
+    between requests, on the same thread.
+    """
+    
+    def __init__(self, path: str, idle_timeout: int = IDLE_TIMEOUT):
+        self.registry = Registry()
+        self.spool = deferred.Spool()
+        self.deferred = deque()  # (event, checker) left to run after answering
+        self.idle_timeout = idle_timeout
+        self.last_request = time.monotonic()
+        super().__init__(path, HookRequestHandler)
+    
+    def dispatch(self, header: bytes, body: bytes) -> bytes:
+        """Route one request to its command"""
+        self.last_request = time.monotonic()
+        protocol, _, rest = header.partition(b" ")
+        if protocol != client.PROTOCOL:
+            return b"ERR unsupported protocol"
+        
+        command, _, arg = rest.partition(b" ")
+        if command == b"PING":
+            return b"OK\n"
+        if command == b"STOP":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return b"OK\n"
+        if command in (b"CHECK", b"DEFER"):
+            if not self.serves(os.fsdecode(arg)):
+                return b"ERR not a plugin hook script: " + arg
+            return b"OK\n" + self.check(os.fsdecode(arg), body, command == b"DEFER")
+        if command in (b"CHECKALL", b"DEFERALL"):
+            return b"OK\n" + self.check_all(arg.decode().split(",") if arg else None, body, command == b"DEFERALL")
+        if command == b"DRAIN":
+            return b"OK\n" + self.drain(body)
+        return b"ERR unknown command"
+    
+    def serves(self, script: str) -> bool:
+        """Whether a script is one a plugin's hooks run; any other path a client sends is never imported"""
+        path = os.path.realpath(script)
+        return any(os.path.realpath(known) == path for known in discover_scripts(self.registry.root))
+    
+    def check(self, script: str, body: bytes, defer: bool = False) -> bytes:
+        """Run one plugin's checks against a payload, or only its blocking rules when deferring the rest"""
+        if not defer and self.unrouted(body, checkers=[self.registry.checker(script)]):
+            return b""  # answered before the content is decoded, as the script's own hook would
+        with hook_trace("daemon", script) as trace:
+            with trace.phase("parse"):
+                event = payload.parse(body)
+            if event is None:
+                return b""
+            trace.describe(event)
+            
+            with trace.phase("load"):
+                checker = self.registry.checker(script)
+            with trace.phase("check"):
+                if checker is None:
+                    output = self.registry.cache.load(script).handle(event.data)
+                elif defer and checker.tables_for(event.file_path):
+                    advisory = self.registry.triage(event, [checker])[1]
+                    self.defer(event, advisory)
+                    output = None if advisory else checker.check(event)
+                else:
+                    output = checker.check(event)
+            if defer:
+                output = deferred.attach(output, event.data, self.spool)
+        return json.dumps(output).encode() if output else b""
+    
+    def check_all(self, names: list, body: bytes, defer: bool = False) -> bytes:
+        """Run every installed plugin's checks against a payload in one pass"""
+        if not defer and self.unrouted(body, names):
+            return b""  # answered before the content is decoded
+        with hook_trace("daemon") as trace:
+            with trace.phase("parse"):
+                event = payload.parse(body)
+            if event is None:
+                return b""
+            trace.describe(event)
+            
+            with trace.phase("check"):
+                output = self.registry.check(event, names, self.defer if defer else None)
+            if defer:
+                output = deferred.attach(output, event.data, self.spool)
+        return json.dumps(output).encode() if output else b""
+    
+    def unrouted(self, body: bytes, names: list = None, checkers: list = None) -> bool:
+        """Whether a payload reaches none of some checkers, installed ones by default, told from its peeked header
+        
+        A script without rule tables (a None checker) handles every payload itself.
+        The checkers still observe an unrouted write, so a new test reaches the symbol index.
+        """
+        header = payload.peek(body)
+        if header is None or (checkers is not None and None in checkers):
+            return False
+        if header["tool_name"] not in payload.CHECKED_TOOLS:
+            return True
+        checkers = self.registry.installed(names) if checkers is None else checkers
+        if "file_path" not in header or any(checker.tables_for(header["file_path"]) for checker in checkers):
+            return False
+        for checker in checkers:
+            checker.observe(header["file_path"])
+        return True
+    
+    def defer(self, event, checkers: list) -> None:
+        """Queue advisory checks, dropping queued ones this edit supersedes"""
+        session = deferred.session_of(event.data)
+        superseded = {(session, checker.name, event.file_path) for checker in checkers}
+        self.deferred = deque(job for job in self.deferred if _job_key(job) not in superseded)
+        self.deferred.extend((event, checker) for checker in checkers)
+    
+    def drain(self, body: bytes) -> bytes:
+        """Finish the session's queued checks and hand over its spooled feedback"""
+        try:
+            data = json.loads(body or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = {}
+        session = deferred.session_of(data)
+        for job in [job for job in self.deferred if _job_key(job)[0] == session]:
+            self.deferred.remove(job)
+            deferred.complete(job[0], [job[1]], self.spool)
+        return json.dumps(self.spool.drain(session)).encode()
+    
+    def service_actions(self):
+        """Write what the last request queued, now that it has its reply, then run deferred checks
+        
+        Deferred checks run only while no hook is waiting to connect.
+        """
+        self.registry.flush()
+        while self.deferred and not select.select([self], [], [], 0)[0]:
+            event, checker = self.deferred.popleft()
+            deferred.complete(event, [checker], self.spool)
+    
+    def watch_idle(self):
+        """Stop serving once no request has arrived for idle_timeout seconds"""
+        while True:
+            time.sleep(min(30, self.idle_timeout))
+            if time.monotonic() - self.last_request > self.idle_timeout:
+                self.shutdown()
+                return
+
+
+def _job_key(job: tuple) -> tuple:
+    event, checker = job
+    return deferred.session_of(event.data), checker.name, event.file_path
+
+
+def serve(idle_timeout: int = IDLE_TIMEOUT) -> int:
+    """Run the daemon in the foreground until stopped or idle
+    
+    Refuses to serve from a runtime directory that isn't private (see runtime_path()).
+    """
+    try:
+        lock_file = open(runtime_dir() / "hookd.lock", "w")
+    except UnsafeRuntimeDir as exc:
+        print(f"xalapm-hooks: not serving: {exc}", file=sys.stderr)
+        return 1
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return 0  # another daemon already owns the socket
+    
+    path = socket_path()
+    server = _bind(path, idle_timeout)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    threading.Thread(target=server.watch_idle, daemon=True).start()
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.registry.flush()
+        server.server_close()
+        if os.path.lexists(path):
+            os.unlink(path)
+        lock_file.close()
+    return 0
+
+
+def _bind(path: str, idle_timeout: int) -> HookServer:
+    """A server on a fresh socket that only the current user can connect to"""
+    if os.path.lexists(path):
+        os.unlink(path)
+    old_umask = os.umask(0o177)
+    try:
+        return HookServer(path, idle_timeout)
+    finally:
+        os.umask(old_umask)
+
+
+def start(wait: float = 2.0) -> bool:
+    """Spawn a detached daemon unless one is already answering"""
+    if client.ping():
+        return True
+    
+    cli = Path(__file__).resolve().parents[2] / "scripts" / "xalapm-hooks.py"
+    try:
+        log = open(runtime_dir() / "hookd.log", "ab")
+    except UnsafeRuntimeDir:
+        return False  # hooks check in-process
+    subprocess.Popen(
+        [sys.executable, str(cli), "daemon", "serve"],
+        stdin=subprocess.DEVNULL,
+        stdout=log,
+        stderr=log,
+        start_new_session=True,
+    )
+    log.close()
+    
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if client.ping():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def stop() -> bool:
+    """Ask a running daemon to shut down"""
+    return client.request(b"STOP", timeout=1.0) is not None
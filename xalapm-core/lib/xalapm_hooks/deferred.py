@@ -0,0 +1,133 @@
+"""
+Xala PM Hook Runtime - Deferred Feedback
+Runs advisory checks off the critical path and spools their responses for the next hook
+"""
+
+import json
+import os
+import re
+
+from .dispatch import merge_outputs
+from .paths import runtime_dir
+
+
+class Spool:
+    """Responses of deferred checks per Claude session, one JSONL file each"""
+    
+    def __init__(self, root=None):
+        self._root = root
+    
+    @property
+    def root(self):
+        """The spool directory, under the runtime directory unless given; raises OSError when it isn't private"""
+        return self._root or runtime_dir() / "spool"
+    
+    def path(self, session: str):
+        return self.root / (re.sub(r"[^\w.-]", "_", session) + ".jsonl")
+    
+    def put(self, session: str, plugin: str, file_path: str, output: dict) -> None:
+        """Append one response; a single O_APPEND write keeps concurrent writers' lines whole"""
+        record = json.dumps({"plugin": plugin, "file": file_path, "output": output}) + "\n"
+        try:
+            self.root.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(self.path(session), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, record.encode())
+            finally:
+                os.close(fd)
+        except OSError:
+            pass  # advisory feedback is best effort
+    
+    def drain(self, session: str) -> list:
+        """Take every spooled record of a session, keeping the latest per (plugin, file)"""
+        try:
+            path = self.path(session)
+            claimed = path.with_suffix(f".{os.getpid()}.draining")
+            os.replace(path, claimed)  # later writers start a fresh file
+            with open(claimed) as handle:
+                lines = handle.read().splitlines()
+            os.unlink(claimed)
+        except OSError:
+            return []
+        
+        latest = {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            latest.pop((record["plugin"], record["file"]), None)
+            latest[(record["plugin"], record["file"])] = record
+        return list(latest.values())
+
+
+def session_of(data: dict) -> str:
+    return str(data.get("session_id") or "default")
+
+
+def complete(event, checkers: list, spool: Spool) -> None:
+    """Run deferred checkers to the end and spool whatever they report"""
+    session = session_of(event.data)
+    for checker in checkers:
+        try:
+            output = checker.check(event)
+        except Exception:  # a broken advisory check must not take the worker down
+            continue
+        if output:
+            spool.put(session, checker.name, event.file_path, output)
+        checker.flush()
+
+
+def detach(jobs: list, spool: Spool) -> None:
+    """Finish (event, checkers) jobs in a forked child after the hook has answered
+    
+    Call only once the response is flushed: the child drops stdout so the hook
+    process is seen as done. Without fork the jobs run in place.
+    """
+    if not jobs:
+        return
+    if not hasattr(os, "fork"):
+        for event, checkers in jobs:
+            complete(event, checkers, spool)
+        return
+    if os.fork():
+        return
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        for event, checkers in jobs:
+            complete(event, checkers, spool)
+    finally:
+        os._exit(0)
+
+
+def feedback(records: list) -> str:
+    """Spooled responses as one block of context, a section per plugin and file"""
+    parts = []
+    for record in records:
+        output = record["output"]
+        context = output.get("hookSpecificOutput", {}).get("additionalContext") or output.get("reason", "")
+        parts.append(f"🕓 Deferred feedback on {record['file']}:\n{context}")
+    return "\n\n".join(parts)
+
+
+def attach(output: dict, data: dict, spool: Spool) -> dict:
+    """A hook response with the session's spooled feedback appended"""
+    records = spool.drain(session_of(data))
+    if not records:
+        return output
+    spooled = {"hookSpecificOutput": {"hookEventName": "PostToolUse", "additionalContext": feedback(records)}}
+    return merge_outputs([output, spooled] if output else [spooled])
+
+
+def stop_response(records: list) -> dict:
+    """Stop hook response handing spooled feedback to the agent before it finishes
+    
+    A Stop hook only reaches the agent by blocking, which gives it one more turn
+    to act on the findings.
+    """
+    if not records:
+        return None
+    return {"decision": "block", "reason": feedback(records)}
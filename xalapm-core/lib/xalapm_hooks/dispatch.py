@@ -0,0 +1,61 @@
+"""
+Xala PM Hook Runtime - Dispatch
+Runs one payload through every checker under a shared deadline and merges their responses
+"""
+
+import os
+import time
+
+# Shared wall-clock deadline for all checkers of one hook, under the client's 5 s request timeout
+DEADLINE_MS = int(os.environ.get("XALAPM_HOOKS_DEADLINE_MS", "4000"))
+
+
+def run_in_turn(checkers: list, event, candidates: set, deadline_ms: int = DEADLINE_MS) -> tuple:
+    """Run checkers against one event in turn: (results in checker order, names that missed the deadline)
+    
+    Each result is a checker's (issues, rules skipped), None for a checker whose
+    turn came after the deadline. Checkers run one after another on the calling
+    thread, where each rule's time budget can interrupt it, so one runaway rule
+    costs that rule alone; re holds the GIL while matching, so threads would not
+    run them in parallel anyway.
+    """
+    deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms > 0 else None
+    results = []
+    late = []
+    for checker in checkers:
+        if deadline is not None and time.monotonic() >= deadline:
+            results.append(None)
+            late.append(checker.name)
+        else:
+            results.append(checker.collect(event, candidates, deadline))
+    return results, late
+
+
+def merge_outputs(outputs: list, late: list = (), deadline_ms: int = DEADLINE_MS) -> dict:
+    """Combine several plugin hook responses into one, blocking if any plugin blocks
+    
+    Blocking responses come first, so the findings that stopped the edit lead
+    both the block reason and the context. Plugins that missed the deadline are
+    named at the end.
+    """
+    outputs = sorted(outputs, key=lambda output: output.get("decision") != "block")
+    note = f"⏱️ No result within the {deadline_ms} ms hook deadline from: {', '.join(late)}" if late else None
+    if not outputs and not note:
+        return None
+    if len(outputs) == 1 and not note:
+        return outputs[0]
+    
+    contexts = []
+    reasons = []
+    for output in outputs:
+        context = output.get("hookSpecificOutput", {}).get("additionalContext") or output.get("reason", "")
+        contexts.append(context)
+        if output.get("decision") == "block":
+            reasons.append(output.get("reason") or context)
+    if note:
+        contexts.append(note)
+    
+    merged = {"hookSpecificOutput": {"hookEventName": "PostToolUse", "additionalContext": "\n\n".join(contexts)}}
+    if reasons:
+        merged = {"decision": "block", "reason": "\n\n".join(reasons), **merged}
+    return merged
@@ -0,0 +1,143 @@
+"""
+Xala PM Hook Runtime - Engine
+Single rule registry that scans one payload for every installed checker
+"""
+
+import json
+import re
+from pathlib import Path
+
+from . import budget
+from .bundles import ensure_bundle
+from .checker import Checker
+from .dispatch import merge_outputs, run_in_turn
+from .incremental import focus
+from .matcher import Prefilter
+from .paths import PLUGINS_ROOT
+from .payload import HookEvent
+from .plugins import PluginCache
+from .results import ResultCache
+from .rulestats import RuleStats
+from .store import FindingStore
+
+
+class Registry:
+    """Every installed checker, loaded once and reloaded when a script changes"""
+    
+    def __init__(self, root: Path = PLUGINS_ROOT, cache: PluginCache = None, results: ResultCache = None,
+                 store: FindingStore = None, stats: RuleStats = None):
+        self.root = Path(root)
+        self.cache = cache or PluginCache()
+        self.results = results or ResultCache()
+        self.store = store or FindingStore()
+        self.stats = stats or RuleStats()
+        self._checkers = {}
+        self._prefilters = {}
+    
+    def checker(self, script: str, module=None) -> Checker:
+        """Checker for one plugin script, or None if it exposes no rule tables"""
+        script = str(Path(script).resolve())
+        module = module or self.cache.load(script)
+        cached = self._checkers.get(script)
+        if cached and cached.module is module:
+            return cached
+        if not hasattr(module, "RULE_TABLES"):
+            return None
+        name = Path(script).parents[1].name
+        checker = Checker(name, script, module, ensure_bundle(name, script, module), self.results, self.store,
+                          self.stats)
+        self._checkers[script] = checker
+        self._prefilters.clear()
+        return checker
+    
+    def installed(self, names: list = None) -> list:
+        """Checkers of every installed plugin, optionally limited to some plugin names"""
+        checkers = []
+        for script in discover_scripts(self.root):
+            if names and Path(script).parents[1].name not in names:
+                continue  # not loaded at all, so a narrow check stays cheap
+            checker = self.checker(script)
+            if checker:
+                checkers.append(checker)
+        return checkers
+    
+    def candidates(self, event: HookEvent, checkers: list) -> set:
+        """Candidate rules of every checker the result cache can't answer, from one prefilter pass"""
+        # Content already scanned under the same rules is answered from the result cache
+        misses = [checker for checker in checkers if checker.cached(event) is None]
+        if not misses:
+            return set()
+        tables = [table for checker in misses for table in checker.tables_for(event.file_path)]
+        content, _ = focus(event)
+        return self.prefilter(tables).candidates(content)
+    
+    def check(self, event: HookEvent, names: list = None, later=None) -> dict:
+        """Scan one payload for all installed checkers at once and merge their responses
+        
+        Their findings share one feedback budget, deduplicated and ranked across plugins.
+        With later, checkers that can't block this event are handed to later(event,
+        checkers) to finish off the critical path, and left out of the response.
+        """
+        checkers = []
+        for checker in self.installed(names):
+            if checker.tables_for(event.file_path):
+                checkers.append(checker)
+            else:
+                checker.observe(event.file_path)
+        candidates = self.candidates(event, checkers)
+        if later is not None:
+            checkers, advisory = self.triage(event, checkers, candidates)
+            if advisory:
+                later(event, advisory)
+        results, late = run_in_turn(checkers, event, candidates)
+        found = [(checker, *result) for checker, result in zip(checkers, results) if result is not None]
+        return merge_outputs(budget.respond(event, found), late)
+    
+    def flush(self) -> None:
+        """Write what the checks queued for the findings store and rule statistics, once the hook has answered"""
+        self.store.flush()
+        self.stats.flush()
+    
+    def triage(self, event: HookEvent, checkers: list, candidates: set = None) -> tuple:
+        """Split checkers into those that block this event and those whose feedback can wait"""
+        focus(event)  # pin the Edit window before the file can change again
+        urgent = [checker for checker in checkers if checker.blocks(event, candidates)]
+        return urgent, [checker for checker in checkers if checker not in urgent]
+    
+    def findings(self, event: HookEvent, checkers: list) -> list:
+        """(checker, issues) for every checker with findings on one payload"""
+        candidates = self.candidates(event, checkers)
+        found = []
+        for checker in checkers:
+            issues = checker.findings(event, candidates)
+            if issues:
+                found.append((checker, issues))
+        return found
+    
+    def prefilter(self, tables: list) -> Prefilter:
+        """One prefilter over every routed rule, so the content is scanned once for all plugins"""
+        key = tuple((table.plugin, table.name) for table in tables)
+        prefilter = self._prefilters.get(key)
+        if prefilter is None:
+            prefilter = Prefilter([rule for table in tables for rule in table.rules])
+            self._prefilters[key] = prefilter
+        return prefilter
+
+
+def discover_scripts(root: Path) -> list:
+    """Python scripts referenced by PostToolUse command hooks of installed plugins"""
+    scripts = []
+    for hooks_file in sorted(Path(root).glob("*/hooks/hooks.json")):
+        try:
+            config = json.loads(hooks_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        for entry in config.get("hooks", {}).get("PostToolUse", []):
+            for hook in entry.get("hooks", []):
+                match = re.search(r"\$\{CLAUDE_PLUGIN_ROOT\}/(scripts/[\w.-]+\.py)", hook.get("command", ""))
+                if hook.get("type") == "command" and match:
+                    script = hooks_file.parents[1] / match.group(1)
+                    if script.is_file():
+                        scripts.append(str(script))
+    return scripts
+
@@ -0,0 +1,151 @@
+"""
+Xala PM Hook Runtime - Diff Gate
+Scans only the hunks a git diff adds, for pre-commit hooks and CI, with the same rules as the editor hooks
+"""
+
+import codecs
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import Registry
+from .incremental import EDIT_CONTEXT_LINES, EditWindow
+from .payload import HookEvent
+from .rulestats import RuleStats
+from .scan import flatten
+from .store import FindingStore
+
+# Tags that fail the gate unless --fail-on says otherwise
+FAIL_ON = ("CRITICAL",)
+
+# Changed files handed to a worker at a time; smaller diffs are checked in one process
+BATCH_SIZE = 16
+
+_HUNK = re.compile(r"@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# Per-process state of a gate worker
+_registry = None
+_names = None
+
+
+class GitError(Exception):
+    """git could not produce the diff"""
+
+
+def diff(revisions: str = None, cwd: str = None) -> tuple:
+    """(repository root, unified diff) of the staged changes, or of a revision range"""
+    try:
+        root = _git(["rev-parse", "--show-toplevel"], cwd).strip()
+        command = ["-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff", "--no-textconv",
+                   "--diff-filter=d", f"-U{EDIT_CONTEXT_LINES}", "--src-prefix=a/", "--dst-prefix=b/"]
+        command += [revisions] if revisions else ["--cached"]
+        return root, _git(command, root)
+    except (OSError, subprocess.SubprocessError) as exc:
+        raise GitError(str(exc)) from exc
+
+
+def _git(args: list, cwd: str) -> str:
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, check=False)
+    if result.returncode:
+        raise GitError(result.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+    return result.stdout.decode("utf-8", "replace")
+
+
+def windows(text: str) -> dict:
+    """Path -> EditWindow of every file a unified diff adds lines to
+    
+    Each hunk's context and added lines form the after side and its context and
+    removed lines the before side, as for an Edit. Pure deletions and binary
+    files have nothing to scan.
+    """
+    found = {}
+    for path, hunks in _hunks(text).items():
+        hunks = [hunk for hunk in hunks if hunk[3]]
+        if hunks:
+            found[path] = EditWindow("\n".join("\n".join(hunk[1]) for hunk in hunks),
+                                     "\n".join("\n".join(hunk[2]) for hunk in hunks),
+                                     [(hunk[0], hunk[0] + len(hunk[1]) - 1) for hunk in hunks],
+                                     [hunk[2] for hunk in hunks])
+    return found
+
+
+def _hunks(text: str) -> dict:
+    """Path -> [first line, after lines, before lines, adds anything] of each hunk of a unified diff"""
+    files = {}
+    path = None
+    hunk = None
+    for line in text.split("\n"):
+        if line.startswith("diff --git "):
+            path = hunk = None
+        elif hunk is None and line.startswith("+++ "):
+            name = _unquote(line[4:].rstrip("\t"))
+            path = name[2:] if name.startswith("b/") else None
+        elif line.startswith("@@") and path is not None:
+            match = _HUNK.match(line)
+            hunk = [int(match.group(1)), [], [], False] if match else None
+            if hunk:
+                files.setdefault(path, []).append(hunk)
+        elif hunk is not None:
+            marker, body = line[:1], line[1:]
+            if marker == "+":
+                hunk[1].append(body)
+                hunk[3] = True
+            elif marker == "-":
+                hunk[2].append(body)
+            elif marker == " ":
+                hunk[1].append(body)
+                hunk[2].append(body)
+    return files
+
+
+def _unquote(name: str) -> str:
+    """A path as git prints it, with C-style quoting undone"""
+    if len(name) < 2 or not name.startswith('"') or not name.endswith('"'):
+        return name
+    return codecs.escape_decode(name[1:-1].encode())[0].decode("utf-8", "replace")
+
+
+def check_window(registry: Registry, checkers: list, path: str, window: EditWindow) -> list:
+    """Findings the changed lines of one file introduce, as flat records"""
+    event = HookEvent({"tool_name": "Edit", "tool_input": {"file_path": path}})
+    event.window = window
+    routed = [checker for checker in checkers if checker.tables_for(path)]
+    return flatten(path, registry.findings(event, routed)) if routed else []
+
+
+def _init_worker(names: list) -> None:
+    global _registry, _names
+    # A gate is not an editing session, and its workers would fight over the findings store
+    _registry = Registry(store=FindingStore(enabled=False), stats=RuleStats(enabled=False))
+    _names = names
+
+
+def _check_batch(items: list) -> list:
+    checkers = _registry.installed(_names)
+    records = []
+    for path, window in items:
+        records.extend(check_window(_registry, checkers, path, window))
+    return records
+
+
+def gate(revisions: str = None, names: list = None, jobs: int = None, cwd: str = None):
+    """Yield the records of every finding the staged changes, or a revision range, introduce
+    
+    Files are checked in batches on a process pool once the diff spans more
+    than one batch.
+    """
+    root, text = diff(revisions, cwd)
+    items = [(os.path.join(root, path), window) for path, window in windows(text).items()]
+    batches = [items[start:start + BATCH_SIZE] for start in range(0, len(items), BATCH_SIZE)]
+    jobs = min(jobs or os.cpu_count() or 1, len(batches))
+    
+    if jobs <= 1:
+        _init_worker(names)
+        for batch in batches:
+            yield from _check_batch(batch)
+        return
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(names,)) as pool:
+        for records in pool.map(_check_batch, batches):
+            yield from records
@@ -0,0 +1,266 @@
+"""
+Xala PM Hook Runtime - Hook Table
+One dispatch table compiled from marketplace.json and every installed plugin's hooks.json
+"""
+
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+
+from .paths import cache_dir
+
+# "0" has `check` load every installed plugin, even with a compiled table
+DISPATCH = os.environ.get("XALAPM_HOOKS_DISPATCH", "1") != "0"
+
+# Bump when the table layout changes
+TABLE_VERSION = 2
+
+_SCRIPT = re.compile(r"\$\{CLAUDE_PLUGIN_ROOT\}/(scripts/[\w.-]+\.py)")
+
+_tables = {}  # root -> (stamp of the saved table, HookTable or None)
+
+
+class HookTable:
+    """Which installed checkers an edit reaches, by hook matcher and by file extension or path marker
+    
+    `check` loads only the plugins the table routes an edit to. Plugin hooks
+    don't consult it: the harness runs each enabled plugin's own hook, which
+    answers for that plugin alone. A table whose sources changed since it was
+    compiled, or that was compiled for another project, is stale and is not used.
+    """
+    
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.checkers = spec["checkers"]
+        self.scripts = {os.path.normpath(checker["script"]): name for name, checker in self.checkers.items()}
+        self._matchers = [(_matcher(matcher), set(names)) for matcher, names in spec["matchers"].items()]
+    
+    def fresh(self) -> bool:
+        """Whether the table was compiled for the current project from sources that haven't changed since"""
+        return (self.spec["project"] == str(project_dir())
+                and all(_stat_key(path) == stamp for path, stamp in self.spec["sources"].items()))
+    
+    def plugin_of(self, script: str) -> str:
+        """Name of the checker plugin a hook script belongs to, or None when the table doesn't list it"""
+        return self.scripts.get(os.path.normpath(os.path.abspath(script)))
+    
+    def plugins_for(self, tool_name: str, file_path: str = None) -> list:
+        """Checker plugins whose hook matches the tool and one of whose tables may route the path, sorted
+        
+        Without a path every plugin the tool reaches is returned; the checkers'
+        own routing settles exclusions either way.
+        """
+        names = set()
+        for matcher, plugins in self._matchers:
+            if matcher.fullmatch(tool_name):
+                names |= plugins
+        if file_path is None or not names:
+            return sorted(names)
+        routed = set(self.spec["any"])
+        routed.update(self.spec["extensions"].get(_suffix(file_path), ()))
+        for marker, plugins in self.spec["paths"].items():
+            if marker in file_path:
+                routed.update(plugins)
+        return sorted(names & routed)
+
+
+def compile_table(root: Path, group: str = None, project: Path = None) -> dict:
+    """The dispatch table of the plugins enabled under a marketplace root, optionally one group's
+    
+    Installed plugins are those marketplace.json lists whose directory exists,
+    or every directory holding hooks/hooks.json when there is no marketplace.json.
+    Of those, only the ones the project's Claude Code settings enable are
+    compiled, or all of them when no settings file names a plugin of this
+    marketplace (e.g. a CI checkout). Raises ValueError for an unknown group.
+    """
+    root = Path(root)
+    project = Path(project or project_dir())
+    marketplace = root / ".claude-plugin" / "marketplace.json"
+    settings = settings_files(project)
+    sources = [root, marketplace, *settings]  # plugins added, dropped or toggled show up in one of these
+    table = {"version": TABLE_VERSION, "root": str(root), "project": str(project), "group": group, "plugins": [],
+             "checkers": {}, "matchers": {}, "extensions": {}, "paths": {}, "any": [], "hooks": {}}
+    allowed = enabled(settings, _marketplace_name(marketplace))
+    for name, directory in sorted(_installed(root, marketplace, group).items()):
+        if allowed is None or name in allowed:
+            _add_plugin(table, sources, name, directory)
+    
+    table["any"] = sorted(set(table["any"]))
+    for key in ("matchers", "extensions", "paths"):
+        table[key] = {item: sorted(set(names)) for item, names in sorted(table[key].items())}
+    table["hooks"] = {event: {matcher: sorted(set(names)) for matcher, names in sorted(matchers.items())}
+                      for event, matchers in sorted(table["hooks"].items())}
+    table["sources"] = {str(path): _stat_key(path) for path in sources}
+    return table
+
+
+def _installed(root: Path, marketplace: Path, group: str) -> dict:
+    """Plugin name -> directory of the installed plugins, optionally one group's"""
+    if not marketplace.is_file():
+        return {path.parents[1].name: path.parents[1] for path in root.glob("*/hooks/hooks.json")}
+    manifest = json.loads(marketplace.read_text())
+    plugins = {entry["name"]: root / entry.get("source", entry["name"]) for entry in manifest.get("plugins", ())}
+    if group is not None:
+        groups = manifest.get("groups", {})
+        if group not in groups:
+            raise ValueError(f"unknown group {group!r}, expected one of {', '.join(sorted(groups))}")
+        plugins = {name: path for name, path in plugins.items() if name in groups[group]["plugins"]}
+    return plugins
+
+
+def project_dir() -> Path:
+    """The project Claude Code runs hooks for: CLAUDE_PROJECT_DIR, else the working directory"""
+    return Path(os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()).resolve()
+
+
+def settings_files(project: Path) -> list:
+    """Claude Code settings files that can enable plugins for a project, lowest precedence first"""
+    config = Path(os.environ.get("CLAUDE_CONFIG_DIR") or Path.home() / ".claude")
+    return [config / "settings.json", project / ".claude" / "settings.json",
+            project / ".claude" / "settings.local.json"]
+
+
+def enabled(settings: list, marketplace: str) -> set:
+    """Names of a marketplace's plugins the settings enable, or None when no file names any of them
+    
+    enabledPlugins keys read "plugin@marketplace"; a later file overrides an
+    earlier one, as in the harness.
+    """
+    states = {}
+    for path in settings:
+        try:
+            entries = json.loads(Path(path).read_text()).get("enabledPlugins") or {}
+        except (OSError, ValueError, AttributeError):
+            continue
+        if isinstance(entries, list):
+            entries = dict.fromkeys(entries, True)
+        for key, state in entries.items():
+            name, _, source = key.partition("@")
+            if source == marketplace:
+                states[name] = bool(state)
+    return {name for name, state in states.items() if state} if states else None
+
+
+def _marketplace_name(marketplace: Path) -> str:
+    try:
+        return json.loads(marketplace.read_text()).get("name")
+    except (OSError, ValueError):
+        return None
+
+
+def _add_plugin(table: dict, sources: list, name: str, directory: Path) -> None:
+    """Route a plugin's checker hooks through the table, listing the hooks left to the harness"""
+    from .bundles import ensure_bundle
+    from .plugins import load_script
+    
+    hooks_file = directory / "hooks" / "hooks.json"
+    sources.append(hooks_file)
+    try:
+        config = json.loads(hooks_file.read_text())
+    except (OSError, json.JSONDecodeError):
+        return
+    table["plugins"].append(name)
+    for event, entries in config.get("hooks", {}).items():
+        for entry in entries:
+            matcher = entry.get("matcher") or "*"
+            for hook in entry.get("hooks", ()):
+                script = _checker_script(directory, event, hook)
+                module = load_script(str(script)) if script else None
+                if module is None or not hasattr(module, "RULE_TABLES"):
+                    # Left to the harness as registered; listed to show what every edit still runs
+                    table["hooks"].setdefault(event, {}).setdefault(matcher, []).append(name)
+                    continue
+                sources.append(script)
+                bundle = ensure_bundle(name, str(script), module)
+                table["checkers"][name] = {"script": str(script), "matcher": matcher}
+                table["matchers"].setdefault(matcher, []).append(name)
+                _index(table, name, bundle["tables"])
+
+
+def _matcher(matcher: str):
+    """A hook matcher as the harness reads it: a regex over the tool name, empty or "*" for every tool"""
+    return re.compile(".*" if matcher in ("", "*") else matcher)
+
+
+def _checker_script(directory: Path, event: str, hook: dict) -> Path:
+    """The Python script a PostToolUse command hook runs, if it is one of the plugin's scripts"""
+    if event != "PostToolUse" or hook.get("type") != "command":
+        return None
+    match = _SCRIPT.search(hook.get("command", ""))
+    script = directory / match.group(1) if match else None
+    return script if script and script.is_file() else None
+
+
+def _index(table: dict, name: str, tables: list) -> None:
+    """Route a checker by the last suffix of each extension and by each path marker its tables list"""
+    for spec in tables:
+        if spec["paths"]:
+            for marker in spec["paths"]:
+                table["paths"].setdefault(marker, []).append(name)
+        elif spec["extensions"] is None:
+            table["any"].append(name)
+        else:
+            for extension in spec["extensions"]:
+                table["extensions"].setdefault(_suffix(extension), []).append(name)
+
+
+def _suffix(path: str) -> str:
+    """Last suffix of a path or of an extension, lowercased; ".d.ts" and ".tsx" both keep theirs"""
+    name = path.rpartition("/")[2]
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot >= 0 else ""
+
+
+def table_path(root: Path) -> Path:
+    # crc32, not blake2b: every claimed script computes this, and hashlib costs more to import than it saves
+    return cache_dir() / "dispatch" / f"{zlib.crc32(str(Path(root).resolve()).encode()):08x}.json"
+
+
+def save(table: dict) -> Path:
+    path = table_path(table["root"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(table, indent=1))
+    os.replace(tmp, path)
+    _tables.pop(str(Path(table["root"]).resolve()), None)
+    return path
+
+
+def remove(root: Path) -> bool:
+    try:
+        os.unlink(table_path(root))
+    except OSError:
+        return False
+    return True
+
+
+def load(root: Path) -> HookTable:
+    """The compiled table of a marketplace root, or None when there is none or it went stale"""
+    if not DISPATCH:
+        return None
+    path = table_path(root)
+    stamp = _stat_key(path)
+    key = str(Path(root).resolve())
+    cached = _tables.get(key)
+    if cached is None or cached[0] != stamp:
+        table = None
+        if stamp is not None:
+            try:
+                spec = json.loads(path.read_text())
+                if spec.get("version") == TABLE_VERSION and str(Path(spec["root"]).resolve()) == key:
+                    table = HookTable(spec)
+            except (OSError, ValueError, KeyError, re.error):
+                table = None
+        cached = _tables[key] = (stamp, table)
+    table = cached[1]
+    return table if table is not None and table.fresh() else None
+
+
+def _stat_key(path) -> list:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
@@ -0,0 +1,149 @@
+"""
+Xala PM Hook Runtime - Incremental
+Narrows an Edit to the changed lines so only findings it introduced are reported
+"""
+
+import os
+from pathlib import Path
+
+from .payload import HookEvent
+
+# Lines of unchanged context scanned around each edited span
+EDIT_CONTEXT_LINES = int(os.environ.get("XALAPM_HOOKS_EDIT_CONTEXT", "3"))
+
+# Set to 0 to scan only new_string, as the standalone scripts do
+INCREMENTAL = os.environ.get("XALAPM_HOOKS_INCREMENTAL", "1") != "0"
+
+
+class EditWindow:
+    """The edited line ranges of a file, as they read after and before the edit
+    
+    previous holds each range's lines as they were before the edit, when known.
+    """
+    
+    __slots__ = ("after", "before", "lines", "previous")
+    
+    def __init__(self, after: str, before: str, lines: list, previous: list = None):
+        self.after = after
+        self.before = before
+        self.lines = lines
+        self.previous = previous
+    
+    def file_line(self, line: int) -> int:
+        """Line of the file that a line of the joined after-window came from"""
+        for first, last in self.lines:
+            count = last - first + 1
+            if line <= count:
+                return first + line - 1
+            line -= count
+        return self.lines[-1][1]
+    
+    def revert(self, text: str) -> str:
+        """The whole file as it read before the edit, from its text after it, or None if they don't line up"""
+        if self.previous is None:
+            return None
+        rows = text.split("\n")
+        after = self.after.split("\n")
+        taken = 0
+        for first, last in self.lines:
+            size = last - first + 1
+            if rows[first - 1:last] != after[taken:taken + size]:
+                return None
+            taken += size
+        for (first, last), previous in reversed(list(zip(self.lines, self.previous))):
+            rows[first - 1:last] = previous
+        return "\n".join(rows)
+
+
+def focus(event: HookEvent) -> tuple:
+    """Content to scan and its pre-edit baseline, which is None unless the Edit could be placed"""
+    if event.window is None:
+        event.window = edit_window(event) or False
+    if event.window:
+        return event.window.after, event.window.before
+    return event.content, None
+
+
+def edit_window(event: HookEvent, context: int = EDIT_CONTEXT_LINES) -> EditWindow:
+    """Locate an applied Edit in the file on disk and cut the changed lines plus context"""
+    if not INCREMENTAL or event.tool_name != "Edit":
+        return None
+    old = event.tool_input.get("old_string")
+    new = event.tool_input.get("new_string")
+    if not isinstance(old, str) or not isinstance(new, str) or not new:
+        return None
+    
+    text = _read(event)
+    if text is None:
+        return None
+    
+    # PostToolUse runs after the edit, so the file already holds new_string
+    spans = _occurrences(text, new)
+    if not spans or (len(spans) > 1 and not event.tool_input.get("replace_all")):
+        return None
+    
+    after = []
+    before = []
+    lines = []
+    for start, end, edits in _windows(text, spans, len(new), context):
+        section = text[start:end]
+        after.append(section)
+        before.append(_revert(section, start, edits, len(new), old))
+        lines.append((text.count("\n", 0, start) + 1, text.count("\n", 0, end) + 1))
+    return EditWindow("\n".join(after), "\n".join(before), lines, [section.split("\n") for section in before])
+
+
+def _read(event: HookEvent) -> str:
+    path = Path(event.file_path)
+    if not path.is_absolute():
+        path = Path(event.data.get("cwd") or ".") / path
+    try:
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _occurrences(text: str, needle: str) -> list:
+    spans = []
+    index = text.find(needle)
+    while index != -1:
+        spans.append(index)
+        index = text.find(needle, index + len(needle))
+    return spans
+
+
+def _windows(text: str, spans: list, size: int, context: int) -> list:
+    """Merge the line ranges around each edit into [start, end, edit offsets] windows"""
+    windows = []
+    for index in spans:
+        start = text.rfind("\n", 0, index) + 1
+        for _ in range(context):
+            if not start:
+                break
+            start = text.rfind("\n", 0, start - 1) + 1
+        end = text.find("\n", index + size)
+        for _ in range(context):
+            if end == -1:
+                break
+            end = text.find("\n", end + 1)
+        end = len(text) if end == -1 else end
+        
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+            windows[-1][2].append(index)
+        else:
+            windows.append([start, end, [index]])
+    return windows
+
+
+def _revert(section: str, start: int, edits: list, size: int, old: str) -> str:
+    """A window as it read before the edit, with each new_string put back to old_string"""
+    parts = []
+    cursor = 0
+    for index in edits:
+        offset = index - start
+        parts.append(section[cursor:offset])
+        parts.append(old)
+        cursor = offset + size
+    parts.append(section[cursor:])
+    return "".join(parts)
@@ -0,0 +1,143 @@
+"""
+Xala PM Hook Runtime - JSX
+JSX elements as the parser finds them and the attribute conditions element rules test
+"""
+
+# Condition keys an element rule may use
+CONDITION_KEYS = ("tags", "present", "absent", "equals", "above", "unless")
+
+# Tags whose only children make a control an icon
+ICON_TAGS = ("svg", "img")
+
+
+class Element:
+    """One JSX element: its tag, lowercased attributes and where it opens
+    
+    An attribute's value is its string, "true" for a bare attribute, or None for
+    an expression the parser can't evaluate. Derived facts are stored as
+    pseudo-attributes: ":text" (renders text or an expression), ":icon-only"
+    (only svg/img children) and ":labelled" (inside a label, or its id is some
+    label's htmlFor).
+    """
+    
+    __slots__ = ("tag", "attrs", "start", "parent", "children", "spread", "in_label")
+    
+    def __init__(self, tag: str, start: int, parent):
+        self.tag = tag
+        self.attrs = {}
+        self.start = start
+        self.parent = parent
+        self.children = []
+        self.spread = False
+        self.in_label = parent is not None and (parent.tag == "label" or parent.in_label)
+
+
+class Document:
+    """Every element of a file, indexed by tag and by attribute name"""
+    
+    def __init__(self, elements: list):
+        self.elements = elements
+        self.by_tag = {}
+        self.by_attr = {}
+        for element in elements:
+            self.by_tag.setdefault(element.tag, []).append(element)
+            for name in element.attrs:
+                self.by_attr.setdefault(name, []).append(element)
+    
+    def matching(self, condition) -> list:
+        """Elements meeting a condition, in source order"""
+        if condition.tags is None:
+            required = condition.required
+            pool = self.by_attr.get(required, ()) if required else self.elements
+        elif len(condition.tags) == 1:
+            pool = self.by_tag.get(condition.tags[0], ())
+        else:
+            pool = sorted((element for tag in condition.tags for element in self.by_tag.get(tag, ())),
+                          key=lambda element: element.start)
+        return [element for element in pool if condition.matches(element)]
+
+
+class Condition:
+    """What an element rule requires of an element, each check a dict lookup
+    
+    tags: element tags it applies to (any element when left out)
+    present / absent: attributes that must all be present / must all be missing
+    equals: attribute values that must match exactly
+    above: attributes whose numeric value must exceed a limit
+    unless: attribute values that exempt the element
+    An element spreading props ({...props}) may carry any attribute, so rules
+    requiring an attribute to be absent never fire on it.
+    """
+    
+    __slots__ = (*CONDITION_KEYS, "required")
+    
+    def __init__(self, spec: dict):
+        self.tags = tuple(spec["tags"]) if spec.get("tags") else None
+        self.present = tuple(spec.get("present", ()))
+        self.absent = tuple(spec.get("absent", ()))
+        self.equals = tuple(spec.get("equals", {}).items())
+        self.above = tuple(spec.get("above", {}).items())
+        self.unless = tuple((name, tuple(values)) for name, values in spec.get("unless", {}).items())
+        # An attribute every matching element carries, to look elements up by
+        self.required = next(iter([*self.present, *(name for name, _ in self.equals + self.above)]), None)
+    
+    def matches(self, element: Element) -> bool:
+        attrs = element.attrs
+        if self.tags is not None and element.tag not in self.tags:
+            return False
+        if any(name not in attrs for name in self.present):
+            return False
+        if self.absent and (element.spread or any(name in attrs for name in self.absent)):
+            return False
+        if any(attrs.get(name) != value for name, value in self.equals):
+            return False
+        for name, limit in self.above:
+            value = _number(attrs.get(name))
+            if value is None or value <= limit:
+                return False
+        return not any(attrs.get(name) in values for name, values in self.unless)
+
+
+def condition(spec: dict) -> dict:
+    """A validated condition with attribute names lowercased, as stored in a rule bundle"""
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("condition must be a non-empty dict")
+    unknown = set(spec) - set(CONDITION_KEYS)
+    if unknown:
+        raise ValueError(f"unknown condition keys {sorted(unknown)}")
+    normalized = {}
+    if spec.get("tags"):
+        normalized["tags"] = [str(tag) for tag in spec["tags"]]
+    for key in ("present", "absent"):
+        if spec.get(key):
+            normalized[key] = [_attr(name) for name in spec[key]]
+    if spec.get("equals"):
+        normalized["equals"] = {_attr(name): str(value) for name, value in spec["equals"].items()}
+    if spec.get("above"):
+        normalized["above"] = {_attr(name): float(limit) for name, limit in spec["above"].items()}
+    if spec.get("unless"):
+        normalized["unless"] = {_attr(name): [str(value) for value in values]
+                                for name, values in spec["unless"].items()}
+    return normalized
+
+
+def anchors(spec: dict) -> tuple:
+    """Prefilter anchors of a normalized condition and whether they match case-insensitively"""
+    if spec.get("tags"):
+        return sorted(f"<{tag}" for tag in spec["tags"]), False
+    for key in ("present", "equals", "above"):
+        names = [name for name in spec.get(key, ()) if not name.startswith(":")]
+        if names:
+            return [names[0]], True
+    return [], False
+
+
+def _number(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _attr(name: str) -> str:
+    return name if name.startswith(":") else name.lower()
@@ -0,0 +1,244 @@
+"""
+Xala PM Hook Runtime - JSX Tree
+Single-pass JSX element parser, building the document element rules are tested against
+"""
+
+import re
+from functools import lru_cache
+
+from .jsx import ICON_TAGS, Document, Element
+
+_NAME = re.compile(r"[A-Za-z_$][\w$.:-]*")
+_ATTR = re.compile(r"""\s*([A-Za-z_$][\w$.:-]*)(?:\s*=\s*(?:"([^"]*)"?|'([^']*)'?|(\{)))?""")
+_SPACE = re.compile(r"\s*")
+_TEXT = re.compile(r"\S")
+_JS_STOPS = re.compile(r"[{}\"'`</]")
+_CHILD_STOPS = re.compile(r"[<{]")
+_EXPRESSION_STOPS = re.compile(r"[{}\"'`/]")
+_STRING = {'"': re.compile(r'[^"\\\n]*(?:\\.[^"\\\n]*)*'), "'": re.compile(r"[^'\\\n]*(?:\\.[^'\\\n]*)*")}
+_TEMPLATE = re.compile(r"[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*", re.S)
+_LITERAL = re.compile(r"""\s*(?:"([^"\\]*)"|'([^'\\]*)'|(-?\d+(?:\.\d+)?|true|false))\s*$""")
+
+# Characters after which "<" opens an element rather than comparing
+_BEFORE_ELEMENT = "(,=:?&|{}[;>"
+
+
+@lru_cache(maxsize=4)
+def parse(text: str) -> Document:
+    """Every JSX element of a source file, from one pass
+    
+    Elements inside attribute expressions are not descended into.
+    """
+    elements = []
+    stack = [None]  # innermost open element per nesting level; None inside JS code
+    depths = [0]  # open braces of each JS level
+    position = 0
+    while position is not None:
+        run = _code if stack[-1] is None else _children
+        position = run(text, position, elements, stack, depths)
+    _derive(elements)
+    return Document(elements)
+
+
+def _code(text: str, position: int, elements: list, stack: list, depths: list) -> int:
+    """Scan JS code until an element's children start, returning where they do, or None at the end"""
+    while stack[-1] is None:
+        token = _JS_STOPS.search(text, position)
+        if token is None:
+            return None
+        start = token.start()
+        char = token.group()
+        position = start + 1
+        if char == "{":
+            depths[-1] += 1
+        elif char == "}":
+            if depths[-1]:
+                depths[-1] -= 1
+            elif len(stack) > 1:
+                stack.pop()
+                depths.pop()
+        elif char in "\"'`":
+            position = _skip_string(text, start)
+        elif char == "/":
+            position = _skip_comment(text, start)
+        elif _opens_element(text, start):
+            position = _open(text, start, _enclosing(stack), elements, stack, depths)
+    return position
+
+
+def _children(text: str, position: int, elements: list, stack: list, depths: list) -> int:
+    """Scan an element's children until JS code starts, returning where it does, or None at the end"""
+    while stack[-1] is not None:
+        parent = stack[-1]
+        token = _CHILD_STOPS.search(text, position)
+        if token is None:
+            return None
+        start = token.start()
+        if _TEXT.search(text, position, start):
+            parent.attrs[":text"] = "true"
+        if token.group() == "{":
+            if not text.startswith(("/*", "//"), _SPACE.match(text, start + 1).end()):
+                parent.attrs[":text"] = "true"
+            stack.append(None)
+            depths.append(0)
+            position = start + 1
+        elif text.startswith("</", start):
+            position = _close(text, start, stack, depths)
+        elif _NAME.match(text, start + 1) or text.startswith("<>", start):
+            position = _open(text, start, parent, elements, stack, depths)
+        else:
+            parent.attrs[":text"] = "true"
+            position = start + 1
+    return position
+
+
+def _opens_element(text: str, start: int) -> bool:
+    """Whether "<" in JS code opens an element rather than comparing or starting type arguments"""
+    name = _NAME.match(text, start + 1)
+    if name is None and not text.startswith("<>", start):
+        return False
+    before = start - 1
+    while before >= 0 and text[before] in " \t\r":
+        before -= 1
+    if before >= 0 and text[before] != "\n" and text[before] not in _BEFORE_ELEMENT \
+            and not text.endswith("return", 0, before + 1):
+        return False
+    if name:
+        # A generic arrow function, <T,>(x) or <T extends U>(x)
+        after = _SPACE.match(text, name.end()).end()
+        if text.startswith(",", after) or text.startswith("extends ", after):
+            return False
+    return True
+
+
+def _enclosing(stack: list) -> Element:
+    for element in reversed(stack):
+        if element is not None:
+            return element
+    return None
+
+
+def _open(text: str, start: int, parent: Element, elements: list, stack: list, depths: list) -> int:
+    """Parse an opening tag, record its element and return where parsing resumes"""
+    name = _NAME.match(text, start + 1)
+    element = Element(name.group() if name else "", start, parent)
+    elements.append(element)
+    if parent is not None:
+        parent.children.append(element)
+    position = name.end() if name else start + 1
+    while True:
+        attr = _ATTR.match(text, position)
+        if attr:
+            position = _attribute(text, attr, element)
+            continue
+        position = _SPACE.match(text, position).end()
+        if position >= len(text):
+            return len(text)
+        if text.startswith("/>", position):
+            return position + 2
+        char = text[position]
+        if char == ">":
+            stack.append(element)
+            depths.append(0)
+            return position + 1
+        if char == "{":
+            end = _skip_expression(text, position)
+            if text[position + 1:end].lstrip().startswith("..."):
+                element.spread = True
+            position = end
+        else:
+            position += 1
+
+
+def _attribute(text: str, attr, element: Element) -> int:
+    """Record one attribute of an opening tag, returning where the tag goes on after it"""
+    position = attr.end()
+    value = attr.group(2) if attr.group(2) is not None else attr.group(3)
+    if attr.group(4):
+        end = _skip_expression(text, position - 1)
+        value = _literal(text[position:end - 1])
+        position = end
+    elif value is None:
+        value = "true"
+    element.attrs[attr.group(1).lower()] = value
+    return position
+
+
+def _close(text: str, start: int, stack: list, depths: list) -> int:
+    """Close the innermost open element of a closing tag's name, if one is open at this level"""
+    end = text.find(">", start)
+    end = len(text) if end == -1 else end
+    name = text[start + 2:end].strip()
+    level = len(stack)
+    while level > 1 and stack[level - 1] is not None:
+        level -= 1
+        if stack[level].tag == name:
+            del stack[level:]
+            del depths[level:]
+            break
+    return end + 1
+
+
+def _skip_expression(text: str, start: int) -> int:
+    """End of the balanced {...} expression opening at start"""
+    depth = 0
+    position = start
+    while True:
+        token = _EXPRESSION_STOPS.search(text, position)
+        if token is None:
+            return len(text)
+        char = token.group()
+        position = token.start() + 1
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if not depth:
+                return position
+        elif char == "/":
+            position = _skip_comment(text, token.start())
+        else:
+            position = _skip_string(text, token.start())
+
+
+def _skip_string(text: str, start: int) -> int:
+    quote = text[start]
+    if quote != "`":
+        end = _STRING[quote].match(text, start + 1).end()
+        return end + 1 if text.startswith(quote, end) else end
+    position = start + 1
+    while True:
+        end = _TEMPLATE.match(text, position).end()
+        if not text.startswith("${", end):
+            return min(end + 1, len(text))
+        position = _skip_expression(text, end + 1)
+
+
+def _skip_comment(text: str, start: int) -> int:
+    if text.startswith("//", start):
+        end = text.find("\n", start)
+        return len(text) if end == -1 else end
+    if text.startswith("/*", start):
+        end = text.find("*/", start + 2)
+        return len(text) if end == -1 else end + 2
+    return start + 1
+
+
+def _literal(expression: str) -> str:
+    """Value of a constant attribute expression such as {"x"}, {0} or {true}, else None"""
+    literal = _LITERAL.match(expression)
+    if literal is None:
+        return None
+    return next(group for group in literal.groups() if group is not None)
+
+
+def _derive(elements: list) -> None:
+    """Fill in the pseudo-attributes that depend on other elements"""
+    labelled_ids = {element.attrs[name] for element in elements if element.tag == "label"
+                    for name in ("htmlfor", "for") if name in element.attrs}
+    for element in elements:
+        attrs = element.attrs
+        if element.children and ":text" not in attrs and all(child.tag in ICON_TAGS for child in element.children):
+            attrs[":icon-only"] = "true"
+        if element.in_label or ("id" in attrs and attrs["id"] in labelled_ids):
+            attrs[":labelled"] = "true"
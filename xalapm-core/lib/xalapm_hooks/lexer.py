@@ -0,0 +1,252 @@
+"""
+Xala PM Hook Runtime - Lexer
+Single-pass code/comment/string region masks for JS/TS, Solidity, Rust and YAML
+"""
+
+import os
+import re
+from functools import lru_cache
+
+# "0" runs every rule over the whole file, ignoring the regions rules declare
+REGIONS = os.environ.get("XALAPM_HOOKS_REGIONS", "1") != "0"
+
+# Region kinds a rule can declare
+REGION_NAMES = ("code", "comment", "string")
+
+# Lexed language by file extension; other files are scanned whole
+LANGUAGES = {
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".sol": "solidity",
+    ".rs": "rust",
+    ".yml": "yaml", ".yaml": "yaml",
+}
+
+# Characters after which a slash starts a regex literal rather than a division
+_BEFORE_REGEX = "(,=:[!&|?{;"
+
+# One alternation per language runs to the next comment or string and consumes it whole; the
+# group that matched tells which. Each starts with the run of plain code before it, so the scan
+# between tokens stays inside the regex engine. Quoted bodies stop at a newline unless the
+# language allows otherwise
+_LINE_COMMENT = r"(//[^\n]*)"
+_BLOCK_COMMENT = r"(/\*.*?(?:\*/|\Z))"
+_QUOTED_LINE = r'"([^"\\\n]*(?:\\.[^"\\\n]*)*)"?' + r"|'([^'\\\n]*(?:\\.[^'\\\n]*)*)'?"
+_C_LIKE = _LINE_COMMENT + "|" + _BLOCK_COMMENT + "|" + _QUOTED_LINE
+_SOLIDITY_TOKEN = re.compile(r"[^/\"']*(?:" + _C_LIKE + r"|/|\Z)", re.S)
+_JS_TOKEN = re.compile(r"[^/\"'`]*(?:" + _C_LIKE + r"|(`)|(/)|\Z)", re.S)
+_JS_NESTED_TOKEN = re.compile(r"[^/\"'`{}]*(?:" + _C_LIKE + r"|(`)|(/)|([{}])|\Z)", re.S)
+_RUST_TOKEN = re.compile(r"[^/\"']*(?:(//[^\n]*)|(/\*)|(\")([^\"\\]*(?:\\.[^\"\\]*)*)\"?"
+                         r"|'((?:\\(?:u\{[0-9a-fA-F]{1,6}\}|x[0-9a-fA-F]{2}|[^\n])|[^\\'\n]))'|[/']|\Z)", re.S)
+_RAW_PREFIX = re.compile(r"(?<!\w)b?r(#*)\Z")
+_YAML_TOKEN = re.compile(r"(?:^|(?<=[\s\[{,]))[#'\"]")
+
+_TEMPLATE = re.compile(r"[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*", re.S)
+_REGEX_LITERAL = re.compile(r"(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/")
+_NESTED_COMMENT = re.compile(r"/\*|\*/")
+_YAML_QUOTED = {'"': re.compile(r'"((?:[^"\\]|\\.)*)"?'), "'": re.compile(r"'((?:[^']|'')*)'?")}
+_YAML_BLOCK = re.compile(r"(?:^|[:-])[ \t]+[|>][0-9+-]{0,2}[ \t]*$")
+
+
+def language_of(file_path: str) -> str:
+    """Lexer language of a path, or None when its regions can't be told apart"""
+    if not REGIONS:
+        return None
+    return LANGUAGES.get(os.path.splitext(file_path)[1].lower())
+
+
+def view(text: str, language: str, keep: tuple) -> str:
+    """The text a rule looking at the keep regions sees: other regions blanked to spaces
+    
+    Offsets and newlines are preserved, so matches locate and anchor as in the text.
+    """
+    if language is None or keep is None or not text:
+        return text
+    return _lexed(text, language).mask(keep)
+
+
+def spans(text: str, language: str) -> tuple:
+    """(start, end, kind) of every comment and string region, in order, from one pass"""
+    return _lexed(text, language).spans
+
+
+class Lexed:
+    """One text's regions and the masks built from them so far, shared by every rule and plugin"""
+    
+    __slots__ = ("text", "spans", "_masks")
+    
+    def __init__(self, text: str, language: str):
+        self.text = text
+        self.spans = tuple(_LEXERS[language](text))
+        self._masks = {}
+    
+    def mask(self, keep: tuple) -> str:
+        masked = self._masks.get(keep)
+        if masked is None:
+            masked = self._masks[keep] = self._build(keep)
+        return masked
+    
+    def _build(self, keep: tuple) -> str:
+        text = self.text
+        code = "code" in keep
+        pieces = []
+        position = 0
+        for start, end, kind in self.spans:
+            if position < start:
+                pieces.append(_keep(text[position:start], code))
+            pieces.append(_keep(text[start:end], kind in keep))
+            position = end
+        pieces.append(_keep(text[position:], code))
+        return "".join(pieces)
+
+
+@lru_cache(maxsize=4)
+def _lexed(text: str, language: str) -> Lexed:
+    """Lexed content, keyed by the text itself, so plugins checking the same content lex it once"""
+    return Lexed(text, language)
+
+
+def _keep(piece: str, kept: bool) -> str:
+    if kept:
+        return piece
+    if "\n" not in piece:
+        return " " * len(piece)
+    return "\n".join(" " * len(line) for line in piece.split("\n"))
+
+
+def _nested_comment(text: str, start: int) -> int:
+    """End of the Rust block comment opening at start, counting nested ones"""
+    depth = 0
+    for token in _NESTED_COMMENT.finditer(text, start):
+        depth += 1 if token.group() == "/*" else -1
+        if not depth:
+            return token.end()
+    return len(text)
+
+
+def _solidity(text: str):
+    """Comments and strings of a Solidity source"""
+    for token in _SOLIDITY_TOKEN.finditer(text):
+        group = token.lastindex
+        if group is None:
+            continue  # a slash dividing, or the end
+        start, end = token.span(group)
+        if group <= 2:
+            yield start, end, "comment"
+        elif end > start:
+            yield start, end, "string"
+
+
+def _js(text: str):
+    """Comments and strings of a JS/TS source, template literals and regex literals included"""
+    position = 0
+    braces = []  # open brace depth inside each template substitution
+    while position < len(text):
+        token = (_JS_NESTED_TOKEN if braces else _JS_TOKEN).match(text, position)
+        group = token.lastindex
+        position = token.end()
+        if group is None:
+            return
+        start, end = token.span(group)
+        if group <= 2:
+            yield start, end, "comment"
+        elif group <= 4:
+            if end > start:
+                yield start, end, "string"
+        elif group == 5:
+            position = yield from _template(text, position, braces)
+        elif group == 6:
+            literal = _REGEX_LITERAL.match(text, position) if _regex_allowed(text, start) else None
+            if literal:
+                yield position, literal.end() - 1, "string"
+                position = literal.end()
+        elif token.group(group) == "{":
+            braces[-1] += 1
+        elif braces[-1]:
+            braces[-1] -= 1
+        else:
+            braces.pop()
+            position = yield from _template(text, position, braces)
+
+
+def _regex_allowed(text: str, slash: int) -> bool:
+    """Whether a slash opens a regex literal, judged by the token before it"""
+    before = slash - 1
+    while before >= 0 and text[before] in " \t":
+        before -= 1
+    return before >= 0 and (text[before] in _BEFORE_REGEX or text.endswith(("return", "typeof"), 0, before + 1))
+
+
+def _template(text: str, start: int, braces: list):
+    """Yield a template literal's text up to its end or next substitution; return where to resume"""
+    end = _TEMPLATE.match(text, start).end()
+    if end > start:
+        yield start, end, "string"
+    if text.startswith("${", end):
+        braces.append(0)
+        return end + 2
+    return min(end + 1, len(text))
+
+
+def _rust(text: str):
+    """Comments, strings, raw strings and char literals of a Rust source; lifetimes stay code"""
+    position = 0
+    while position < len(text):
+        token = _RUST_TOKEN.match(text, position)
+        group = token.lastindex
+        position = token.end()
+        if group is None:
+            continue  # a slash dividing, a lifetime, or the end
+        start, end = token.span(group)
+        if group == 1:
+            yield start, end, "comment"
+        elif group == 2:
+            position = _nested_comment(text, start)
+            yield start, position, "comment"
+        elif group == 5:
+            yield start, end, "string"
+        else:
+            start, end = token.span(4)
+            raw = _RAW_PREFIX.search(text, max(0, start - 65), start - 1)
+            if raw:
+                # A raw string runs to the quote followed by as many hashes as opened it
+                closing = '"' + raw.group(1)
+                end = text.find(closing, start)
+                end = len(text) if end == -1 else end
+                position = min(end + len(closing), len(text))
+            if end > start:
+                yield start, end, "string"
+
+
+def _yaml(text: str):
+    """Comments and quoted scalars of a YAML document; block scalar bodies stay code"""
+    block = None  # indent that block scalar lines must exceed
+    offset = 0
+    for line in text.split("\n"):
+        start = offset
+        offset += len(line) + 1
+        body = line.lstrip(" ")
+        indent = len(line) - len(body)
+        if block is not None:
+            if not body.strip() or indent > block:
+                continue
+            block = None
+        
+        code_end = len(line)
+        position = 0
+        while "#" in line or "'" in line or '"' in line:
+            token = _YAML_TOKEN.search(line, position)
+            if token is None:
+                break
+            if token.group() == "#":
+                code_end = token.start()
+                yield start + code_end, start + len(line), "comment"
+                break
+            quoted = _YAML_QUOTED[token.group()].match(line, token.start())
+            if quoted.end(1) > quoted.start(1):
+                yield start + quoted.start(1), start + quoted.end(1), "string"
+            position = quoted.end()
+        if ("|" in line or ">" in line) and _YAML_BLOCK.search(line, 0, code_end):
+            block = indent
+
+
+_LEXERS = {"js": _js, "solidity": _solidity, "rust": _rust, "yaml": _yaml}
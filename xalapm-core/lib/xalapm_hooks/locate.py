@@ -0,0 +1,71 @@
+"""
+Xala PM Hook Runtime - Locate
+Resolves match offsets to line, column and snippet through one line-start index per scan
+"""
+
+import os
+from bisect import bisect_right
+from itertools import accumulate
+
+# Matches located per rule; further matches are still counted
+MAX_LOCATIONS = int(os.environ.get("XALAPM_HOOKS_MAX_LOCATIONS", "5"))
+
+# Longest snippet shown for a location
+SNIPPET_CHARS = 120
+
+
+class LineIndex:
+    """Line-start offsets of a text, built on the first lookup and shared by every rule
+    
+    line_map translates a line of the scanned text to a line of the file, for
+    incremental Edits that scan a window cut out of it.
+    """
+    
+    __slots__ = ("content", "line_map", "_starts")
+    
+    def __init__(self, content: str, line_map=None):
+        self.content = content
+        self.line_map = line_map
+        self._starts = None
+    
+    @property
+    def starts(self) -> list:
+        if self._starts is None:
+            self._starts = [0, *accumulate(len(line) + 1 for line in self.content.split("\n"))][:-1]
+        return self._starts
+    
+    def locate(self, offset: int) -> dict:
+        """Line and column (1-based) of an offset, with the stripped line as a snippet"""
+        starts = self.starts
+        row = bisect_right(starts, offset) - 1
+        start = starts[row]
+        end = starts[row + 1] - 1 if row + 1 < len(starts) else len(self.content)
+        line = row + 1
+        return {
+            "line": self.line_map(line) if self.line_map else line,
+            "column": offset - start + 1,
+            "snippet": snippet(self.content[start:end], offset - start),
+        }
+    
+    def line_of(self, offset: int) -> int:
+        """File line (1-based) of an offset"""
+        line = bisect_right(self.starts, offset)
+        return self.line_map(line) if self.line_map else line
+    
+    def locations(self, offsets: list) -> list:
+        return [self.locate(offset) for offset in offsets[:MAX_LOCATIONS]]
+
+
+def snippet(line: str, column: int) -> str:
+    """A line trimmed to SNIPPET_CHARS around the matched column"""
+    line = line.rstrip("\r")
+    if len(line) <= SNIPPET_CHARS:
+        return line.strip()
+    begin = max(0, min(column - SNIPPET_CHARS // 4, len(line) - SNIPPET_CHARS))
+    text = line[begin:begin + SNIPPET_CHARS].strip()
+    return ("…" if begin else "") + text + ("…" if begin + SNIPPET_CHARS < len(line) else "")
+
+
+def format_locations(issue: dict) -> list:
+    """Lines pointing at where an issue matched, for a plugin's response; none when it wasn't located"""
+    return [f"      L{loc['line']}:{loc['column']}  {loc['snippet']}" for loc in issue.get("locations", ())]
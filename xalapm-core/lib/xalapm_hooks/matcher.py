@@ -0,0 +1,133 @@
+"""
+Xala PM Hook Runtime - Matcher
+Literal-anchor prefilter so only candidate rules run their full regex
+"""
+
+import re
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Scoped flags that change how a literal anchor matches
+CASE_FLAGS = re.IGNORECASE | re.ASCII | re.LOCALE
+
+_REPEATS = tuple(
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+)
+_ATOMIC = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+
+def required_literals(pattern: str, flags: int = 0) -> frozenset:
+    """Literals of which every match must contain at least one, or None if there are none"""
+    return analyze(pattern, flags)[0]
+
+
+def analyze(pattern: str, flags: int = 0) -> tuple:
+    """Required literals and whether they match case-insensitively, without compiling"""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None, False
+    literals = _sequence_literals(list(parsed))
+    if literals and not all(literal.isascii() for literal in literals):
+        literals = None
+    return literals, bool(parsed.state.flags & re.IGNORECASE)
+
+
+def _sequence_literals(items: list) -> frozenset:
+    """Pick the most selective requirement among the items of a sequence"""
+    options = []
+    run = []
+    
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            options.append(frozenset(["".join(run)]))
+            run = []
+        
+        options.append(_item_literals(op, av))
+    if run:
+        options.append(frozenset(["".join(run)]))
+    
+    options = [option for option in options if option]
+    if not options:
+        return None
+    return max(options, key=lambda option: (min(map(len, option)), -len(option)))
+
+
+def _item_literals(op, av) -> frozenset:
+    """Requirement of one item of a sequence that is not a literal, or None"""
+    if op == sre_constants.SUBPATTERN:
+        # Scoped flags such as (?i:...) would change how the anchor must match
+        _, add_flags, del_flags, body = av
+        if not (add_flags | del_flags) & CASE_FLAGS:
+            return _sequence_literals(list(body))
+    elif _ATOMIC is not None and op == _ATOMIC:
+        return _sequence_literals(list(av))
+    elif op == sre_constants.BRANCH:
+        return _branch_literals(av[1])
+    elif op in _REPEATS and av[0] >= 1:
+        return _sequence_literals(list(av[2]))
+    return None
+
+
+def _branch_literals(branches: list) -> frozenset:
+    """Every alternative must be anchored for the branch to be"""
+    literals = set()
+    for branch in branches:
+        option = _sequence_literals(list(branch))
+        if not option:
+            return None
+        literals |= option
+    return frozenset(literals)
+
+
+class Prefilter:
+    """Finds which rules can match by looking for their literal anchors first
+    
+    CPython's re does not optimize large literal alternations, so a combined
+    anchor regex is slower than the rules it guards. Each distinct anchor is
+    instead looked up once with str.find over a case-normalized copy of the
+    content, which runs at memchr speed.
+    """
+    
+    def __init__(self, rules: list):
+        self.unanchored = []
+        self.exact = {}  # anchor -> rules, case-sensitive
+        self.folded = {}  # lowercased anchor -> rules, case-insensitive
+        
+        for rule in rules:
+            if not rule.anchors:
+                self.unanchored.append(rule)
+                continue
+            anchors = self.folded if rule.ignore_case else self.exact
+            for literal in rule.anchors:
+                anchors.setdefault(literal.lower() if rule.ignore_case else literal, []).append(rule)
+    
+    def candidates(self, content: str) -> set:
+        """Rules whose anchors occur in the content, plus every unanchored rule"""
+        found = set(self.unanchored)
+        for anchor, rules in self.exact.items():
+            if anchor in content:
+                found.update(rules)
+        if self.folded:
+            folded = fold_case(content)
+            for anchor, rules in self.folded.items():
+                if anchor in folded:
+                    found.update(rules)
+        return found
+
+
+def fold_case(content: str) -> str:
+    """Lowercase so that any re.IGNORECASE match of an ASCII literal survives"""
+    if content.isascii():
+        return content.lower()
+    # casefold() covers the Unicode equivalents re accepts, except dotless i
+    return content.casefold().replace("\u0131", "i")
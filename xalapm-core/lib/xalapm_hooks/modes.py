@@ -0,0 +1,172 @@
+"""
+Xala PM Hook Runtime - Table Modes
+Runs a rule table's candidate rules the way its mode reads them, shaping hits like the plugin's own issue dicts
+"""
+
+import time
+
+from . import contracts, jsxtree, symbols, tracing, workflow, yamltree
+from .lexer import view
+from .locate import LineIndex
+from .rules import all_starts, captures, counted_starts, first_starts, introduced, line_at, match_count
+
+
+def pattern_issues(checker, table, content: str, file_path: str, candidates: set, guard, baseline: str,
+                   index: LineIndex, language: str) -> list:
+    """Issues of a first-match or count table, rules run cheapest per hit first and issues kept in table order"""
+    issues = []
+    for rule in checker.stats.order([rule for rule in table.rules if rule in candidates]):
+        run = _covered if rule.covered_by else _counted if table.mode == "count" else _matched
+        issue = run(checker, table, rule, view(content, language, rule.regions), file_path, guard, baseline, index,
+                    language)
+        if issue:
+            issues.append(issue)
+    if len(issues) > 1:
+        rank = {rule.id: position for position, rule in enumerate(table.rules)}
+        issues.sort(key=lambda issue: rank[issue["rule"]])
+    return issues
+
+
+def _covered(checker, table, rule, text: str, file_path: str, guard, baseline: str, index: LineIndex,
+             language: str) -> dict:
+    """Issue of a covered_by rule's matches in functions no matching modifier guards, or None"""
+    found = guard.run(rule, all_starts, text) or []
+    starts = contracts.uncovered(file_path, found, index, rule.covered_by)
+    count = len(starts)
+    if count and baseline is not None:
+        # Matches on lines the baseline already had are not new; of the rest, count the unguarded
+        old = view(baseline, language, rule.regions)
+        before = guard.run(rule, all_starts, old) or []
+        added = introduced([(line_at(text, offset), offset) for offset in found],
+                           [(line_at(old, offset), offset) for offset in before])
+        count = len({offset for _, offset in added}.intersection(starts))
+    if count <= 0:
+        return None
+    extra = {"count": count} if table.mode == "count" else {}
+    return checker.issue(rule, file_path, **extra, locations=index.locations(starts))
+
+
+def _counted(checker, table, rule, text: str, file_path: str, guard, baseline: str, index: LineIndex,
+             language: str) -> dict:
+    """Issue of a count rule's matches beyond the baseline's, or None"""
+    count, starts = guard.run(rule, counted_starts, text) or (0, [])
+    if count and baseline is not None:
+        count -= guard.run(rule, match_count, view(baseline, language, rule.regions)) or 0
+    return checker.issue(rule, file_path, count=count, locations=index.locations(starts)) if count > 0 else None
+
+
+def _matched(checker, table, rule, text: str, file_path: str, guard, baseline: str, index: LineIndex,
+             language: str) -> dict:
+    """Issue of a rule matching at all, or more often than in the baseline, or None"""
+    if baseline is None:
+        starts = guard.run(rule, first_starts, text)
+        return checker.issue(rule, file_path, locations=index.locations(starts)) if starts else None
+    count, starts = guard.run(rule, counted_starts, text) or (0, [])
+    if count and count > (guard.run(rule, match_count, view(baseline, language, rule.regions)) or 0):
+        return checker.issue(rule, file_path, locations=index.locations(starts))
+    return None
+
+
+def element_issues(checker, table, content: str, file_path: str, candidates: set, guard, baseline: str,
+                   index: LineIndex) -> list:
+    """Count the JSX elements meeting each rule's condition, from one parse of the content"""
+    rules = [rule for rule in table.rules if rule in candidates]
+    if not rules:
+        return []
+    started = time.perf_counter()
+    document = jsxtree.parse(content)
+    before = jsxtree.parse(baseline) if baseline is not None else None
+    tracing.record_rule(f"{checker.name}/{table.name}/parse", time.perf_counter() - started)
+    
+    issues = []
+    for rule in rules:
+        started = time.perf_counter()
+        found = document.matching(rule.condition)
+        count = len(found) - (len(before.matching(rule.condition)) if before else 0)
+        guard.count(rule.id, time.perf_counter() - started, len(content), bool(found))
+        if count > 0:
+            starts = [element.start for element in found]
+            issues.append(checker.issue(rule, file_path, count=count, locations=index.locations(starts)))
+    return issues
+
+
+def workflow_issues(checker, table, content: str, file_path: str, candidates: set, guard, baseline: str,
+                    index: LineIndex, window) -> list:
+    """Answer each rule's path query from one parse of the workflow, with an issue per rule and job
+    
+    Paths only mean something in the whole file, so an Edit window is widened
+    back to it and compared with the file as it read before the edit. Matches
+    the old file had under the same path and text are not new.
+    """
+    rules = [rule for rule in table.rules if rule in candidates]
+    if not rules:
+        return []
+    if window:
+        content, baseline, index = _widened(file_path, window, content, baseline, index)
+    started = time.perf_counter()
+    tree = yamltree.parse(content)
+    before = yamltree.parse(baseline) if baseline is not None else None
+    tracing.record_rule(f"{checker.name}/{table.name}/parse", time.perf_counter() - started)
+    
+    issues = []
+    for rule in rules:
+        issues.extend(_per_job(checker, rule, tree, before, content, baseline, file_path, guard, index))
+    return issues
+
+
+def _widened(file_path: str, window, content: str, baseline: str, index: LineIndex) -> tuple:
+    """(content, baseline, index) of the whole workflow an Edit window was cut from, else as given"""
+    whole = workflow.read(file_path)
+    previous = window.revert(whole) if whole is not None else None
+    if previous is None:
+        return content, baseline, index
+    return whole, previous, LineIndex(whole)
+
+
+def _per_job(checker, rule, tree, before, content: str, baseline: str, file_path: str, guard,
+             index: LineIndex) -> list:
+    """Issues of one workflow rule's new matches, one per job they fall in"""
+    # The guard only times the query and its regex; there is no text to cut down
+    found = [(key, (offset, job)) for offset, job, key in
+             guard.run(rule, lambda regex, _: rule.query.find(tree, regex), content) or []]
+    if found and before is not None:
+        old = guard.run(rule, lambda regex, _: rule.query.find(before, regex), baseline) or []
+        found = introduced(found, [(key, (offset, job)) for offset, job, key in old])
+    jobs = {}
+    for _, (offset, job) in found:
+        jobs.setdefault(job, []).append(offset)
+    return [checker.issue(rule, file_path, **({"job": job} if job else {}), locations=index.locations(starts))
+            for job, starts in jobs.items()]
+
+
+def collect_issues(checker, table, content: str, file_path: str, candidates: set, guard, baseline: str,
+                   index: LineIndex, language: str) -> list:
+    """Merge capture groups of rules sharing a tag/message into one templated issue
+    
+    A skip_tested table drops names that a test file of the project already imports.
+    """
+    tested = symbols.tested(file_path)[0] if table.skip_tested else ()
+    grouped = {}
+    for rule in table.rules:
+        captured = grouped.setdefault((rule.tag, rule.message), [])
+        if rule in candidates:
+            found = guard.run(rule, captures, view(content, language, rule.regions)) or []
+            if found and baseline is not None:
+                found = introduced(found, guard.run(rule, captures, view(baseline, language, rule.regions)) or [])
+            captured.extend(pair for pair in found if pair[0] not in tested)
+    return collected(checker, table, grouped, index.locations)
+
+
+def collected(checker, table, grouped: dict, locate) -> list:
+    """One templated issue per (tag, message) group that captured any (name, offset) pairs
+    
+    locate turns the offsets of the names shown into locations.
+    """
+    issues = []
+    for (tag, message), captured in grouped.items():
+        if captured:
+            shown = captured[:table.limit] if table.limit else captured
+            issues.append({checker.issue_key: tag, "message": message.format(", ".join(name for name, _ in shown)),
+                           "rule": f"{checker.name}/{table.name}",
+                           "locations": locate([offset for _, offset in shown])})
+    return issues
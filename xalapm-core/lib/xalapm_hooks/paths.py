@@ -0,0 +1,74 @@
+"""
+Xala PM Hook Runtime - Paths
+Locations of the daemon socket and runtime files
+"""
+
+import os
+import stat
+
+# Marketplace root holding the installed plugins, next to xalapm-core; os.path, not pathlib, which the
+# daemon client would otherwise import on every hook
+PLUGINS_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+
+
+class UnsafeRuntimeDir(OSError):
+    """The runtime directory is not private to the current user, so its socket and files can't be trusted"""
+
+
+def runtime_path() -> str:
+    """Per-user directory for the daemon socket, lock, spool and reports, created private if missing
+    
+    Under a shared TMPDIR another user could create it first and serve a socket
+    of their own from it, so it is used only as a real directory owned by the
+    current user with mode 0700. Raises UnsafeRuntimeDir otherwise.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        path = os.path.join(base, "xalapm-hooks")
+    else:
+        path = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"xalapm-hooks-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(path, 0o700)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        raise UnsafeRuntimeDir(f"{path} must be a directory owned by uid {os.getuid()} with mode 0700")
+    return path
+
+
+def runtime_dir():
+    """runtime_path() as a Path"""
+    from pathlib import Path
+    return Path(runtime_path())
+
+
+def socket_path() -> str:
+    """Unix socket the hook daemon listens on"""
+    return os.environ.get("XALAPM_HOOKS_SOCKET") or os.path.join(runtime_path(), "hookd.sock")
+
+
+def cache_dir():
+    """Per-user directory for rule bundles and other rebuildable caches"""
+    from pathlib import Path
+    override = os.environ.get("XALAPM_HOOKS_CACHE")
+    if override:
+        path = Path(override)
+    else:
+        path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "xalapm-hooks"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_dir():
+    """Per-user directory for state worth keeping, such as the findings store"""
+    from pathlib import Path
+    override = os.environ.get("XALAPM_HOOKS_DATA")
+    if override:
+        path = Path(override)
+    else:
+        path = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "xalapm-hooks"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,115 @@
+"""
+Xala PM Hook Runtime - Payload
+Parses a PostToolUse hook payload once for every checker
+"""
+
+import json
+import re
+
+# Tools whose payload carries file content to check
+CHECKED_TOOLS = ("Write", "Edit")
+
+# Payload fields peek() can read without decoding the rest
+PEEKED_FIELDS = ("tool_name", "file_path", "session_id")
+
+_VALUE = re.compile(rb'\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+class HookEvent:
+    """The parts of a Write/Edit payload the checkers need"""
+    
+    __slots__ = ("tool_name", "file_path", "content", "tool_input", "data", "window", "digest")
+    
+    def __init__(self, data: dict):
+        self.data = data
+        self.tool_name = data.get("tool_name", "")
+        self.tool_input = data.get("tool_input", {}) or {}
+        self.file_path = self.tool_input.get("file_path", "")
+        self.content = self.tool_input.get("content", self.tool_input.get("new_string", ""))
+        self.window = None
+        self.digest = None
+
+
+def parse(raw: bytes) -> HookEvent:
+    """Decode a raw payload, returning None for anything the checkers skip"""
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    
+    event = HookEvent(data)
+    if event.tool_name not in CHECKED_TOOLS:
+        return None
+    return event
+
+
+def peek(raw: bytes) -> dict:
+    """tool_name, file_path and session_id read straight from raw payload bytes, without decoding content
+    
+    Each key is found with bytes.find, which stops at its first occurrence; the
+    payload puts these keys ahead of the content, so a multi-megabyte content
+    field is neither scanned nor decoded. An unescaped quote followed by the key
+    name, a quote and a colon can only open an object key in valid JSON, so
+    the first such occurrence is the field itself. Returns None when no tool
+    name is found; the caller then parses the payload.
+    """
+    found = {}
+    for name in PEEKED_FIELDS:
+        match = _key(raw, b'"%s"' % name.encode())
+        if match is None:
+            if name == "tool_name":
+                return None
+            continue
+        try:
+            found[name] = json.loads(match.group(1))
+        except (ValueError, UnicodeDecodeError):
+            return None
+    return found
+
+
+def _key(raw: bytes, key: bytes):
+    """Match of the string value of the first occurrence of a quoted key outside a string"""
+    offset = raw.find(key)
+    while offset != -1:
+        match = _VALUE.match(raw, offset + len(key))
+        if match and not _escaped(raw, offset):
+            return match
+        offset = raw.find(key, offset + len(key))
+    return None
+
+
+def _escaped(raw: bytes, offset: int) -> bool:
+    """Whether the quote at offset is escaped, i.e. inside a string rather than opening a key"""
+    slashes = 0
+    while offset - slashes > 0 and raw[offset - slashes - 1] == 0x5C:
+        slashes += 1
+    return slashes % 2 == 1
+
+
+def routes(file_path: str, extensions: tuple = None, paths: tuple = (), exclude: tuple = ()) -> bool:
+    """Whether a rule table routed by path marker or extension applies to a file"""
+    if exclude and any(marker in file_path.lower() for marker in exclude):
+        return False
+    if paths:
+        return any(marker in file_path for marker in paths)
+    return extensions is None or file_path.endswith(tuple(extensions))
+
+
+def watched(header: dict, tables: list) -> bool:
+    """Whether a peeked Write/Edit lands on a file a skip_tested table's index follows, tests included"""
+    if header["tool_name"] not in CHECKED_TOOLS or "file_path" not in header:
+        return False
+    return any(table.get("skip_tested") and routes(header["file_path"], table.get("extensions"),
+                                                   table.get("paths") or ()) for table in tables)
+
+
+def wanted(header: dict, tables: list) -> bool:
+    """Whether any of a script's RULE_TABLES may apply to a peeked payload"""
+    if header["tool_name"] not in CHECKED_TOOLS:
+        return False
+    if "file_path" not in header:
+        return True  # let the full parse decide
+    return any(routes(header["file_path"], table.get("extensions"), table.get("paths") or (),
+                      table.get("exclude") or ()) for table in tables)
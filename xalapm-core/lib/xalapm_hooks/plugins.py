@@ -0,0 +1,44 @@
+"""
+Xala PM Hook Runtime - Plugin Loader
+Imports plugin checker scripts by path and keeps them warm
+"""
+
+import importlib.util
+import os
+import re
+import threading
+
+
+class PluginCache:
+    """Loaded plugin script modules, reloaded when the script changes on disk"""
+    
+    def __init__(self):
+        self._modules = {}
+        self._lock = threading.Lock()
+    
+    def load(self, path: str):
+        """Return the module for a plugin script, importing it on first use"""
+        path = os.path.abspath(path)
+        if not path.endswith(".py"):
+            raise ValueError(f"Not a plugin script: {path}")
+        
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._modules.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            module = load_script(path)
+            self._modules[path] = (mtime, module)
+            return module
+
+
+def load_script(path: str):
+    """Import a hyphenated plugin script as a module"""
+    plugin, script = os.path.normpath(path).split(os.sep)[-3::2]
+    name = "xalapm_plugin_" + re.sub(r"\W", "_", f"{plugin}_{script[:-3]}")
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load plugin script: {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,160 @@
+"""
+Xala PM Hook Runtime - Project Index
+Per-file facts about one project, saved as JSON and refreshed file by file as files change
+"""
+
+import json
+import os
+from hashlib import blake2b
+from pathlib import Path
+
+from .paths import cache_dir
+
+# Larger files are left out of project indexes
+MAX_FILE_BYTES = 1024 * 1024
+
+_roots = {}
+
+
+class ProjectIndex:
+    """Entries keyed by path relative to a project root, one JSON file per project
+    
+    An entry is re-read when its file's mtime or size moved, and re-parsed only
+    when its content hash changed too. Subclasses set NAME and VERSION and turn
+    a file's text into the entry's facts with parse().
+    """
+    
+    NAME = "index"
+    VERSION = 1
+    
+    def __init__(self, root: Path, path: Path = None):
+        self.root = Path(root)
+        key = blake2b(str(self.root).encode(), digest_size=8).hexdigest()
+        self.path = path or cache_dir() / self.NAME / f"{key}.json"
+        self.files = {}  # rel -> {"stat", "hash", **parse(rel, text)}
+        self.dirty = False
+        self.loaded = None  # stat of the saved index this state was read from
+    
+    def load(self):
+        """Read the saved index, or build a fresh one when there is none"""
+        try:
+            stat = os.stat(self.path)
+            with open(self.path) as handle:
+                saved = json.load(handle)
+        except (OSError, ValueError):
+            saved = None
+        if saved and saved.get("version") == self.VERSION and saved.get("root") == str(self.root):
+            self.files = saved["files"]
+            self.loaded = _stat_key(stat)
+            self.changed()
+            self.dirty = False
+        else:
+            self.build()
+        return self
+    
+    def build(self) -> None:
+        self.files = {}
+        self.dirty = True
+    
+    def stale(self) -> bool:
+        """Whether another process saved the index since it was loaded"""
+        try:
+            return _stat_key(os.stat(self.path)) != self.loaded
+        except OSError:
+            return self.loaded is not None
+    
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": self.VERSION, "root": str(self.root), "files": self.files}))
+            os.replace(tmp, self.path)
+            self.loaded = _stat_key(os.stat(self.path))
+            self.dirty = False
+        except OSError:
+            pass  # read-only cache; the index is rebuilt in memory next time
+    
+    def refresh(self, rel: str) -> bool:
+        """Re-read one file if it moved on disk, returning whether its entry changed"""
+        entry = self.files.get(rel)
+        try:
+            stat = os.stat(self.root / rel)
+        except OSError:
+            if entry is None:
+                return False
+            del self.files[rel]
+            self.changed(rel)
+            return True
+        if entry is not None and entry["stat"] == _stat_key(stat):
+            return False
+        if stat.st_size > MAX_FILE_BYTES:
+            return False
+        try:
+            with open(self.root / rel, encoding="utf-8", errors="replace") as handle:
+                text = handle.read()
+        except OSError:
+            return False
+        
+        digest = blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+        self.dirty = True
+        if entry is not None and entry["hash"] == digest:
+            entry["stat"] = _stat_key(stat)  # touched but unchanged
+            return False
+        self.files[rel] = {"stat": _stat_key(stat), "hash": digest, **self.parse(rel, text)}
+        self.changed(rel)
+        return True
+    
+    def parse(self, rel: str, text: str) -> dict:
+        raise NotImplementedError
+    
+    def changed(self, rel: str = None) -> None:
+        """Drop what was derived from a file's entry (from every entry when rel is None)"""
+        self.dirty = True
+    
+    def relative(self, file_path: str) -> str:
+        return os.path.relpath(os.path.abspath(file_path), self.root)
+
+
+def _stat_key(stat) -> list:
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def project_root(file_path: str) -> Path:
+    """Nearest enclosing git checkout, else nearest package or crate directory, of an existing file"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if directory in _roots:
+        return _roots[directory]
+    root = None
+    for marker in (".git", "package.json", "foundry.toml", "Cargo.toml") if os.path.isdir(directory) else ():
+        current = directory
+        while not os.path.exists(os.path.join(current, marker)):
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        else:
+            root = Path(current)
+            break
+    if len(_roots) > 1024:
+        _roots.clear()
+    _roots[directory] = root
+    return root
+
+
+def loaded(cls, file_path: str, indexes: dict, build: bool = True):
+    """The loaded cls index of the project holding a file, reloaded after another process saved it
+    
+    Without build, None until an index of the project has been saved.
+    """
+    root = project_root(file_path)
+    if root is None:
+        return None
+    index = indexes.get(root)
+    if index is None or index.stale():
+        index = cls(root)
+        if not build and not os.path.exists(index.path):
+            return None
+        index = indexes[root] = index.load()
+    return index
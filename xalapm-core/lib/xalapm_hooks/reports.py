@@ -0,0 +1,181 @@
+"""
+Xala PM Hook Runtime - Report Commands
+CLI commands that scan trees and diffs, benchmark checkers and read back what past checks recorded
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from . import bench, gate, scan, symbols
+from .engine import Registry
+from .rulestats import RuleStats
+from .store import FindingStore
+
+
+def cmd_scan(args) -> int:
+    """Scan a directory tree with every installed checker, streaming findings as JSONL"""
+    names = args.plugins.split(",") if args.plugins else None
+    files = skipped = findings = unrun = 0
+    try:
+        for done, missed, records in scan.scan(args.paths, names, args.jobs, args.max_bytes):
+            files += done
+            skipped += missed
+            notes = sum(1 for record in records if "skipped" in record)
+            findings += len(records) - notes
+            unrun += notes
+            for record in records:
+                sys.stdout.write(json.dumps(record) + "\n")
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); silence the final flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    
+    print(f"Scanned {files - skipped} file(s), {findings} finding(s), {skipped} skipped"
+          + (f", {unrun} streamed file/plugin pair(s) with rules not run" if unrun else ""), file=sys.stderr)
+    return 0
+
+
+def cmd_gate(args) -> int:
+    """Check only what the staged changes, or a revision range, add; fail on blocking tags"""
+    names = args.plugins.split(",") if args.plugins else None
+    fail_on = set(args.fail_on.split(","))
+    root = os.getcwd()
+    findings = failing = 0
+    try:
+        for record in gate.gate(args.revisions, names, args.jobs):
+            findings += 1
+            failing += record["tag"] in fail_on
+            if args.json:
+                print(json.dumps(record))
+                continue
+            lines = [location["line"] for location in record.get("locations", ())]
+            where = os.path.relpath(record["file"], root) + (f":{lines[0]}" if lines else "")
+            print(f"{record['tag'] or '-':9} {record['plugin']:16} {where}  {record['message']}")
+    except gate.GitError as exc:
+        print(f"gate: {exc}", file=sys.stderr)
+        return 2
+    
+    print(f"{findings} finding(s) in the changed lines, {failing} {'/'.join(sorted(fail_on))}", file=sys.stderr)
+    return 1 if failing else 0
+
+
+def cmd_bench(args) -> int:
+    """Replay the synthetic corpus against every checker and report latency percentiles"""
+    names = args.plugins.split(",") if args.plugins else None
+    report = bench.run(args.runs, names)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    
+    print(f"{'payload':22} {'plugin':16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in report["latency"]:
+        print(f"{row['payload']:22} {row['plugin']:16} {row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}")
+    
+    print("\nSlowest rules (mean ms per run):")
+    for row in report["rules"][:args.top]:
+        print(f"  {row['mean_ms']:8.2f}  {row['rule']:28} {row['payload']}")
+    return 0
+
+
+def cmd_profile(args) -> int:
+    """Report what each rule has cost across sessions, costliest per useful finding first"""
+    stats = RuleStats()
+    if args.reset:
+        print(f"Reset the counters of {stats.reset()} rule(s)")
+        return 0
+    
+    rows = stats.report(args.plugins.split(",") if args.plugins else None)[:args.top]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    if not rows:
+        print("No rule statistics yet", file=sys.stderr)
+        return 0
+    
+    messages = {rule.id: f"[{rule.tag}] {rule.message}" for checker in Registry().installed()
+                for table in checker.tables for rule in table.rules}
+    print(f"{'ms/hit':>9} {'total ms':>10} {'runs':>7} {'hit %':>6} {'mean ms':>8} {'MB':>8}  rule")
+    for row in rows:
+        per_hit = f"{row['ms_per_hit']:9.3f}" if row["hits"] else f"{'never':>9}"
+        print(f"{per_hit} {row['total_ms']:10.1f} {row['runs']:7} {row['hit_rate'] * 100:6.1f} {row['mean_ms']:8.3f} "
+              f"{row['bytes'] / 1e6:8.2f}  {row['rule']}  {messages.get(row['rule'], '')[:60]}")
+    return 0
+
+
+def cmd_symbols(args) -> int:
+    """List a project's exported symbols and the test files importing each"""
+    index = symbols.SymbolIndex(Path(args.root).resolve())
+    if args.rebuild:
+        index.build()
+    else:
+        index.load()
+    if args.quiet:
+        index.save()  # indexed ahead of time, so the first test suggestion need not walk the project
+        return 0
+    
+    exported = untested = 0
+    for rel in sorted(index.sources):
+        covered = index.coverage(rel)
+        names = [name for name in index.sources[rel]["exports"] if not (args.untested and name in covered)]
+        exported += len(index.sources[rel]["exports"])
+        untested += sum(1 for name in index.sources[rel]["exports"] if name not in covered)
+        if names:
+            print(rel)
+            for name in names:
+                print(f"  {name:32} {', '.join(covered.get(name, ['-']))}")
+    index.save()
+    print(f"\n{exported} export(s) in {len(index.sources)} file(s), {untested} without a test, "
+          f"{len(index.tests)} test file(s)", file=sys.stderr)
+    return 0
+
+
+def cmd_findings(args) -> int:
+    """Query the findings store: open findings by default, optionally grouped and counted"""
+    try:
+        since = _committed(args.since) if args.since else None
+    except ValueError:
+        print(f"Unknown revision: {args.since}", file=sys.stderr)
+        return 2
+    
+    found = FindingStore().query(open_only=not args.all, tags=args.tag.split(",") if args.tag else None,
+                                 plugins=args.plugins.split(",") if args.plugins else None, file_part=args.file,
+                                 since=since, limit=args.limit)
+    if args.by:
+        _print_counts(found, args.by, args.json)
+    elif args.json:
+        print(json.dumps([finding.as_dict() for finding in found], indent=2))
+    else:
+        for finding in found:
+            where = f"{finding.file}:{finding.line}" if finding.line else finding.file
+            times = f" (x{finding.count})" if finding.count > 1 else ""
+            print(f"{finding.tag or '-':9} {finding.plugin:16} {where}  {finding.message}{times}")
+    if not args.json:
+        print(f"\n{len(found)} {'recorded' if args.all else 'open'} finding(s)", file=sys.stderr)
+    return 0
+
+
+def _committed(revision: str) -> float:
+    """Commit time of a git revision; ValueError when git can't resolve it"""
+    import subprocess
+    try:
+        return float(subprocess.run(["git", "log", "-1", "--format=%ct", revision], capture_output=True,
+                                    text=True, check=True, timeout=10).stdout)
+    except (OSError, subprocess.SubprocessError) as exc:
+        raise ValueError(revision) from exc
+
+
+def _print_counts(found: list, by: str, as_json: bool) -> None:
+    """Findings counted per value of one field, most first"""
+    counts = {}
+    for finding in found:
+        key = getattr(finding, by)
+        counts[key] = counts.get(key, 0) + finding.count
+    rows = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+    if as_json:
+        print(json.dumps([{by: key, "count": count} for key, count in rows], indent=2))
+        return
+    for key, count in rows:
+        print(f"{count:8}  {key}")
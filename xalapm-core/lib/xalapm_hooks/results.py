@@ -0,0 +1,129 @@
+"""
+Xala PM Hook Runtime - Result Cache
+Findings cached on disk by rule bundle and content hash, shared by every hook process
+"""
+
+import json
+import os
+
+from .lexer import REGIONS
+from .paths import cache_dir
+
+# Total size of cached results before the least recently used are evicted; 0 disables
+RESULT_CACHE_MB = float(os.environ.get("XALAPM_HOOKS_RESULT_CACHE_MB", "32"))
+
+# Entries are spread over this many shard directories, each pruned on write
+SHARDS = 256
+
+# Bumped when the shape of cached issues changes, e.g. when they gained locations
+RESULT_VERSION = 2
+
+
+def content_digest(event) -> str:
+    """Hash of the scanned content, its baseline and where in the file it was cut, computed once per event"""
+    if event.digest is None:
+        from hashlib import blake2b
+        from .incremental import focus
+        content, baseline = focus(event)
+        digest = blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16)
+        if baseline is not None:
+            digest.update(b"\0baseline\0")
+            digest.update(baseline.encode("utf-8", "surrogatepass"))
+            # The same window elsewhere in the file locates its findings on other lines
+            digest.update(repr(event.window.lines).encode())
+        event.digest = digest.hexdigest()
+    return event.digest
+
+
+class ResultCache:
+    """Size-bounded LRU of issue lists, one small JSON file per entry"""
+    
+    def __init__(self, root=None, max_bytes: int = None):
+        self.root = root or cache_dir() / "results"
+        self.max_bytes = int(RESULT_CACHE_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._recent = {}
+    
+    def key(self, bundle: dict, tables: list, event, extra: str = "") -> str:
+        """Hash of (plugin, rule bundle, extension and routed tables, region masking, content, extra state)"""
+        from hashlib import blake2b
+        extension = os.path.splitext(event.file_path)[1].lower()
+        parts = (str(RESULT_VERSION), bundle["source"]["sha256"], str(bundle["version"]), extension,
+                 ",".join(table.name for table in tables), "regions" if REGIONS else "whole", content_digest(event),
+                 extra)
+        digest = blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+        return f"{bundle['plugin']}-{digest}"
+    
+    def path(self, key: str):
+        return self.root / key[-2:] / f"{key}.json"
+    
+    def get(self, key: str, file_path: str) -> list:
+        """Cached issues for a key with the file path filled back in, or None"""
+        if not self.max_bytes:
+            return None
+        issues = self._recent.get(key)
+        if issues is None:
+            path = self.path(key)
+            try:
+                with open(path) as handle:
+                    issues = json.load(handle)
+                os.utime(path)  # mark as recently used
+            except (OSError, ValueError):
+                return None
+            self._remember(key, issues)
+        return [dict(issue, file=file_path) if "file" in issue else dict(issue) for issue in issues]
+    
+    def put(self, key: str, issues: list) -> None:
+        if not self.max_bytes:
+            return
+        # Paths are left out so a rename or copy of the same content still hits
+        stored = [dict(issue, file=None) if "file" in issue else issue for issue in issues]
+        self._remember(key, stored)
+        path = self.path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(stored))
+            os.replace(tmp, path)
+            self.prune(path.parent)
+        except OSError:
+            pass  # read-only cache; findings are simply recomputed next time
+    
+    def prune(self, shard) -> None:
+        """Evict least recently used entries once a shard outgrows its share of the budget"""
+        entries = []
+        total = 0
+        for entry in os.scandir(shard):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # evicted by another hook process
+            size = getattr(stat, "st_blocks", 0) * 512 or stat.st_size  # disk usage, not length
+            entries.append((stat.st_mtime_ns, size, entry.path))
+            total += size
+        budget = self.max_bytes // SHARDS
+        if total <= budget:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= budget:
+                break
+    
+    def clear(self) -> int:
+        """Remove every cached result, returning how many were removed"""
+        removed = 0
+        if not self.root.is_dir():
+            return removed
+        for shard in self.root.iterdir():
+            for entry in shard.iterdir():
+                entry.unlink()
+                removed += 1
+        return removed
+    
+    def _remember(self, key: str, issues: list) -> None:
+        if len(self._recent) > 256:
+            self._recent.clear()
+        self._recent[key] = issues
@@ -0,0 +1,124 @@
+"""
+Xala PM Hook Runtime - Rules
+Rule tables of a plugin's rule bundle and the regex passes their rules run
+"""
+
+import re
+from collections import Counter
+from itertools import islice
+
+from . import jsx, workflow
+from .locate import MAX_LOCATIONS
+from .payload import routes
+
+
+class Rule:
+    """One (pattern, tag, message) entry from a plugin rule table
+    
+    An elements rule holds a JSX condition instead of a pattern, and a workflow
+    rule a path query, its pattern being the regex the query matches values with.
+    """
+    
+    __slots__ = ("id", "pattern", "condition", "query", "flags", "tag", "message", "anchors", "ignore_case", "risk",
+                 "regions", "covered_by", "_regex")
+    
+    def __init__(self, spec: dict, flags: int):
+        self.id = spec["id"]
+        self.pattern = spec["pattern"]
+        self.condition = jsx.Condition(spec["condition"]) if spec.get("condition") else None
+        self.query = workflow.Query(spec["query"]) if spec.get("query") else None
+        self.flags = flags
+        self.tag = spec["tag"]
+        self.message = spec["message"]
+        self.anchors = spec["anchors"]
+        self.ignore_case = spec["ignore_case"]
+        self.risk = spec["risk"]
+        self.regions = tuple(spec["regions"]) if spec["regions"] else None
+        self.covered_by = tuple(spec["covered_by"]) if spec["covered_by"] else None
+        self._regex = None
+    
+    @property
+    def regex(self):
+        """Compiled on first use, so rules this edit never reaches cost nothing; None without a pattern"""
+        if self._regex is None and self.pattern is not None:
+            self._regex = re.compile(self.pattern, self.flags)
+        return self._regex
+
+
+class RuleTable:
+    """A plugin rule table and the files it is routed to"""
+    
+    __slots__ = ("plugin", "name", "extensions", "paths", "exclude", "mode", "limit", "skip_tested", "covers",
+                 "_spec", "_rules")
+    
+    def __init__(self, plugin: str, spec: dict):
+        self.plugin = plugin
+        self.name = spec["name"]
+        self.extensions = tuple(spec["extensions"]) if spec["extensions"] else None
+        self.paths = tuple(spec["paths"])
+        self.exclude = tuple(spec["exclude"])
+        self.mode = spec["mode"]
+        self.limit = spec["limit"]
+        self.skip_tested = spec["skip_tested"]
+        self.covers = any(rule["covered_by"] for rule in spec["rules"])
+        self._spec = spec
+        self._rules = None
+    
+    @property
+    def rules(self) -> list:
+        if self._rules is None:
+            flags = self._spec["flags"]
+            self._rules = [Rule(rule, flags) for rule in self._spec["rules"]]
+        return self._rules
+    
+    def applies(self, file_path: str) -> bool:
+        """Route by path marker or extension"""
+        return routes(file_path, self.extensions, self.paths, self.exclude)
+
+
+def first_starts(regex, content: str) -> list:
+    """Offsets of the first MAX_LOCATIONS matches, stopping there"""
+    return [match.start() for match in islice(regex.finditer(content), MAX_LOCATIONS)]
+
+
+def all_starts(regex, content: str) -> list:
+    return [match.start() for match in regex.finditer(content)]
+
+
+def line_at(content: str, offset: int) -> str:
+    end = content.find("\n", offset)
+    return content[content.rfind("\n", 0, offset) + 1:end if end >= 0 else len(content)]
+
+
+def match_count(regex, content: str) -> int:
+    return sum(1 for _ in regex.finditer(content))
+
+
+def counted_starts(regex, content: str) -> tuple:
+    """Number of matches and the offsets of the first MAX_LOCATIONS"""
+    count = 0
+    starts = []
+    for match in regex.finditer(content):
+        count += 1
+        if count <= MAX_LOCATIONS:
+            starts.append(match.start())
+    return count, starts
+
+
+def captures(regex, content: str) -> list:
+    return [(match.group(1), match.start(1)) for match in regex.finditer(content)]
+
+
+def introduced(found: list, existing: list) -> list:
+    """Captures in found whose names go beyond those already present in existing, in order
+    
+    Any (key, offset) pairs work, such as matches keyed by the text of their line.
+    """
+    remaining = Counter(name for name, _ in existing)
+    added = []
+    for name, offset in found:
+        if remaining[name]:
+            remaining[name] -= 1
+        else:
+            added.append((name, offset))
+    return added
@@ -0,0 +1,151 @@
+"""
+Xala PM Hook Runtime - Rule Statistics
+Per-rule runs, hits, match time and bytes scanned, summed across sessions, and the rule order they suggest
+"""
+
+import os
+import sqlite3
+import time
+
+from .paths import data_dir
+from .store import BUSY_TIMEOUT_MS
+
+# "0" stops hooks from recording rule statistics and from reordering rules by them
+STATS = os.environ.get("XALAPM_HOOKS_STATS", "1") != "0"
+
+# Part of the file name, bumped when the schema changes so fresh counters are started
+STATS_VERSION = 1
+
+# Runs a rule needs before its counters reorder it; until then it keeps its place at the front
+MIN_RUNS = 20
+
+# How long a process reuses the counters it read before reading them again (the daemon lives for hours)
+RELOAD_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rules (rule TEXT PRIMARY KEY, plugin TEXT NOT NULL, runs INTEGER NOT NULL,
+                                  hits INTEGER NOT NULL, seconds REAL NOT NULL, bytes INTEGER NOT NULL)
+                                  WITHOUT ROWID;
+"""
+
+
+class RuleStats:
+    """Counters of every rule that ran: runs, runs that matched, seconds spent and bytes scanned
+    
+    Checks queue their counters, and flush() adds them with one upsert per rule
+    once the hook has answered, so concurrent hooks sum them rather than
+    overwrite each other. Writes are best effort, as for the findings store: a
+    busy or read-only file drops them.
+    """
+    
+    def __init__(self, path=None, enabled: bool = STATS):
+        self.path = path or data_dir() / f"rulestats-v{STATS_VERSION}.db"
+        self.enabled = enabled
+        self._db = None
+        self._pid = None
+        self._loaded = None  # (time.monotonic() of the read, rule id -> (runs, hits, seconds, bytes))
+        self._pending = {}  # rule id -> [plugin, runs, hits, seconds, bytes] added but not yet written
+    
+    def db(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # A connection must not cross a fork; the deferred-check child opens its own
+            self._db = None
+            self._pid = os.getpid()
+        if self._db is None:
+            self._db = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+    
+    def add(self, plugin: str, counters: dict) -> None:
+        """Queue one check's counters, rule id -> [runs, hits, seconds, bytes], summed until flush()"""
+        if not self.enabled:
+            return
+        for rule, counts in counters.items():
+            pending = self._pending.setdefault(rule, [plugin, 0, 0, 0.0, 0])
+            for index, count in enumerate(counts, 1):
+                pending[index] += count
+    
+    def flush(self) -> None:
+        """Add the queued counters with one upsert per rule"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.db().executemany(
+                "INSERT INTO rules (rule, plugin, runs, hits, seconds, bytes) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (rule) DO UPDATE SET runs = runs + excluded.runs, hits = hits + excluded.hits, "
+                "seconds = seconds + excluded.seconds, bytes = bytes + excluded.bytes",
+                [(rule, *counts) for rule, counts in pending.items()])
+        except sqlite3.Error:
+            pass  # statistics are best effort; the hook response is what matters
+    
+    def counters(self) -> dict:
+        """Rule id -> (runs, hits, seconds, bytes), read at most every RELOAD_SECONDS"""
+        if not self.enabled:
+            return {}
+        now = time.monotonic()
+        if self._loaded is None or now - self._loaded[0] > RELOAD_SECONDS:
+            found = {}
+            if os.path.exists(self.path):
+                try:
+                    found = {row[0]: row[1:] for row in
+                             self.db().execute("SELECT rule, runs, hits, seconds, bytes FROM rules")}
+                except sqlite3.Error:
+                    pass
+            self._loaded = (now, found)
+        return self._loaded[1]
+    
+    def cost(self, rule_id: str) -> float:
+        """Expected seconds per byte scanned until the rule matches; 0 for rules with too few runs
+        
+        Hit rates are smoothed, so a rule that never matched still ranks by its
+        time rather than as infinitely expensive.
+        """
+        counts = self.counters().get(rule_id)
+        if counts is None or counts[0] < MIN_RUNS:
+            return 0.0
+        runs, hits, seconds, size = counts
+        return seconds / max(size, 1) / ((hits + 1) / (runs + 2))
+    
+    def order(self, rules: list) -> list:
+        """Rules cheapest per hit first, so a deadline or a first blocking hit cuts the costly ones
+        
+        Returns the list itself when the counters don't change its order.
+        """
+        if not self.counters():
+            return rules
+        ordered = sorted(rules, key=lambda rule: self.cost(rule.id))
+        return rules if ordered == rules else ordered
+    
+    def report(self, plugins: list = None) -> list:
+        """Every counted rule as a dict, costliest per matching run first"""
+        rows = []
+        for rule, (runs, hits, seconds, size) in self.counters().items():
+            plugin = rule.split("/", 1)[0]
+            if plugins and plugin not in plugins:
+                continue
+            rows.append({"rule": rule, "plugin": plugin, "runs": runs, "hits": hits,
+                         "hit_rate": round(hits / runs, 4) if runs else 0.0,
+                         "mean_ms": round(seconds * 1000 / runs, 4) if runs else 0.0,
+                         "bytes": size, "total_ms": round(seconds * 1000, 3),
+                         "ms_per_hit": round(seconds * 1000 / hits, 4) if hits else None})
+        # A rule that never matched costs its whole time for nothing, more than any rule that did
+        return sorted(rows, key=lambda row: (row["hits"] > 0, -(row["ms_per_hit"] or row["total_ms"])))
+    
+    def reset(self) -> int:
+        """Drop every counter, returning how many rules had some"""
+        self._pending = {}
+        try:
+            removed = self.db().execute("DELETE FROM rules").rowcount
+        except sqlite3.Error:
+            return 0
+        self._loaded = None
+        return removed
+    
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,246 @@
+"""
+Xala PM Hook Runtime - Safety
+Flags super-linear rules and keeps one slow rule from hanging a hook
+"""
+
+import os
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from . import tracing
+from .matcher import required_literals, sre_constants, sre_parse
+
+try:
+    from re import _compiler as sre_compile
+except ImportError:  # Python < 3.11
+    import sre_compile
+
+# Wall-clock budget per rule, and the input a risky rule may scan
+RULE_BUDGET_MS = int(os.environ.get("XALAPM_HOOKS_RULE_BUDGET_MS", "250"))
+MAX_RISKY_CHARS = int(os.environ.get("XALAPM_HOOKS_MAX_RISKY_CHARS", "1000000"))
+
+RISK_ORDER = {None: 0, "quadratic": 1, "exponential": 2}
+
+# Characters used to approximate what a single-character element matches
+PROBE = "\t\n\r" + "".join(map(chr, range(0x20, 0x7f))) + " éı中"
+
+_MAXREPEAT = sre_constants.MAXREPEAT
+_REPEATS = tuple(
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+)
+_ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+
+
+class RuleTimeout(Exception):
+    """A rule ran past its time budget"""
+
+
+def lint_pattern(pattern: str, flags: int = 0) -> list:
+    """Static reasons a pattern may backtrack super-linearly, as (risk, reason) pairs"""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error as exc:
+        return [("exponential", f"invalid pattern: {exc}")]
+    
+    findings = []
+    _lint_sequence(parsed.state, list(parsed), findings, nested=False)
+    return list(dict.fromkeys(findings))
+
+
+def risk_of(findings: list) -> str:
+    """Worst risk among lint findings, or None"""
+    return max((risk for risk, _ in findings), key=RISK_ORDER.get, default=None)
+
+
+def _unbounded(op, av) -> bool:
+    return op in _REPEATS and av[1] == _MAXREPEAT
+
+
+def _chars(state, items: list) -> frozenset:
+    """Probe characters a single-character element can match"""
+    sub = sre_parse.SubPattern(state, items)
+    regex = sre_compile.compile(sub, state.flags)
+    return frozenset(ch for ch in PROBE if regex.fullmatch(ch))
+
+
+def _alphabet(state, items: list) -> frozenset:
+    """Probe characters that can appear anywhere in what a sequence matches"""
+    chars = set()
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            continue
+        if op == sre_constants.SUBPATTERN:
+            chars |= _alphabet(state, list(av[-1]))
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                chars |= _alphabet(state, list(branch))
+        elif op in _REPEATS:
+            chars |= _alphabet(state, list(av[2]))
+        else:
+            chars |= _chars(state, [(op, av)])
+    return frozenset(chars)
+
+
+def _ambiguous_branch(state, items: list) -> bool:
+    """Whether a repeated body offers two alternatives that can start with the same character"""
+    while len(items) == 1 and items[0][0] == sre_constants.SUBPATTERN:
+        items = list(items[0][1][-1])
+    for op, av in items:
+        if op == sre_constants.BRANCH:
+            starts = [_alphabet(state, list(branch)[:1]) for branch in av[1]]
+            return any(a & b for i, a in enumerate(starts) for b in starts[i + 1:])
+    return False
+
+
+def _lint_sequence(state, items: list, findings: list, nested: bool, prefix: frozenset = frozenset()) -> None:
+    previous = None  # characters of the last unbounded single-character repeat
+    prefix = set(prefix)
+    for op, av in items:
+        if op in _ZERO_WIDTH:
+            # Lookarounds rescan from the current position, after the same prefix
+            if op != sre_constants.AT:
+                _lint_sequence(state, list(av[1]), findings, nested, frozenset(prefix))
+            continue
+        
+        if _unbounded(op, av):
+            body = list(av[2])
+            previous = _lint_repeat(state, body, findings, nested, prefix, previous)
+            prefix |= _alphabet(state, body)
+            continue
+        
+        if op == sre_constants.SUBPATTERN:
+            _lint_sequence(state, list(av[-1]), findings, nested, frozenset(prefix))
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                _lint_sequence(state, list(branch), findings, nested, frozenset(prefix))
+        elif op in _REPEATS:
+            _lint_sequence(state, list(av[2]), findings, nested, frozenset(prefix))
+        
+        chars = _alphabet(state, [(op, av)])
+        prefix |= chars
+        # A separator the previous repeat also matches keeps the two overlapping
+        optional = op in _REPEATS and av[0] == 0
+        if previous is not None and not optional and not (chars and chars <= previous):
+            previous = None
+
+
+def _lint_repeat(state, body: list, findings: list, nested: bool, prefix: set, previous: frozenset) -> frozenset:
+    """Lint an unbounded repeat after a prefix; the characters it repeats, or None"""
+    if nested:
+        findings.append(("exponential", "nested unbounded quantifiers"))
+    if _ambiguous_branch(state, body):
+        findings.append(("exponential", "overlapping alternatives under an unbounded quantifier"))
+    _lint_sequence(state, body, findings, True, frozenset(prefix))
+    
+    chars = _chars(state, body)
+    if chars and previous and previous & chars:
+        findings.append(("quadratic", "adjacent unbounded quantifiers overlap"))
+    if chars and prefix and prefix <= chars:
+        findings.append(("quadratic", "unbounded span can run over repeated occurrences of its prefix"))
+    return chars or None
+
+
+def measure_growth(pattern: str, flags: int = 0, size: int = 2000, limit: float = 2.0) -> float:
+    """Worst time growth when pumped input quadruples (about 4 for linear rules)"""
+    regex = re.compile(pattern, flags)
+    anchors = sorted(required_literals(pattern, flags) or [""])
+    units = set("a =x\"'<(\n0") | {anchor for anchor in anchors if anchor}
+    units |= {anchor + ch for anchor in anchors for ch in "a =x(" if anchor}
+    
+    worst = 0.0
+    for unit in sorted(units):
+        timings = []
+        for repeat in (size, size * 4):
+            text = (anchors[0] if unit not in anchors else "") + unit * (repeat // len(unit)) + "\x00"
+            start = time.perf_counter()
+            try:
+                with time_budget(limit):
+                    list(regex.finditer(text))
+            except RuleTimeout:
+                return float("inf")
+            timings.append(time.perf_counter() - start)
+        if timings[1] > 0.005:
+            worst = max(worst, timings[1] / max(timings[0], 1e-6))
+    return worst
+
+
+@contextmanager
+def time_budget(seconds: float):
+    """Interrupt the enclosed regex work after `seconds` (main thread only, else unbounded)"""
+    if seconds <= 0 or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def expire(signum, frame):
+        raise RuleTimeout()
+    
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class ScanGuard:
+    """Applies the per-rule time budget, the hook deadline and the input cap, recording skipped rules
+    
+    Every rule run is counted for the rule statistics: counters maps a rule id
+    to [runs, runs that matched, seconds, bytes scanned].
+    """
+    
+    def __init__(self, budget_ms: int = RULE_BUDGET_MS, max_risky_chars: int = MAX_RISKY_CHARS, deadline: float = None):
+        self.budget = budget_ms / 1000
+        self.max_risky_chars = max_risky_chars
+        self.deadline = deadline
+        self.skipped = []
+        self.counters = {}
+    
+    def run(self, rule, func, content: str):
+        """Call func(regex, text) for one rule, or return None if it blew its budget or the deadline passed"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.skipped.append(rule.id)
+            return None
+        if rule.risk and len(content) > self.max_risky_chars:
+            content = content[:self.max_risky_chars]
+        result = None
+        started = time.perf_counter()
+        try:
+            with time_budget(self.budget):
+                result = func(rule.regex, content)
+                return result
+        except RuleTimeout:
+            self.skipped.append(rule.id)
+            return None
+        finally:
+            # A (count, offsets) result matched when its count is non-zero
+            self.count(rule.id, time.perf_counter() - started, len(content),
+                       bool(result[0] if isinstance(result, tuple) else result))
+    
+    def count(self, rule_id: str, seconds: float, size: int, hit: bool) -> None:
+        """Count one run of a rule, for rules timed outside run()"""
+        counts = self.counters.get(rule_id)
+        if counts is None:
+            counts = self.counters[rule_id] = [0, 0, 0.0, 0]
+        counts[0] += 1
+        counts[1] += hit
+        counts[2] += seconds
+        counts[3] += size
+        tracing.record_rule(rule_id, seconds)
+
+
+def annotate_skipped(output: dict, skipped: list) -> dict:
+    """Tell the agent which rules were skipped instead of silently dropping them"""
+    note = f"⏱️ Skipped {len(skipped)} rule(s) over the scan budget: {', '.join(skipped)}"
+    output = dict(output or {})
+    specific = dict(output.get("hookSpecificOutput") or {"hookEventName": "PostToolUse"})
+    context = specific.get("additionalContext")
+    specific["additionalContext"] = f"{context}\n{note}" if context else note
+    output["hookSpecificOutput"] = specific
+    return output
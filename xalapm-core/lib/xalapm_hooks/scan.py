@@ -0,0 +1,162 @@
+"""
+Xala PM Hook Runtime - Repository Scan
+Runs every installed checker over a directory tree and streams findings as JSONL
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+from .engine import Registry
+from .payload import HookEvent
+from .results import ResultCache
+from .rulestats import RuleStats
+from .store import FindingStore
+from .stream import STREAM_BYTES, StreamScan
+
+# Directories never worth scanning: VCS metadata, dependencies and build output
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "bower_components", ".venv", "venv", "__pycache__",
+             "dist", "build", "out", "target", "coverage", ".next", ".nuxt", ".turbo", ".cache"}
+
+# Files larger than this are left out of a scan; larger than STREAM_BYTES are streamed
+MAX_FILE_BYTES = 2 * 1024 * 1024 * 1024
+
+# Files handed to a worker at a time; small enough to keep every core busy to the end
+BATCH_SIZE = 32
+
+# Per-process state of a scan worker
+_registry = None
+_names = None
+
+
+def walk(paths: list, skip_dirs: set = SKIP_DIRS):
+    """Yield every file under the given paths, pruning skipped directories"""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(name for name in dirs if name not in skip_dirs)
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+
+def routed(checkers: list, paths) -> iter:
+    """Files that at least one checker has a rule table for"""
+    for path in paths:
+        if any(checker.tables_for(path) for checker in checkers):
+            yield path
+
+
+def batches(items, size: int = BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def flatten(path: str, found) -> list:
+    """Flat records of (checker, issues) findings on one file, the shape scan and gate both emit"""
+    records = []
+    for checker, issues in found:
+        for issue in issues:
+            record = {"file": path, "plugin": checker.name, "tag": issue.get(checker.issue_key)}
+            record.update((key, value) for key, value in issue.items() if key not in (checker.issue_key, "file"))
+            records.append(record)
+    return records
+
+
+def scan_file(registry: Registry, checkers: list, path: str, max_bytes: int = MAX_FILE_BYTES) -> list:
+    """Findings for one file as flat records, or None when the file was skipped
+    
+    A streamed file also gets a record per plugin listing the rules it could not
+    run: "streamed" for those needing the decoded source, "budget" for those
+    over the time budget.
+    """
+    streams = []
+    try:
+        size = os.path.getsize(path)
+        if size > max_bytes:
+            return None
+        if size > STREAM_BYTES:
+            streams = [StreamScan(checker, path) for checker in checkers]
+            found = [(streamed.checker, streamed.issues()) for streamed in streams]
+        else:
+            with open(path, encoding="utf-8") as handle:
+                content = handle.read()
+            event = HookEvent({"tool_name": "Write", "tool_input": {"file_path": path, "content": content}})
+            found = registry.findings(event, checkers)
+    except (OSError, ValueError):
+        return None  # unreadable, not UTF-8, or changed while mapped
+    
+    records = flatten(path, found)
+    for streamed in streams:
+        for reason, rules in (("streamed", streamed.unstreamed), ("budget", streamed.guard.skipped)):
+            if rules:
+                records.append({"file": path, "plugin": streamed.checker.name, "skipped": rules, "reason": reason})
+    return records
+
+
+def _init_worker(names: list) -> None:
+    global _registry, _names
+    # A repo scan would churn the LRU the editor hooks rely on, so it skips the result cache, and its
+    # many worker processes would fight over the rule statistics; findings they only queue, for the
+    # parent to write
+    _registry = Registry(results=ResultCache(max_bytes=0), store=FindingStore(), stats=RuleStats(enabled=False))
+    _names = names
+
+
+def _scan_batch(paths: list, max_bytes: int) -> tuple:
+    checkers = _registry.installed(_names)
+    records = []
+    skipped = 0
+    for path in paths:
+        found = scan_file(_registry, checkers, path, max_bytes)
+        if found is None:
+            skipped += 1
+        else:
+            records.extend(found)
+    return len(paths), skipped, records, _registry.store.take()
+
+
+def scan(paths: list, names: list = None, jobs: int = None, max_bytes: int = MAX_FILE_BYTES):
+    """Yield (files done, files skipped, records) per batch as workers finish them
+    
+    Batches are submitted lazily with at most two per worker in flight, so memory
+    stays flat however large the tree is. The scans each batch queued for the
+    findings store are written here, so only this process writes to it.
+    """
+    store = FindingStore()
+    for done, skipped, records, scans in _batches(paths, names, jobs, max_bytes):
+        store.queue(scans)
+        store.flush()
+        yield done, skipped, records
+    store.close()
+
+
+def _batches(paths: list, names: list, jobs: int, max_bytes: int):
+    registry = Registry(results=ResultCache(max_bytes=0), store=FindingStore(enabled=False),
+                        stats=RuleStats(enabled=False))
+    checkers = registry.installed(names)
+    files = routed(checkers, walk(paths))
+    jobs = jobs or os.cpu_count() or 1
+    
+    if jobs == 1:
+        _init_worker(names)
+        for batch in batches(files):
+            yield _scan_batch(batch, max_bytes)
+        return
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(names,)) as pool:
+        pending = set()
+        for batch in batches(files):
+            pending.add(pool.submit(_scan_batch, batch, max_bytes))
+            if len(pending) >= jobs * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
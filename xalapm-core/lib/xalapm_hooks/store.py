@@ -0,0 +1,278 @@
+"""
+Xala PM Hook Runtime - Findings Store
+Append-only SQLite log of every check's findings, with rules, files and labels interned as integers
+"""
+
+import os
+import sqlite3
+import time
+from hashlib import blake2b
+
+from .paths import data_dir
+from .projectindex import project_root
+
+# "0" stops hooks from recording their findings
+STORE = os.environ.get("XALAPM_HOOKS_STORE", "1") != "0"
+
+# Part of the store's file name, bumped when the schema changes so a fresh store is started
+STORE_VERSION = 2
+
+# How long a writer waits for another process holding the store, before the findings are dropped
+BUSY_TIMEOUT_MS = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rules (id INTEGER PRIMARY KEY, rule TEXT NOT NULL, plugin TEXT, tag TEXT,
+                                  message TEXT, UNIQUE (rule, tag));
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS labels (id INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS scans (id INTEGER PRIMARY KEY, time INTEGER NOT NULL, file INTEGER NOT NULL,
+                                  plugin INTEGER NOT NULL, partial INTEGER NOT NULL, session INTEGER,
+                                  revision INTEGER);
+CREATE TABLE IF NOT EXISTS findings (scan INTEGER NOT NULL, rule INTEGER NOT NULL, count INTEGER NOT NULL,
+                                     line INTEGER);
+CREATE TABLE IF NOT EXISTS latest (file INTEGER NOT NULL, plugin INTEGER NOT NULL, scan INTEGER NOT NULL,
+                                   digest TEXT NOT NULL, PRIMARY KEY (file, plugin)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen (file INTEGER NOT NULL, rule INTEGER NOT NULL, time INTEGER NOT NULL,
+                                 PRIMARY KEY (file, rule)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS findings_scan ON findings (scan);
+CREATE INDEX IF NOT EXISTS findings_rule ON findings (rule);
+CREATE INDEX IF NOT EXISTS scans_pair ON scans (file, plugin, id);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (time);
+"""
+
+_SELECT = ("SELECT scans.time, plugin.label, files.path, rules.rule, rules.tag, rules.message, findings.count, "
+           "findings.line, session.label, revision.label FROM {source} "
+           "JOIN findings ON findings.scan = scans.id JOIN rules ON rules.id = findings.rule "
+           "JOIN files ON files.id = scans.file JOIN labels AS plugin ON plugin.id = scans.plugin "
+           "LEFT JOIN labels AS session ON session.id = scans.session "
+           "LEFT JOIN labels AS revision ON revision.id = scans.revision")
+
+
+class Finding:
+    """One finding of one scan, with its interned ids resolved"""
+    
+    __slots__ = ("time", "plugin", "file", "rule", "tag", "message", "count", "line", "session", "revision")
+    
+    def __init__(self, time, plugin, file, rule, tag, message, count, line, session, revision):
+        self.time = time
+        self.plugin = plugin
+        self.file = file
+        self.rule = rule
+        self.tag = tag
+        self.message = message
+        self.count = count
+        self.line = line
+        self.session = session
+        self.revision = revision
+    
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class FindingStore:
+    """Every scan of a (file, plugin) pair and the findings it reported
+    
+    Scans and findings are only ever appended. "latest" points at the last full
+    scan of each pair; its findings and those of the partial scans after it are
+    the open ones. A partial scan covers an Edit window and holds only what the
+    edit introduced, so it adds to the open findings without closing any. A full
+    scan finding the same as the last one is not recorded again. Scans are queued
+    by record() and written by flush() once the hook has answered, so SQLite stays
+    off the critical path. Writes are best effort: a busy or read-only store drops
+    them.
+    """
+    
+    def __init__(self, path=None, enabled: bool = STORE):
+        self.path = path or data_dir() / f"findings-v{STORE_VERSION}.db"
+        self.enabled = enabled
+        self._db = None
+        self._pid = None
+        self._ids = {}  # (table, value) -> id, for the rows this process has interned
+        self._pending = []  # scans recorded but not yet appended
+    
+    def db(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # A connection must not cross a fork; the deferred-check child opens its own
+            self._db = None
+            self._pid = os.getpid()
+        if self._db is None:
+            self._db = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+    
+    def record(self, plugin: str, file_path: str, issues: list, issue_key: str, session: str = None,
+               partial: bool = False) -> None:
+        """Queue one scan of a file by a plugin, appended by flush() once the hook has answered"""
+        if not self.enabled:
+            return
+        rows = sorted(((issue.get("rule") or f"{plugin}/?", issue.get(issue_key), issue.get("message"),
+                        _count(issue), _line(issue)) for issue in issues), key=repr)
+        self._pending.append((int(time.time() * 1000), plugin, os.path.abspath(file_path), rows, session, partial))
+    
+    def take(self) -> list:
+        """Scans queued and not yet flushed, handed over so another process's store can write them"""
+        pending, self._pending = self._pending, []
+        return pending
+    
+    def queue(self, scans: list) -> None:
+        """Queue scans another process's store recorded, for flush() to append"""
+        if self.enabled:
+            self._pending.extend(scans)
+    
+    def flush(self) -> None:
+        """Append every queued scan, unless it adds nothing to the open findings"""
+        pending, self._pending = self._pending, []
+        for scan in pending:
+            try:
+                self._append(*scan)
+            except sqlite3.Error:
+                pass  # the findings log is best effort; the hook response is what matters
+    
+    def _append(self, when: int, plugin: str, path: str, rows: list, session: str, partial: bool) -> None:
+        db = self.db()
+        digest = blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+        file_id = self._intern("files", "path", path)
+        plugin_id = self._intern("labels", "label", plugin)
+        latest = db.execute("SELECT digest FROM latest WHERE file = ? AND plugin = ?", (file_id, plugin_id)).fetchone()
+        if not rows and (partial or latest is None) or not partial and latest and latest[0] == digest:
+            return
+        
+        revision = head_revision(path)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            scan = db.execute(
+                "INSERT INTO scans (time, file, plugin, partial, session, revision) VALUES (?, ?, ?, ?, ?, ?)",
+                (when, file_id, plugin_id, int(partial), self._intern("labels", "label", session) if session else None,
+                 self._intern("labels", "label", revision) if revision else None)).lastrowid
+            self._add_findings(db, scan, when, file_id, plugin, rows)
+            if not partial or latest is None:
+                db.execute("INSERT OR REPLACE INTO latest (file, plugin, scan, digest) VALUES (?, ?, ?, ?)",
+                           (file_id, plugin_id, scan, "" if partial else digest))
+            else:
+                # The next full scan must be recorded to close what this one opened
+                db.execute("UPDATE latest SET digest = '' WHERE file = ? AND plugin = ?", (file_id, plugin_id))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            self._ids.clear()  # ids interned inside the rolled back transaction are gone
+            raise
+    
+    def _add_findings(self, db, scan: int, when: int, file_id: int, plugin: str, rows: list) -> None:
+        """Append one scan's findings, noting when each rule was first reported on the file for since filters"""
+        rule_ids = [self._rule(rule, plugin, tag, message) for rule, tag, message, _, _ in rows]
+        db.executemany("INSERT INTO findings (scan, rule, count, line) VALUES (?, ?, ?, ?)",
+                       [(scan, rule_id, row[3], row[4]) for rule_id, row in zip(rule_ids, rows)])
+        db.executemany("INSERT INTO seen (file, rule, time) VALUES (?, ?, ?) "
+                       "ON CONFLICT (file, rule) DO UPDATE SET time = min(time, excluded.time)",
+                       [(file_id, rule_id, when) for rule_id in set(rule_ids)])
+    
+    def _intern(self, table: str, column: str, value: str) -> int:
+        key = (table, value)
+        found = self._ids.get(key)
+        if found is None:
+            db = self.db()
+            db.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", (value,))
+            found = db.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+            self._ids[key] = found
+        return found
+    
+    def _rule(self, rule: str, plugin: str, tag: str, message: str) -> int:
+        """Id of a rule and tag; a collect table's groups share the rule, whatever names their message lists"""
+        key = ("rules", rule, tag)
+        found = self._ids.get(key)
+        if found is None:
+            db = self.db()
+            db.execute("INSERT OR IGNORE INTO rules (rule, plugin, tag, message) VALUES (?, ?, ?, ?)",
+                       (rule, plugin, tag, message))
+            found = db.execute("SELECT id FROM rules WHERE rule = ? AND tag IS ?", (rule, tag)).fetchone()[0]
+            self._ids[key] = found
+        return found
+    
+    def query(self, open_only: bool = True, tags: list = None, plugins: list = None, file_part: str = None,
+              since: float = None, limit: int = None) -> list:
+        """Findings, newest first: by default only the open ones, once per file and rule
+        
+        since (epoch seconds) keeps findings whose rule was first reported on the
+        file after that time.
+        """
+        if not os.path.exists(self.path):
+            return []
+        source = ("latest JOIN scans ON scans.file = latest.file AND scans.plugin = latest.plugin "
+                  "AND scans.id >= latest.scan") if open_only else "scans"
+        where, params = _filters(tags, plugins, file_part, since)
+        sql = (_SELECT.format(source=source) + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY scans.id DESC")
+        found = []
+        seen = set()
+        for row in self.db().execute(sql, params):
+            if open_only:
+                # A partial scan may report again what the full scan before it found
+                key = (row[2], row[3], row[4])
+                if key in seen:
+                    continue
+                seen.add(key)
+            found.append(Finding(*row))
+            if limit and len(found) >= limit:
+                break
+        return found
+    
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _filters(tags: list, plugins: list, file_part: str, since: float) -> tuple:
+    """(conditions, parameters) of a findings query"""
+    where = []
+    params = []
+    # The file filter resolves to interned ids first, so the scans (file, plugin, id) index applies
+    if tags:
+        where.append(f"rules.tag IN ({', '.join('?' * len(tags))})")
+        params.extend(tags)
+    if plugins:
+        where.append(f"scans.plugin IN (SELECT id FROM labels WHERE label IN ({', '.join('?' * len(plugins))}))")
+        params.extend(plugins)
+    if file_part:
+        where.append("scans.file IN (SELECT id FROM files WHERE instr(path, ?) > 0)")
+        params.append(file_part)
+    if since is not None:
+        where.append("(SELECT time FROM seen WHERE seen.file = scans.file AND seen.rule = findings.rule) > ?")
+        params.append(int(since * 1000))
+    return where, params
+
+
+def _count(issue: dict) -> int:
+    return issue.get("count") or max(len(issue.get("locations") or ()), 1)
+
+
+def _line(issue: dict) -> int:
+    locations = issue.get("locations")
+    return locations[0].get("line") if locations else None
+
+
+def head_revision(file_path: str) -> str:
+    """Commit checked out in the git repository holding a file, read straight from .git, or None"""
+    root = project_root(file_path)
+    git = root / ".git" if root else None
+    try:
+        with open(git / "HEAD") as handle:
+            head = handle.read().strip()
+        if not head.startswith("ref: "):
+            return head or None
+        ref = head[len("ref: "):]
+        try:
+            with open(git / ref) as handle:
+                return handle.read().strip() or None
+        except OSError:
+            with open(git / "packed-refs") as handle:
+                for line in handle:
+                    sha, _, name = line.strip().partition(" ")
+                    if name == ref:
+                        return sha
+    except (OSError, TypeError):
+        pass  # not a git checkout, or a worktree whose .git is a file
+    return None
@@ -0,0 +1,265 @@
+"""
+Xala PM Hook Runtime - Streaming Scan
+Scans very large files as bytes through mmap, a window at a time, without copying them
+"""
+
+import codecs
+import mmap
+import re
+import time
+
+from . import symbols, tracing
+from .lexer import language_of
+from .locate import MAX_LOCATIONS, SNIPPET_CHARS, snippet
+from .modes import collected
+from .safety import RuleTimeout, ScanGuard, time_budget
+
+# Repo scans stream files larger than this instead of decoding them whole
+STREAM_BYTES = 4 * 1024 * 1024
+
+# Each rule advances through at most this many bytes of match starts per time slice
+WINDOW_BYTES = 1024 * 1024
+
+# UTF-8 continuation bytes, which add no character of their own
+_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+class ByteRule:
+    """A rule compiled as a bytes regex, with finders for its literal anchors"""
+    
+    __slots__ = ("rule", "id", "exact", "folded", "_regex")
+    
+    def __init__(self, rule):
+        self.rule = rule
+        self.id = rule.id
+        anchors = [anchor.encode() for anchor in rule.anchors]
+        self.exact = () if rule.ignore_case else anchors
+        self.folded = [anchor.lower() for anchor in anchors] if rule.ignore_case else ()
+        self._regex = None
+    
+    @property
+    def regex(self):
+        if self._regex is None:
+            self._regex = re.compile(self.rule.pattern.encode(), self.rule.flags & ~re.UNICODE)
+        return self._regex
+    
+    def may_match(self, data, folded: set) -> bool:
+        """Whether any anchor occurs in the mapped file, given the case-insensitive anchors found"""
+        if self.exact:
+            return any(data.find(anchor) != -1 for anchor in self.exact)
+        if self.folded:
+            return any(anchor in folded for anchor in self.folded)
+        return True
+
+
+_byte_rules = {}
+
+
+def byte_rule(rule) -> ByteRule:
+    """The bytes form of a rule, built once per rule"""
+    compiled = _byte_rules.get(rule)
+    if compiled is None:
+        if len(_byte_rules) > 4096:
+            _byte_rules.clear()
+        compiled = _byte_rules[rule] = ByteRule(rule)
+    return compiled
+
+
+def folded_anchors(data, anchors: set, size: int = WINDOW_BYTES) -> set:
+    """Anchors present in the mapping ignoring ASCII case, lowercasing one window at a time"""
+    found = set()
+    overlap = max(map(len, anchors), default=1) - 1
+    start = 0
+    while start < len(data) and len(found) < len(anchors):
+        chunk = data[start:start + size + overlap].lower()
+        found.update(anchor for anchor in anchors - found if anchor in chunk)
+        start += size
+    return found
+
+
+def char_offset(data, chars: int, size: int = WINDOW_BYTES) -> int:
+    """Byte offset at which the first chars characters of the mapping end, counted a window at a time
+    
+    A character split across windows is counted in the window holding its lead byte.
+    """
+    offset = 0
+    while offset < len(data):
+        chunk = data[offset:offset + size]
+        count = len(chunk.translate(None, _CONTINUATION))
+        if count >= chars:
+            start = len(chunk) - len(chunk.lstrip(_CONTINUATION))
+            head = chunk[start:].decode("utf-8", "surrogateescape")[:chars]
+            end = offset + start + len(head.encode("utf-8", "surrogateescape"))
+            while end < len(data) and data[end] in _CONTINUATION:
+                end += 1
+            return end
+        chars -= count
+        offset += size
+    return len(data)
+
+
+class MappedLineIndex:
+    """Locates byte offsets of a mapped file through per-window newline counts
+    
+    Only the windows up to the furthest offset located are counted, and the
+    counts are kept, so locating never decodes more than one line of the file.
+    """
+    
+    def __init__(self, data, size: int = WINDOW_BYTES):
+        self.data = data
+        self.size = size
+        self.lines_before = [0]  # newlines before the start of each counted window
+    
+    def line(self, offset: int) -> int:
+        window = offset // self.size
+        while len(self.lines_before) <= window:
+            start = (len(self.lines_before) - 1) * self.size
+            self.lines_before.append(self.lines_before[-1] + self.data[start:start + self.size].count(b"\n"))
+        return self.lines_before[window] + self.data[window * self.size:offset].count(b"\n") + 1
+    
+    def locate(self, offset: int) -> dict:
+        data = self.data
+        start = data.rfind(b"\n", 0, offset) + 1
+        end = data.find(b"\n", offset)
+        end = len(data) if end == -1 else end
+        column = self._chars(start, offset)
+        # Decode only what the snippet can show of a long line
+        begin = max(start, offset - SNIPPET_CHARS * 4)
+        stop = min(end, offset + SNIPPET_CHARS * 4)
+        shown = snippet(data[begin:stop].decode("utf-8", "replace"), self._chars(begin, offset) - 1)
+        if begin > start and not shown.startswith("…"):
+            shown = "…" + shown
+        if stop < end and not shown.endswith("…"):
+            shown += "…"
+        return {"line": self.line(offset), "column": column, "snippet": shown}
+    
+    def locations(self, offsets: list) -> list:
+        return [self.locate(offset) for offset in offsets[:MAX_LOCATIONS]]
+    
+    def _chars(self, start: int, offset: int) -> int:
+        """1-based character column of offset in a line starting at start"""
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        chars = 0
+        for chunk in range(start, offset, self.size):
+            chars += len(decoder.decode(self.data[chunk:min(chunk + self.size, offset)]))
+        return chars + len(decoder.decode(b"", final=True)) + 1
+
+
+def windows(total: int, size: int = WINDOW_BYTES):
+    """Yield the end offset of each window over a file of total bytes"""
+    end = 0
+    while end < total:
+        end = min(end + size, total)
+        yield end
+
+
+class StreamScan:
+    """Runs one checker's routed tables over a memory-mapped file
+    
+    Each rule keeps one lazy finditer over the whole mapping, so matches may run
+    across window boundaries exactly as they would over the decoded file. A window
+    only bounds how far each rule advances per time slice: every rule gets the
+    per-rule budget for the matches starting in it, and rules interleave window by
+    window. Matches are counted as they are produced and never collected in a list.
+    Risky rules stop at the guard's input cap, as over decoded text.
+    
+    Rules needing the decoded source are not run and are listed in unstreamed:
+    those declaring regions of a lexed language, and those with covered_by,
+    which consult the contract graph. Rules over the budget end up in the guard's
+    skipped list.
+    """
+    
+    def __init__(self, checker, file_path: str, guard: ScanGuard = None):
+        self.checker = checker
+        self.file_path = file_path
+        self.guard = guard or ScanGuard()
+        self.unstreamed = []
+        self.tables = []
+        lexed = language_of(file_path) is not None
+        # Element and workflow rules parse source text; files this large are built bundles, not JSX or CI config
+        for table in checker.tables_for(file_path):
+            if table.mode in ("elements", "workflow"):
+                continue
+            rules = []
+            for rule in table.rules:
+                if rule.covered_by or lexed and rule.regions:
+                    self.unstreamed.append(rule.id)
+                else:
+                    rules.append(byte_rule(rule))
+            self.tables.append((table, rules))
+    
+    def issues(self) -> list:
+        """Issues shaped like Checker.scan, without decoding or copying the file"""
+        hits = {}
+        starts = {}
+        captures = {}
+        with open(self.file_path, "rb") as handle:
+            if not handle.seek(0, 2):
+                return []
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                folded = folded_anchors(data, {anchor for _, rules in self.tables
+                                               for rule in rules for anchor in rule.folded})
+                capped = len(data) > self.guard.max_risky_chars
+                risky_end = char_offset(data, self.guard.max_risky_chars) if capped else len(data)
+                active = [(table, rule, rule.regex.finditer(data, 0, risky_end if rule.rule.risk else len(data)))
+                          for table, rules in self.tables for rule in rules if rule.may_match(data, folded)]
+                pending = {}
+                for end in windows(len(data)):
+                    if not active:
+                        break
+                    active = [entry for entry in active
+                              if self._advance(entry, end, pending, hits, starts, captures)]
+                return self._shape(hits, starts, captures, MappedLineIndex(data))
+    
+    def _advance(self, entry: tuple, end: int, pending: dict, hits: dict, starts: dict, captures: dict) -> bool:
+        """Consume one rule's matches that start before end; False once the rule is finished"""
+        table, rule, matches = entry
+        started = time.perf_counter() if tracing.rule_timings is not None else None
+        try:
+            with time_budget(self.guard.budget):
+                while True:
+                    match = pending.pop(rule, None) or next(matches, None)
+                    if match is None:
+                        return False
+                    if match.start() >= end:
+                        pending[rule] = match
+                        return True
+                    if table.mode == "collect":
+                        captured = captures.setdefault(rule, [])
+                        captured.append((match.group(1).decode("utf-8", "replace"), match.start(1)))
+                        if table.limit and len(captured) >= table.limit:
+                            return False
+                    else:
+                        hits[rule] = hits.get(rule, 0) + 1
+                        if hits[rule] <= MAX_LOCATIONS:
+                            starts.setdefault(rule, []).append(match.start())
+                        if table.mode == "search" and hits[rule] >= MAX_LOCATIONS:
+                            return False
+        except RuleTimeout:
+            self.guard.skipped.append(rule.id)
+            return False
+        finally:
+            if started is not None:
+                tracing.record_rule(rule.id, time.perf_counter() - started)
+    
+    def _shape(self, hits: dict, starts: dict, captures: dict, index: MappedLineIndex) -> list:
+        checker = self.checker
+        issues = []
+        for table, rules in self.tables:
+            if table.mode == "collect":
+                tested = symbols.tested(self.file_path)[0] if table.skip_tested else ()
+                grouped = {}
+                for rule in rules:
+                    grouped.setdefault((rule.rule.tag, rule.rule.message), []).extend(
+                        pair for pair in captures.get(rule, []) if pair[0] not in tested)
+                issues.extend(collected(checker, table, grouped, index.locations))
+                continue
+            for rule in rules:
+                if rule not in hits:
+                    continue
+                locations = index.locations(starts[rule])
+                if table.mode == "count":
+                    issues.append(checker.issue(rule.rule, self.file_path, count=hits[rule], locations=locations))
+                else:
+                    issues.append(checker.issue(rule.rule, self.file_path, locations=locations))
+        return issues
@@ -0,0 +1,238 @@
+"""
+Xala PM Hook Runtime - Symbol Index
+Exported JS/TS symbols per source file and what each test file imports, kept on disk per project
+"""
+
+import os
+import re
+from hashlib import blake2b
+from pathlib import Path
+
+from .projectindex import ProjectIndex, loaded
+
+# "0" stops test suggestions from being checked against existing tests
+SYMBOLS = os.environ.get("XALAPM_HOOKS_SYMBOLS", "1") != "0"
+
+# Files the index covers, and the name markers and directories that make a file a test
+SOURCE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs")
+TEST_MARKERS = (".test.", ".spec.")
+TEST_DIRS = ("__tests__",)
+
+_EXPORT = re.compile(r"\bexport\s+(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?"
+                     r"(?:function\s*\*?|const|let|var|class|enum|interface|type)\s*([A-Za-z_$][\w$]*)")
+_EXPORT_LIST = re.compile(r"\bexport\s+(?:type\s+)?\{([^}]*)\}")
+_IMPORT = re.compile(r"\bimport\s+(?:type\s+)?(?:([A-Za-z_$][\w$]*)\s*,?\s*)?"
+                     r"(?:\*\s*as\s+([A-Za-z_$][\w$]*)|\{([^}]*)\})?\s*from\s*[\"']([^\"']+)[\"']")
+_REQUIRE = re.compile(r"\b(?:const|let|var)\s+(?:\{([^}]*)\}|([A-Za-z_$][\w$]*))\s*=\s*"
+                      r"require\(\s*[\"']([^\"']+)[\"']\s*\)")
+
+_indexes = {}
+
+
+class SymbolIndex(ProjectIndex):
+    """Exports of every source file of a project and the symbols every test file imports
+    
+    Source entries carry "exports"; test entries carry "imports", as
+    [name, module key] pairs.
+    """
+    
+    NAME = "symbols"
+    VERSION = 2
+    
+    def __init__(self, root: Path, path: Path = None):
+        super().__init__(root, path)
+        self._importers = None
+        self._probed = {}  # directory -> mtime_ns when its tests were last picked up
+    
+    @property
+    def sources(self) -> dict:
+        return {rel: entry for rel, entry in self.files.items() if "exports" in entry}
+    
+    @property
+    def tests(self) -> dict:
+        return {rel: entry for rel, entry in self.files.items() if "imports" in entry}
+    
+    def build(self) -> None:
+        """Index every source and test file under the root"""
+        from .scan import walk
+        super().build()
+        for path in walk([str(self.root)]):
+            if path.endswith(SOURCE_EXTENSIONS):
+                self.refresh(os.path.relpath(path, self.root))
+    
+    def parse(self, rel: str, text: str) -> dict:
+        return {"imports": imports_of(text, rel)} if is_test(rel) else {"exports": exports_of(text)}
+    
+    def changed(self, rel: str = None) -> None:
+        super().changed(rel)
+        if rel is None or is_test(rel):
+            self._importers = None
+    
+    def importers(self, rel: str) -> list:
+        """Test files importing from a source file, refreshed, nearby tests picked up first"""
+        self._probe(os.path.dirname(rel))
+        found = sorted({test for key in _keys(rel) for test in self._index().get(key, ())})
+        for test in found:
+            self.refresh(test)
+        return [test for test in found if test in self.files]
+    
+    def coverage(self, rel: str) -> dict:
+        """Name -> test files importing it from a source file"""
+        keys = _keys(rel)
+        covered = {}
+        for test in self.importers(rel):
+            for name, target in self.files[test]["imports"]:
+                if target in keys:
+                    covered.setdefault(name, []).append(test)
+        return covered
+    
+    def tested(self, rel: str) -> tuple:
+        """(names some test imports from a source file, digest of those tests' contents)"""
+        covered = self.coverage(rel)
+        digest = blake2b(digest_size=8)
+        for test in sorted({test for tests in covered.values() for test in tests}):
+            digest.update(f"{test}\0{self.files[test]['hash']}\0".encode())
+        return set(covered), digest.hexdigest()
+    
+    def _probe(self, directory: str) -> None:
+        """Index new or changed tests next to a source file, or in its __tests__ directory
+        
+        A directory is listed again only once its mtime moved; tests already
+        indexed there are refreshed through importers().
+        """
+        for folder in (directory, *(os.path.join(directory, name) for name in TEST_DIRS)):
+            try:
+                stamp = os.stat(self.root / folder).st_mtime_ns
+                if self._probed.get(folder) == stamp:
+                    continue
+                entries = list(os.scandir(self.root / folder))
+            except OSError:
+                continue
+            self._probed[folder] = stamp
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(SOURCE_EXTENSIONS):
+                    rel = os.path.normpath(os.path.join(folder, entry.name))
+                    if is_test(rel):
+                        self.refresh(rel)
+    
+    def _index(self) -> dict:
+        """Module key -> test files importing from it, rebuilt after a test entry changes"""
+        if self._importers is None:
+            self._importers = {}
+            for test, entry in self.tests.items():
+                for _, target in entry["imports"]:
+                    self._importers.setdefault(target, set()).add(test)
+        return self._importers
+
+
+def is_test(rel: str) -> bool:
+    parts = rel.replace(os.sep, "/").split("/")
+    return any(marker in parts[-1] for marker in TEST_MARKERS) or any(part in TEST_DIRS for part in parts[:-1])
+
+
+def module_key(rel: str) -> str:
+    """What an import of a project file resolves to: its path without source extension or /index"""
+    key = os.path.normpath(rel).replace(os.sep, "/")
+    stem, extension = os.path.splitext(key)
+    if extension in SOURCE_EXTENSIONS:
+        key = stem
+    if key.endswith("/index"):
+        key = key[:-len("/index")]
+    return key
+
+
+def _keys(rel: str) -> tuple:
+    """Module keys an import of a source file may carry: its path, or its stem for bare specifiers"""
+    key = module_key(rel)
+    return key, "~" + os.path.basename(key)
+
+
+def exports_of(text: str) -> list:
+    """Names a module exports, in order of appearance"""
+    names = [match.group(1) for match in _EXPORT.finditer(text)]
+    for match in _EXPORT_LIST.finditer(text):
+        names.extend(_specifiers(match.group(1), exported=True))
+    return list(dict.fromkeys(names))
+
+
+def imports_of(text: str, rel: str) -> list:
+    """(name, module key) pairs a test imports; bare and aliased specifiers are keyed "~" + file stem
+    
+    Namespace imports count the members the test reaches through them.
+    """
+    pairs = []
+    for default, namespace, named, source in _import_clauses(text):
+        target = _target(source, rel)
+        if default:
+            pairs.append((default, target))
+        pairs.extend((name, target) for name in _specifiers(named or ""))
+        if namespace:
+            pairs.extend((name, target) for name in re.findall(rf"\b{re.escape(namespace)}\.([A-Za-z_$][\w$]*)", text))
+    return [list(pair) for pair in dict.fromkeys(pairs)]
+
+
+def _import_clauses(text: str):
+    for match in _IMPORT.finditer(text):
+        yield match.group(1), match.group(2), match.group(3), match.group(4)
+    for match in _REQUIRE.finditer(text):
+        yield None, match.group(2), match.group(1), match.group(3)
+
+
+def _specifiers(clause: str, exported: bool = False) -> list:
+    """Names in an import or export brace list; exports are listed under their public name"""
+    names = []
+    for part in clause.split(","):
+        part = re.sub(r"^\s*type\s+", "", part).strip()
+        if not part:
+            continue
+        original, _, alias = part.partition(" as ")
+        name = (alias if exported and alias else original).strip()
+        if re.fullmatch(r"[A-Za-z_$][\w$]*", name):
+            names.append(name)
+    return names
+
+
+def _target(source: str, rel: str) -> str:
+    if source.startswith("."):
+        return module_key(os.path.join(os.path.dirname(rel), source))
+    return "~" + os.path.basename(module_key(source.rstrip("/")))
+
+
+def index_for(file_path: str, build: bool = True) -> SymbolIndex:
+    """The loaded index of the project holding a file, or None outside a project
+    
+    The first test suggestion in a project builds its index with one walk of the
+    project root; without build, None until that has happened.
+    """
+    if not SYMBOLS or not file_path.endswith(SOURCE_EXTENSIONS):
+        return None
+    return loaded(SymbolIndex, file_path, _indexes, build)
+
+
+def observe(file_path: str) -> None:
+    """Refresh a test file's entry once it is written, wherever it sits in the project
+    
+    No rule checks a test file, so its hooks end here. A project without a saved
+    index is left alone: the walk of its first test suggestion picks the test up.
+    """
+    if not is_test(file_path):
+        return
+    index = index_for(file_path, build=False)
+    if index is not None:
+        index.refresh(index.relative(file_path))
+        index.save()
+
+
+def tested(file_path: str) -> tuple:
+    """(names already imported by some test, digest of those tests) for a source file
+    
+    The file's own entry is refreshed too, so the index follows every edit.
+    """
+    index = index_for(file_path)
+    if index is None:
+        return set(), ""
+    rel = index.relative(file_path)
+    index.refresh(rel)
+    result = index.tested(rel)
+    index.save()
+    return result
@@ -0,0 +1,125 @@
+"""
+Xala PM Hook Runtime - Tracing
+Opt-in per-hook timings appended to a local JSONL trace file
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .paths import cache_dir
+
+# "1" traces to ~/.cache/xalapm-hooks/trace.jsonl, any other value is the trace file path
+TRACE = os.environ.get("XALAPM_HOOKS_TRACE", "")
+
+# Per-rule milliseconds of the hook being traced, filled in by ScanGuard; None when not tracing
+rule_timings = None
+
+
+def trace_path() -> Path:
+    """Where trace records go, or None when tracing is off"""
+    if not TRACE or TRACE == "0":
+        return None
+    return cache_dir() / "trace.jsonl" if TRACE == "1" else Path(TRACE).expanduser()
+
+
+class HookTrace:
+    """Phase and per-rule timings of one hook, written as one JSON line on exit"""
+    
+    def __init__(self, path: Path, source: str, script: str = ""):
+        self.path = path
+        self.record = {"ts": round(time.time(), 3), "source": source,
+                       "plugin": Path(script).parents[1].name if script else "all"}
+        self.phases = {}
+        self.rules = {}
+        self.started = None
+        self.cancelled = False
+    
+    def __enter__(self):
+        global rule_timings
+        rule_timings = self.rules
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        global rule_timings
+        rule_timings = None
+        if self.cancelled:
+            return False
+        self.record["total_ms"] = _ms(time.perf_counter() - self.started)
+        self.record["phases"] = {name: _ms(seconds) for name, seconds in self.phases.items()}
+        if self.rules:
+            self.record["rules"] = {rule: _ms(seconds) for rule, seconds in
+                                    sorted(self.rules.items(), key=lambda item: -item[1])}
+        write(self.path, self.record)
+        return False
+    
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+    
+    def describe(self, event) -> None:
+        """Record what the hook was asked to check"""
+        self.record.update(tool=event.tool_name, ext=os.path.splitext(event.file_path)[1],
+                           bytes=len(event.content))
+    
+    def cancel(self) -> None:
+        """Drop the record, e.g. when the script handles the payload itself"""
+        self.cancelled = True
+
+
+class NoTrace:
+    """Stands in for HookTrace when tracing is off"""
+    
+    def __init__(self):
+        self.record = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    @contextmanager
+    def phase(self, name: str):
+        yield
+    
+    def describe(self, event) -> None:
+        pass
+    
+    def cancel(self) -> None:
+        pass
+
+
+def hook_trace(source: str, script: str = ""):
+    """A trace for one hook if tracing is on, else a no-op"""
+    path = trace_path()
+    return HookTrace(path, source, script) if path else NoTrace()
+
+
+def record_rule(rule_id: str, seconds: float) -> None:
+    if rule_timings is not None:
+        rule_timings[rule_id] = rule_timings.get(rule_id, 0) + seconds
+
+
+def write(path: Path, record: dict) -> None:
+    """Append one record; a single O_APPEND write keeps concurrent hooks' lines whole"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, (json.dumps(record) + "\n").encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass  # tracing must never break a hook
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
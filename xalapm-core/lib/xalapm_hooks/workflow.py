@@ -0,0 +1,153 @@
+"""
+Xala PM Hook Runtime - Workflows
+Trees of CI workflow files, the path queries workflow rules run over them, and the files' state
+"""
+
+from hashlib import blake2b
+
+# Query keys a workflow rule may use
+QUERY_KEYS = ("path", "equals", "matches", "absent")
+
+
+class Node:
+    """One node of a workflow tree: a mapping, a sequence or a scalar
+    
+    items is a dict for a mapping and a list for a sequence; value is a scalar's
+    text ("" when a key is left empty). start is where the node's key, or its
+    "-", sits in the file, and origin where each line of a scalar's text starts.
+    """
+    
+    __slots__ = ("items", "value", "start", "origin")
+    
+    def __init__(self, items, value: str, start: int, origin: list = None):
+        self.items = items
+        self.value = value
+        self.start = start
+        self.origin = origin or [start]
+    
+    def offset(self, position: int) -> int:
+        """File offset of a position in a scalar's text"""
+        row = self.value.count("\n", 0, position)
+        return self.origin[min(row, len(self.origin) - 1)] + position - (self.value.rfind("\n", 0, position) + 1)
+
+
+class Query:
+    """What a workflow rule looks for: nodes at a path, tested by their value or by what they lack
+    
+    path: dotted keys, "*" standing for any key or item; several paths are alternatives
+    equals: the node, or an item of it, must be a scalar of exactly this text
+    matches: the node, or an item of it, must be a scalar the rule's regex finds a match in
+    absent: paths, relative to the node, none of which may lead anywhere
+    A scalar or a list of scalars also reads as a mapping of those names to
+    nothing, the way GitHub reads "on: [push, pull_request]".
+    """
+    
+    __slots__ = ("paths", "equals", "absent")
+    
+    def __init__(self, spec: dict):
+        self.paths = tuple(tuple(path.split(".")) for path in spec["path"])
+        self.equals = spec.get("equals")
+        self.absent = tuple(tuple(path.split(".")) for path in spec.get("absent", ()))
+    
+    def find(self, root: Node, regex=None) -> list:
+        """(offset, job, key) of every node meeting the query, in source order
+        
+        job is the name of the job the node sits in, if any. key names the match
+        by its path and matched text, so the same finding is recognized after the
+        lines around it moved.
+        """
+        found = []
+        for path in self.paths:
+            for node, trail in _walk(root, path, ()):
+                if any(True for relative in self.absent for _ in _walk(node, relative, ())):
+                    continue
+                hit = self._hit(node, regex)
+                if hit is not None:
+                    offset, value = hit
+                    job = trail[1] if len(trail) > 1 and trail[0] == "jobs" else None
+                    found.append((offset, job, (".".join(trail), value)))
+        found.sort(key=lambda match: match[0])
+        return found
+    
+    def _hit(self, node: Node, regex) -> tuple:
+        """(offset, matched text) of the node, or of its first scalar item, passing the value tests"""
+        if self.equals is None and regex is None:
+            return node.start, node.value
+        if node.items is None:
+            scalars = (node,)
+        elif isinstance(node.items, list):
+            scalars = [item for item in node.items if item.items is None]
+        else:
+            return None
+        for scalar in scalars:
+            if self.equals is not None and scalar.value != self.equals:
+                continue
+            if regex is None:
+                return scalar.start, scalar.value
+            match = regex.search(scalar.value)
+            if match:
+                return scalar.offset(match.start()), match.group()
+        return None
+
+
+def query(spec: dict) -> dict:
+    """A validated query, its paths always listed, as stored in a rule bundle"""
+    if not isinstance(spec, dict) or not spec.get("path"):
+        raise ValueError("query must be a dict with a path")
+    unknown = set(spec) - set(QUERY_KEYS)
+    if unknown:
+        raise ValueError(f"unknown query keys {sorted(unknown)}")
+    normalized = {"path": _paths(spec["path"])}
+    if spec.get("equals") is not None:
+        normalized["equals"] = str(spec["equals"])
+    if spec.get("matches"):
+        normalized["matches"] = str(spec["matches"])
+    if spec.get("absent"):
+        normalized["absent"] = _paths(spec["absent"])
+    return normalized
+
+
+def _paths(paths) -> list:
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    for path in paths:
+        if not isinstance(path, str) or not all(path.split(".")):
+            raise ValueError(f"invalid path {path!r}")
+    return paths
+
+
+def _walk(node: Node, path: tuple, trail: tuple):
+    """(node, keys taken) of every node a path leads to; items of a sequence are taken as "*" """
+    if not path:
+        yield node, trail
+        return
+    step, rest = path[0], path[1:]
+    items = node.items
+    if isinstance(items, dict):
+        if step == "*":
+            for key, child in items.items():
+                yield from _walk(child, rest, trail + (key,))
+        elif step in items:
+            yield from _walk(items[step], rest, trail + (step,))
+    elif isinstance(items, list):
+        for child in items:
+            if step == "*":
+                yield from _walk(child, rest, trail + ("*",))
+            elif child.items is None and child.value == step:
+                yield from _walk(child, rest, trail + (step,))
+    elif node.value == step:
+        yield from _walk(node, rest, trail + (step,))
+
+
+def read(file_path: str) -> str:
+    """A workflow file's text, or None when it can't be read"""
+    try:
+        with open(file_path, encoding="utf-8") as handle:
+            return handle.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def state(file_path: str) -> str:
+    """Digest of a workflow file as it is on disk, which the findings of an Edit to it depend on"""
+    text = read(file_path)
+    return blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest() if text is not None else ""
@@ -0,0 +1,293 @@
+"""
+Xala PM Hook Runtime - YAML Tree
+Single-pass parser of CI workflow YAML into a tree of mappings, sequences and scalars
+"""
+
+import json
+import re
+from functools import lru_cache
+from itertools import accumulate
+
+from .workflow import Node
+
+_KEY = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s"'#\[\]{},][^#]*?)[ \t]*:(?:[ \t]+|$)""")
+_BLOCK = re.compile(r"[|>][-+0-9]*")
+_PROPERTIES = re.compile(r"(?:[&!]\S*(?:[ \t]+|$))+")  # anchors and tags in front of a value
+_FLOW_PLAIN = re.compile(r"[^,\[\]{}]*?(?=\s*(?:[,\]}]|:(?:[\s,\]}]|$)|$))")
+_FLOW_RUN = re.compile(r"[^,\[\]{}]*")  # a plain scalar running into a bracket, as in an unfinished edit
+_FLOW_QUOTED = re.compile(r""""(?:[^"\\]|\\.)*"?|'(?:[^']|'')*'?""")
+_SPACE = re.compile(r"\s*")
+
+# Characters after which a quote opens a quoted scalar rather than sitting inside a plain one
+_BEFORE_QUOTE = " \t[{,"
+
+
+@lru_cache(maxsize=16)
+def parse(text: str) -> Node:
+    """The tree of a workflow file, from one pass over its lines
+    
+    Covers the block and flow YAML CI files are written in. Anchors and tags
+    are dropped and aliases stay plain scalars. Kept per text, so the file an
+    Edit started from is not parsed again when the previous edit already did.
+    """
+    tokens = _tokens(text)
+    if not tokens:
+        return Node({}, None, 0)
+    root, _ = _block(tokens, 0)
+    return root
+
+
+def _tokens(text: str) -> list:
+    """[indent, code, offset, block] per content line, comments cut off
+    
+    A block scalar's lines are folded into the line introducing it as
+    block = (text, origin), and a flow collection spread over lines is joined.
+    """
+    tokens = []
+    lines = text.split("\n")
+    starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+    row = 0
+    while row < len(lines):
+        indent = _indent(lines[row])
+        code = _code(lines[row][indent:])
+        row += 1
+        if not code or code in ("---", "...") or code.startswith("%"):
+            continue
+        token = [indent, code, starts[row - 1] + indent, None]
+        tokens.append(token)
+        
+        head = code
+        while _is_item(head):
+            head = head[1:].lstrip(" \t")
+        key = _KEY.match(head)
+        value = _PROPERTIES.sub("", head[key.end():] if key else head, count=1)
+        if _BLOCK.fullmatch(value):
+            # Its lines are those indented past the key (or the "-" of a bare item)
+            token[3], row = _block_scalar(lines, starts, row, indent + len(code) - len(head) if key else indent)
+        else:
+            row = _join_flow(token, lines, row, _depth(value))
+    return tokens
+
+
+def _block_scalar(lines: list, starts: list, first: int, column: int) -> tuple:
+    """((text, origin), next row) of the block scalar whose lines start at first, indented past column"""
+    row = first
+    while row < len(lines) and (not lines[row].strip() or _indent(lines[row]) > column):
+        row += 1
+    body_rows = list(range(first, row))
+    while body_rows and not lines[body_rows[-1]].strip():
+        body_rows.pop()
+    dedent = min((_indent(lines[index]) for index in body_rows if lines[index].strip()), default=0)
+    return ("\n".join(lines[index][dedent:] for index in body_rows),
+            [starts[index] + min(dedent, len(lines[index])) for index in body_rows]), row
+
+
+def _join_flow(token: list, lines: list, row: int, depth: int) -> int:
+    """Join the lines a flow collection leaves open onto its token, returning the row after them"""
+    while depth > 0 and row < len(lines):
+        more = _code(lines[row].strip())
+        token[1] += " " + more
+        depth += _depth(more)
+        row += 1
+    return row
+
+
+def _code(line: str) -> str:
+    """A line without its comment; quotes open only where a scalar can start"""
+    if "#" not in line:
+        return line.rstrip()
+    quote = None
+    previous = " "
+    position = 0
+    length = len(line)
+    while position < length:
+        char = line[position]
+        if quote:
+            if char == "\\" and quote == '"':
+                position += 1
+            elif char == quote:
+                quote = None
+        elif char == "#" and previous in " \t":
+            return line[:position].rstrip()
+        elif char in "\"'" and previous in _BEFORE_QUOTE:
+            quote = char
+        previous = char
+        position += 1
+    return line.rstrip()
+
+
+def _depth(code: str) -> int:
+    """Brackets a line leaves open, when it holds a flow collection"""
+    if not code or code[0] not in "[{" and ": [" not in code and ": {" not in code:
+        return 0
+    depth = 0
+    quote = None
+    for char in code:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+    return depth
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def _is_item(code: str) -> bool:
+    return code == "-" or code.startswith(("- ", "-\t"))
+
+
+def _block(tokens: list, index: int) -> tuple:
+    """(node, next token) of the node the token at index opens"""
+    _, code, offset, block = tokens[index]
+    if _is_item(code):
+        return _sequence(tokens, index)
+    if _KEY.match(code):
+        return _mapping(tokens, index)
+    if block is not None:
+        return Node(None, block[0], offset, block[1]), index + 1
+    return _value(code, offset), index + 1
+
+
+def _mapping(tokens: list, index: int) -> tuple:
+    indent = tokens[index][0]
+    items = {}
+    node = Node(items, None, tokens[index][2])
+    while index < len(tokens):
+        column, code, offset, block = tokens[index]
+        if column < indent or column == indent and _is_item(code):
+            break
+        key = _KEY.match(code) if column == indent else None
+        index += 1
+        if key is None:
+            continue  # a stray line, or one under a key whose value was inline
+        child, index = _entry(tokens, index, indent, key)
+        child.start = offset
+        items[_unquote(key.group(1))] = child
+    return node, index
+
+
+def _entry(tokens: list, index: int, indent: int, key) -> tuple:
+    """(node, next token) of the value of the key on the token before index"""
+    _, code, offset, block = tokens[index - 1]
+    if block is not None:
+        return Node(None, block[0], offset, block[1]), index
+    value = code[key.end():]
+    properties = _PROPERTIES.match(value)
+    if properties:
+        value = value[properties.end():]
+    if value:
+        child = _value(value, offset + len(code) - len(value))
+        # A plain scalar may go on over more deeply indented lines
+        while child.items is None and index < len(tokens) and tokens[index][0] > indent:
+            child.value += "\n" + tokens[index][1]
+            child.origin.append(tokens[index][2])
+            index += 1
+        return child, index
+    if index < len(tokens) and (tokens[index][0] > indent or tokens[index][0] == indent
+                                and _is_item(tokens[index][1])):
+        return _block(tokens, index)
+    return Node(None, "", offset + key.end()), index
+
+
+def _sequence(tokens: list, index: int) -> tuple:
+    indent = tokens[index][0]
+    items = []
+    node = Node(items, None, tokens[index][2])
+    while index < len(tokens):
+        column, code, offset, block = tokens[index]
+        if column > indent:
+            index += 1
+            continue
+        if column < indent or not _is_item(code):
+            break
+        rest = code[1:].lstrip(" \t")
+        if rest:
+            # The item's own node starts after the "-", at the column its further keys line up with
+            shift = len(code) - len(rest)
+            tokens[index] = [column + shift, rest, offset + shift, block]
+            child, index = _block(tokens, index)
+        elif index + 1 < len(tokens) and tokens[index + 1][0] > indent:
+            child, index = _block(tokens, index + 1)
+        else:
+            child = Node(None, "", offset)
+            index += 1
+        child.start = offset
+        items.append(child)
+    return node, index
+
+
+def _value(code: str, offset: int) -> Node:
+    """Node of an inline value: a flow collection or a scalar"""
+    properties = _PROPERTIES.match(code)
+    if properties:
+        code = code[properties.end():]
+        offset += properties.end()
+    if code[:1] in "[{":
+        return _flow(code, 0, offset)[0]
+    quoted = code[:1] in "\"'"
+    return Node(None, _unquote(code), offset, [offset + quoted])
+
+
+def _flow(code: str, position: int, offset: int) -> tuple:
+    """(node, end) of the flow collection or scalar at a position"""
+    position = _SPACE.match(code, position).end()
+    opening = code[position:position + 1]
+    if opening in ("[", "{"):
+        return _collection(code, position, offset)
+    quoted = opening in ("\"", "'")
+    scalar = (_FLOW_QUOTED if quoted else _FLOW_PLAIN).match(code, position) or _FLOW_RUN.match(code, position)
+    start = offset + position
+    return Node(None, _unquote(scalar.group()), start, [start + quoted]), scalar.end()
+
+
+def _collection(code: str, position: int, offset: int) -> tuple:
+    """(node, end) of the flow sequence or mapping opening at a position"""
+    closing = "]" if code[position] == "[" else "}"
+    items = [] if closing == "]" else {}
+    node = Node(items, None, offset + position)
+    position += 1
+    while True:
+        position = _SPACE.match(code, position).end()
+        char = code[position:position + 1]
+        if not char or char == closing:
+            return node, position + 1
+        if char in ",]}":
+            position += 1
+            continue
+        child, end = _flow(code, position, offset)
+        if isinstance(items, list):
+            items.append(child)
+        else:
+            key = child
+            child, end = _after_key(code, end, offset, key)
+            if key.items is None:  # a collection as a key can't be walked by name
+                items[key.value] = child
+        position = max(end, position + 1)
+
+
+def _after_key(code: str, end: int, offset: int, key: Node) -> tuple:
+    """(node, end) of the value after a flow mapping key, an empty scalar when it has none"""
+    end = _SPACE.match(code, end).end()
+    if not code.startswith(":", end):
+        return Node(None, "", key.start), end
+    child, end = _flow(code, end + 1, offset)
+    child.start = key.start
+    return child, end
+
+
+def _unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text[1:-1]
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return text[1:-1].replace("''", "'")
+    return text
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Xala PM Hook Runtime CLI
+Manages the shared hook daemon used by the plugin checkers
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lib"))
+
+from xalapm_hooks.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())